@@ -1,4 +1,5 @@
-import { createContext, useState, useEffect } from "react";
+import { createContext, useState, useEffect, useCallback } from "react";
+import API from "../api/axios";
 
 export const CartContext = createContext();
 
@@ -18,6 +19,51 @@ export function CartProvider({ children }) {
     localStorage.setItem("cart", JSON.stringify(cart));
   }, [cart]);
 
+  // Server quote for the whole cart: current prices, stock, totals and a
+  // signed token checkout accepts. Refreshed when products or quantities
+  // change (not prices, which the quote itself updates) and before the
+  // token expires.
+  const [quote, setQuote] = useState(null);
+  const [quoteVersion, setQuoteVersion] = useState(0);
+  const cartKey = JSON.stringify(cart.map((item) => [item.id, item.qty]));
+  const refreshQuote = useCallback(() => setQuoteVersion((v) => v + 1), []);
+
+  useEffect(() => {
+    const items = JSON.parse(cartKey).map(([product_id, qty]) => ({ product_id, qty }));
+    if (items.length === 0) {
+      setQuote(null);
+      return;
+    }
+    let active = true;
+    const timer = setTimeout(() => {
+      API.post("/api/orders/quote/", { items })
+        .then((res) => {
+          if (!active) return;
+          setQuote(res.data);
+          const prices = Object.fromEntries(res.data.lines.map((line) => [line.product_id, Number(line.price)]));
+          setCart((current) => current.map((item) =>
+            prices[item.id] !== undefined && prices[item.id] !== Number(item.price)
+              ? { ...item, price: prices[item.id] }
+              : item
+          ));
+        })
+        .catch((err) => {
+          console.error("Cannot refresh cart prices:", err);
+          if (active) setQuote(null);
+        });
+    }, 300);
+    return () => {
+      active = false;
+      clearTimeout(timer);
+    };
+  }, [cartKey, quoteVersion]);
+
+  useEffect(() => {
+    if (!quote?.expires_in) return;
+    const timer = setTimeout(refreshQuote, Math.max(quote.expires_in - 60, 30) * 1000);
+    return () => clearTimeout(timer);
+  }, [quote, refreshQuote]);
+
   // Add item to cart
   const addToCart = (product, quantity = 1) => {
     const exists = cart.find((item) => item.id === product.id);
@@ -61,7 +107,7 @@ export function CartProvider({ children }) {
   };
 
   return (
-    <CartContext.Provider value={{ cart, addToCart, updateQty, removeItem, clearCart, buyNow }}>
+    <CartContext.Provider value={{ cart, addToCart, updateQty, removeItem, clearCart, buyNow, quote, refreshQuote }}>
       {children}
     </CartContext.Provider>
   );
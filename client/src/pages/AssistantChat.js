@@ -39,11 +39,11 @@ const AssistantChat = () => {
                 // We're protected, so we should have a token
                 const [userRes, ordersRes] = await Promise.all([
                     API.get('/api/user/').catch(() => ({ data: {} })),
-                    API.get('/api/orders/my-orders/').catch(() => ({ data: [] }))
+                    API.get('/api/orders/my-orders/?page_size=5').catch(() => ({ data: { results: [] } }))
                 ]);
 
                 const user = userRes.data;
-                const orders = ordersRes.data;
+                const orders = ordersRes.data.results;
 
                 let orderContext = "User has no previous orders.";
                 if (orders && orders.length > 0) {
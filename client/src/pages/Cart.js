@@ -7,14 +7,19 @@ import Footer from "../components/Footer";
 import { calculateFakeOriginalPrice } from "../utils/priceHelper";
 
 export default function Cart() {
-  const { cart, updateQty, removeItem } = useContext(CartContext);
+  const { cart, updateQty, removeItem, quote } = useContext(CartContext);
   const navigate = useNavigate();
 
-  const totalMRP = cart.reduce((acc, item) => acc + item.price * item.qty, 0);
-  const platformFee = 7;
+  // Server figures when the quote is in, local ones until then.
+  const localMRP = cart.reduce((acc, item) => acc + item.price * item.qty, 0);
+  const totalMRP = quote ? Number(quote.subtotal) : localMRP;
+  const platformFee = quote ? Number(quote.platform_fee) : 7;
   const discount = 0;
-  const deliveryFee = totalMRP >= 499 ? 0 : 100;
-  const finalAmount = totalMRP - discount + platformFee + deliveryFee;
+  const deliveryFee = quote ? Number(quote.delivery_fee) : (localMRP >= 499 ? 0 : 100);
+  const finalAmount = quote ? Number(quote.total) : totalMRP - discount + platformFee + deliveryFee;
+  const quoteLines = Object.fromEntries((quote?.lines || []).map((line) => [line.product_id, line]));
+  const missing = new Set(quote?.missing || []);
+  const unavailable = quote && !quote.quote;
 
   // Styles moved to CSS at bottom
 
@@ -38,10 +43,12 @@ export default function Cart() {
                   <div className="item-img-wrapper">
                     <img
                       src={
-                        item.product_images?.length > 0
-                          ? item.product_images[0].image
-                          : (item.images?.[0] || "https://via.placeholder.com/150?text=No+Image")
+                        item.thumbnail
+                          || item.product_images?.[0]?.image
+                          || item.images?.[0]
+                          || "https://via.placeholder.com/150?text=No+Image"
                       }
+                      srcSet={item.thumbnail ? item.thumbnail_srcset?.webp : undefined}
                       alt={item.title}
                     />
                   </div>
@@ -60,6 +67,12 @@ export default function Cart() {
                       </span>
                     </p>
 
+                    {missing.has(item.id) ? (
+                      <p className="stock-warning">No longer available. Please remove it.</p>
+                    ) : quoteLines[item.id] && !quoteLines[item.id].in_stock ? (
+                      <p className="stock-warning">Only {quoteLines[item.id].stock} left in stock.</p>
+                    ) : null}
+
                     <div className="item-actions">
                       <div className="qty-selector-cart">
                         <button className="qty-btn-cart" onClick={() => updateQty(item.id, Math.max(1, item.qty - 1))}>−</button>
@@ -126,8 +139,8 @@ export default function Cart() {
                   <span className="highlight">₹{finalAmount.toLocaleString()}</span>
                 </div>
 
-                <button className="checkout-btn" onClick={() => navigate("/checkout")}>
-                  Proceed to Checkout
+                <button className="checkout-btn" disabled={unavailable} onClick={() => navigate("/checkout")}>
+                  {unavailable ? "Review Your Cart" : "Proceed to Checkout"}
                 </button>
               </div>
             </div>
@@ -214,6 +227,12 @@ export default function Cart() {
         }
 
         .item-details { flex: 1; display: flex; flex-direction: column; }
+        .stock-warning {
+          color: #f87171;
+          font-size: 13px;
+          font-weight: 600;
+          margin: 4px 0 8px;
+        }
         .item-details h3 {
           font-size: 18px;
           font-weight: 700;
@@ -354,6 +373,10 @@ export default function Cart() {
         .checkout-btn:active {
           transform: scale(0.98);
         }
+        .checkout-btn:disabled {
+          opacity: 0.5;
+          cursor: not-allowed;
+        }
 
         /* MOBILE OVERRIDES */
         @media (max-width: 768px) {
@@ -1,5 +1,5 @@
 // src/pages/Checkout.js
-import React, { useEffect, useState, useContext } from "react";
+import React, { useEffect, useState, useContext, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import Navbar from "../components/Navbar";
 import API from "../api/axios";
@@ -9,12 +9,15 @@ import Container from "../components/Container";
 import { toast } from "react-toastify";
 
 export default function Checkout() {
-  const { cart, clearCart } = useContext(CartContext);
+  const { cart, clearCart, quote, refreshQuote } = useContext(CartContext);
   const navigate = useNavigate();
 
   const [user, setUser] = useState(null);
   const [userLoading, setUserLoading] = useState(true);
   const [placing, setPlacing] = useState(false);
+  // One key per checkout attempt, so a retried request after a dropped
+  // connection is answered by the server instead of placing a second order.
+  const idempotencyKey = useRef(null);
 
   const [form, setForm] = useState({
     full_name: "",
@@ -27,10 +30,12 @@ export default function Checkout() {
 
   const [paymentMethod, setPaymentMethod] = useState("COD"); // 'COD' or 'ONLINE'
 
-  const total = cart.reduce((a, b) => a + Number(b.price || 0) * Number(b.qty || 1), 0);
-  const platformFee = 7;
-  const deliveryFee = total >= 499 ? 0 : 100;
-  const finalTotal = total + platformFee + deliveryFee;
+  // The server quote's figures are what a quoted checkout is charged.
+  const localTotal = cart.reduce((a, b) => a + Number(b.price || 0) * Number(b.qty || 1), 0);
+  const total = quote ? Number(quote.subtotal) : localTotal;
+  const platformFee = quote ? Number(quote.platform_fee) : 7;
+  const deliveryFee = quote ? Number(quote.delivery_fee) : (localTotal >= 499 ? 0 : 100);
+  const finalTotal = quote ? Number(quote.total) : total + platformFee + deliveryFee;
 
   useEffect(() => {
     let mounted = true;
@@ -83,9 +88,10 @@ export default function Checkout() {
 
     try {
       // 1. Initiate Payment
+      // The server charges the quoted total, or re-prices the items itself.
       const result = await API.post("/api/orders/pay/initiate/", {
-        amount: finalTotal,
-        // You might want to pass other details if needed for logging
+        items: payload.items,
+        quote: payload.quote,
       });
 
       if (!result.data || !result.data.id) {
@@ -111,12 +117,15 @@ export default function Checkout() {
             items: payload.items,
             shipping_address: payload.shipping_address,
             total_amount: finalTotal,
+            quote: payload.quote,
             is_priority: payload.is_priority,
             priority_hours: payload.priority_hours
           };
 
           try {
-            const verifyRes = await API.post("/api/orders/pay/verify/", data);
+            const verifyRes = await API.post("/api/orders/pay/verify/", data, {
+              headers: { "Idempotency-Key": response.razorpay_payment_id },
+            });
             if (verifyRes.data.success) {
               toast.success("Payment Successful! Order Placed. 🚀");
               finalizeOrder();
@@ -181,6 +190,12 @@ export default function Checkout() {
       return;
     }
 
+    if (quote && !quote.quote) {
+      toast.error("Some items are unavailable or low on stock. Please review your cart.");
+      navigate("/cart");
+      return;
+    }
+
     setPlacing(true);
 
     const payload = {
@@ -191,6 +206,7 @@ export default function Checkout() {
       })),
       shipping_address: form,
       total_amount: finalTotal,
+      quote: quote?.quote,
       payment_method: paymentMethod,
       is_priority: isPriority,
       priority_hours: isPriority ? priorityHours : null,
@@ -203,7 +219,13 @@ export default function Checkout() {
 
     // Default COD flow
     try {
-      await API.post("/api/orders/create/", payload);
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+      }
+      await API.post("/api/orders/create/", payload, {
+        headers: { "Idempotency-Key": idempotencyKey.current },
+      });
+      idempotencyKey.current = null;
       toast.success(isPriority ? "Priority Order Placed! 🚀" : "Order placed successfully!", {
         theme: "dark",
         icon: isPriority ? "⚡" : "🚀"
@@ -212,6 +234,10 @@ export default function Checkout() {
     } catch (err) {
       const serverMsg = err?.response?.data?.detail || err?.response?.data?.error;
       console.error("ORDER ERROR:", err.response?.data ?? err);
+      // Keep the key only when no answer arrived, so the retry is deduplicated.
+      if (err?.response) idempotencyKey.current = null;
+      // Expired prices or a changed cart: fetch a fresh quote for the retry.
+      if (err?.response) refreshQuote();
       toast.error(serverMsg || "Error placing order");
       setPlacing(false);
     }
@@ -481,7 +481,10 @@ export default function Home() {
                 >
                   <div className="product-img-wrap">
                     <img
-                      src={product.product_images?.length > 0 ? product.product_images[0].image : (product.images?.[0] || "https://via.placeholder.com/300x300?text=No+Image")}
+                      src={product.thumbnail || "https://via.placeholder.com/300x300?text=No+Image"}
+                      srcSet={product.thumbnail_srcset?.webp}
+                      sizes="(max-width: 768px) 50vw, 300px"
+                      loading="lazy"
                       alt={product.title}
                       style={{ width: "100%", height: "100%", objectFit: "contain", padding: "10px" }}
                     />
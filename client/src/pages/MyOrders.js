@@ -8,14 +8,30 @@ import { Link } from "react-router-dom";
 export default function MyOrders() {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     API.get("/api/orders/my-orders/")
-      .then((res) => setOrders(res.data))
+      .then((res) => {
+        setOrders(res.data.results);
+        setNext(res.data.next);
+      })
       .catch((err) => console.log(err))
       .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    API.get(next)
+      .then((res) => {
+        setOrders((prev) => [...prev, ...res.data.results]);
+        setNext(res.data.next);
+      })
+      .catch((err) => console.log(err))
+      .finally(() => setLoadingMore(false));
+  };
+
   return (
     <div style={{ background: "var(--bg-darker)", minHeight: "100vh", color: "var(--text-main)" }}>
       <Navbar />
@@ -102,6 +118,26 @@ export default function MyOrders() {
                   </Link>
                 </div>
               ))}
+              {next && (
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  style={{
+                    justifySelf: "center",
+                    background: "transparent",
+                    color: "var(--primary)",
+                    border: "1px solid var(--primary)",
+                    padding: "10px 24px",
+                    borderRadius: "8px",
+                    fontSize: "14px",
+                    fontWeight: "600",
+                    cursor: loadingMore ? "default" : "pointer",
+                    opacity: loadingMore ? 0.6 : 1
+                  }}
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              )}
             </div>
           )}
         </div>
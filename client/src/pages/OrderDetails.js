@@ -32,7 +32,18 @@ export default function OrderDetail() {
           <h2>{order.order_id || `Order #${order.id}`}</h2>
 
           <p><b>Status:</b> {order.status}</p>
-          <p><b>Total:</b> ₹{order.total_price}</p>
+          <p><b>Total:</b> ₹{order.total_amount}</p>
+
+          {order.timeline?.length > 0 && (
+            <>
+              <h3 style={{ marginTop: "20px" }}>Timeline:</h3>
+              {order.timeline.map((event, i) => (
+                <div key={i} style={{ padding: "6px 0", borderBottom: "1px solid #eee" }}>
+                  <b style={{ textTransform: "capitalize" }}>{event.status}</b> — {new Date(event.at).toLocaleString()}
+                </div>
+              ))}
+            </>
+          )}
 
           <h3 style={{ marginTop: "20px" }}>Items:</h3>
 
@@ -44,7 +55,7 @@ export default function OrderDetail() {
                 borderBottom: "1px solid #eee",
               }}
             >
-              <b>{item.product.title}</b> × {item.quantity}
+              <b>{item.title}</b> × {item.quantity}
             </div>
           ))}
 
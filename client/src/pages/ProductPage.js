@@ -501,7 +501,10 @@ export default function ProductPage() {
                   >
                     <div className="related-img-box">
                       <img
-                        src={p.product_images?.length > 0 ? p.product_images[0].image : (p.images?.[0] || "https://via.placeholder.com/300x300")}
+                        src={p.thumbnail || "https://via.placeholder.com/300x300"}
+                        srcSet={p.thumbnail_srcset?.webp}
+                        sizes="(max-width: 768px) 50vw, 250px"
+                        loading="lazy"
                         alt={p.title}
                       />
                     </div>
@@ -57,7 +57,7 @@ export default function Profile() {
     API.get(`/api/orders/my-orders/?_t=${Date.now()}`)
       .then((res) => {
         console.log("Orders:", res.data);
-        setOrders(res.data);
+        setOrders(res.data.results);
       })
       .catch((err) => {
         console.error(err);
@@ -211,7 +211,7 @@ export default function Profile() {
                 {selectedOrder.items.map((item) => (
                   <li key={item.id} style={{ marginBottom: 12, paddingBottom: 12, borderBottom: "1px solid var(--glass-border)", display: "flex", justifyContent: "space-between" }}>
                     <div>
-                      <div style={{ fontWeight: "600", color: "var(--text-main)" }}>{item.product?.title || "Product Removed"}</div>
+                      <div style={{ fontWeight: "600", color: "var(--text-main)" }}>{item.title || "Product Removed"}</div>
                       <div style={{ fontSize: "14px", color: "var(--text-muted)" }}>Qty: {item.quantity} × ₹{item.price_at_purchase?.toLocaleString()}</div>
                     </div>
                     <div style={{ fontWeight: "600", color: "var(--text-main)" }}>
@@ -16,7 +16,7 @@ export default function Projects() {
     const [projectsLoading, setProjectsLoading] = useState(true);
 
     useEffect(() => {
-        API.get("/api/products/?is_innovative_project=true")
+        API.get("/api/products/?is_innovative_project=true&expand=description,images,product_images")
             .then(res => {
                 if (res.data.results) {
                     setInnovativeProjects(res.data.results);
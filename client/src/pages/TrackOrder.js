@@ -41,6 +41,8 @@ export default function TrackOrder() {
     };
 
     const currentStep = order ? getStatusStep(order.status) : 0;
+    // When each status was reached, from the order's status timeline.
+    const reachedAt = Object.fromEntries((order?.timeline || []).map((event) => [event.status, event.at]));
 
     return (
         <div style={{ background: "var(--bg-darker)", minHeight: "100vh", color: "var(--text-main)", display: "flex", flexDirection: "column" }}>
@@ -157,6 +159,11 @@ export default function TrackOrder() {
                                                     {isCompleted ? <FaCheckCircle /> : (stepNum === 1 ? <FaClock /> : (stepNum === 3 ? <FaTruck /> : (stepNum === 4 ? <FaBox /> : stepNum)))}
                                                 </div>
                                                 <span style={{ fontSize: "0.85rem", color: isActive ? "white" : "var(--text-muted)", fontWeight: isActive ? "600" : "400" }}>{step}</span>
+                                                {reachedAt[step.toLowerCase()] && (
+                                                    <span style={{ fontSize: "0.75rem", color: "var(--text-muted)" }}>
+                                                        {new Date(reachedAt[step.toLowerCase()]).toLocaleString([], { day: "numeric", month: "short", hour: "2-digit", minute: "2-digit" })}
+                                                    </span>
+                                                )}
                                             </div>
                                         );
                                     })}
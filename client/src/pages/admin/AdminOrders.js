@@ -10,16 +10,25 @@ export default function AdminOrders() {
   const [searchTerm, setSearchTerm] = useState("");
   const [statusFilter, setStatusFilter] = useState("all");
   const [selectedOrder, setSelectedOrder] = useState(null);
+  const [next, setNext] = useState(null);
+  const [checked, setChecked] = useState(new Set());
+  const [bulkStatus, setBulkStatus] = useState("shipped");
 
 
+  // Filtering happens on the server; wait for typing to pause.
   useEffect(() => {
-    fetchOrders();
-  }, []);
+    const timer = setTimeout(fetchOrders, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm, statusFilter]);
 
   const fetchOrders = () => {
-    API.get("/api/admin/orders/")
+    const params = {};
+    if (searchTerm) params.order_id = searchTerm.trim();
+    if (statusFilter !== "all") params.status = statusFilter;
+    API.get("/api/admin/orders/", { params })
       .then((res) => {
-        setOrders(res.data);
+        setOrders(res.data.results);
+        setNext(res.data.next);
         setLoading(false);
       })
       .catch((err) => {
@@ -28,6 +37,15 @@ export default function AdminOrders() {
       });
   };
 
+  const loadMore = () => {
+    API.get(next)
+      .then((res) => {
+        setOrders((prev) => [...prev, ...res.data.results]);
+        setNext(res.data.next);
+      })
+      .catch((err) => console.error(err));
+  };
+
   const handleStatusChange = (id, newStatus, e) => {
     if (e) e.stopPropagation(); // Prevent modal from opening
     API.put(`/api/admin/orders/${id}/status/`, { status: newStatus })
@@ -43,14 +61,35 @@ export default function AdminOrders() {
       .catch((err) => alert("Failed to update status"));
   };
 
-  const filteredOrders = orders.filter((order) => {
-    const username = order.user?.username || "";
-    const matchesSearch =
-      username.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      order.id.toString().includes(searchTerm);
-    const matchesStatus = statusFilter === "all" || order.status === statusFilter;
-    return matchesSearch && matchesStatus;
-  });
+  const toggleChecked = (id, e) => {
+    e.stopPropagation();
+    setChecked((prev) => {
+      const updated = new Set(prev);
+      if (updated.has(id)) updated.delete(id);
+      else updated.add(id);
+      return updated;
+    });
+  };
+
+  const toggleAll = () => {
+    setChecked((prev) => (prev.size === orders.length ? new Set() : new Set(orders.map((o) => o.id))));
+  };
+
+  // One request for the whole selection; orders that cannot move forward are reported back.
+  const handleBulkStatus = () => {
+    const ids = [...checked];
+    API.post("/api/admin/orders/status/", { ids, status: bulkStatus })
+      .then((res) => {
+        const updated = new Set(res.data.updated);
+        setOrders((prev) => prev.map((o) => (updated.has(o.id) ? { ...o, status: bulkStatus } : o)));
+        setChecked(new Set());
+        toast.success(`${updated.size} order(s) marked ${bulkStatus}`);
+        if (res.data.skipped.length) {
+          toast.warn(`${res.data.skipped.length} order(s) skipped: ${res.data.skipped[0].reason}`);
+        }
+      })
+      .catch((err) => toast.error(err?.response?.data?.error || "Failed to update orders"));
+  };
 
   if (loading) return <ModernLoader />;
 
@@ -63,7 +102,7 @@ export default function AdminOrders() {
             <FaSearch style={styles.searchIcon} />
             <input
               type="text"
-              placeholder="Search by ID or User..."
+              placeholder="Search by Order ID..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
               style={styles.searchInput}
@@ -86,10 +125,30 @@ export default function AdminOrders() {
         </div>
       </div>
 
+      {checked.size > 0 && (
+        <div style={styles.bulkBar}>
+          <span>{checked.size} selected</span>
+          <select value={bulkStatus} onChange={(e) => setBulkStatus(e.target.value)} style={styles.actionSelect}>
+            <option value="paid">Paid</option>
+            <option value="shipped">Shipped</option>
+            <option value="delivered">Delivered</option>
+          </select>
+          <button onClick={handleBulkStatus} style={styles.actionSelect}>Apply</button>
+          <button onClick={() => setChecked(new Set())} style={styles.actionSelect}>Clear</button>
+        </div>
+      )}
+
       <div style={styles.tableCard}>
         <table style={styles.table}>
           <thead>
             <tr style={styles.theadRow}>
+              <th style={styles.th}>
+                <input
+                  type="checkbox"
+                  checked={orders.length > 0 && checked.size === orders.length}
+                  onChange={toggleAll}
+                />
+              </th>
               <th style={styles.th}>Order ID</th>
               <th style={styles.th}>Customer</th>
               <th style={styles.th}>City</th>
@@ -100,7 +159,7 @@ export default function AdminOrders() {
             </tr>
           </thead>
           <tbody>
-            {filteredOrders.map((order) => (
+            {orders.map((order) => (
               <tr
                 key={order.id}
                 style={{ ...styles.tr, cursor: 'pointer' }}
@@ -108,7 +167,14 @@ export default function AdminOrders() {
                 onMouseEnter={(e) => e.currentTarget.style.background = "var(--bg-darker)"}
                 onMouseLeave={(e) => e.currentTarget.style.background = "transparent"}
               >
-                <td style={styles.td}>#{order.id}</td>
+                <td style={styles.td} onClick={(e) => e.stopPropagation()}>
+                  <input
+                    type="checkbox"
+                    checked={checked.has(order.id)}
+                    onChange={(e) => toggleChecked(order.id, e)}
+                  />
+                </td>
+                <td style={styles.td}>{order.order_id || `#${order.id}`}</td>
                 <td style={styles.td}>
                   <div style={styles.userCell}>
                     <div style={styles.avatar}>
@@ -147,9 +213,14 @@ export default function AdminOrders() {
             ))}
           </tbody>
         </table>
-        {filteredOrders.length === 0 && (
+        {orders.length === 0 && (
           <div style={styles.emptyState}>No orders found matching your criteria.</div>
         )}
+        {next && (
+          <div style={{ ...styles.emptyState, padding: "16px" }}>
+            <button onClick={loadMore} style={styles.actionSelect}>Load more</button>
+          </div>
+        )}
       </div>
 
       {/* ORDER DETAILS MODAL */}
@@ -193,12 +264,12 @@ export default function AdminOrders() {
                   {selectedOrder.items?.map((item, idx) => (
                     <div key={idx} style={styles.itemRow}>
                       <img
-                        src={item.product?.images?.[0] || "https://via.placeholder.com/50"}
-                        alt={item.product?.title}
+                        src={item.thumbnail || "https://via.placeholder.com/50"}
+                        alt={item.title}
                         style={{ width: 50, height: 50, borderRadius: 8, objectFit: "cover", background: "#fff" }}
                       />
                       <div style={{ flex: 1 }}>
-                        <div style={{ fontWeight: "600", color: "white" }}>{item.product?.title || "Unknown Product"}</div>
+                        <div style={{ fontWeight: "600", color: "white" }}>{item.title || "Unknown Product"}</div>
                         <div style={{ fontSize: "12px", color: "var(--text-muted)" }}>Qty: {item.quantity} × ₹{item.price_at_purchase}</div>
                       </div>
                       <div style={{ fontWeight: "700", color: "var(--primary)" }}>
@@ -323,6 +394,17 @@ const styles = {
     cursor: "pointer",
     fontSize: "0.95rem",
   },
+  bulkBar: {
+    display: "flex",
+    alignItems: "center",
+    gap: 12,
+    marginBottom: 16,
+    padding: "12px 20px",
+    borderRadius: 12,
+    background: "rgba(6, 182, 212, 0.1)",
+    border: "1px solid var(--glass-border)",
+    color: "var(--text-main)",
+  },
   tableCard: {
     background: "var(--bg-card)",
     borderRadius: 20,
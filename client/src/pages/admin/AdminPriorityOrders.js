@@ -2,10 +2,17 @@ import React, { useEffect, useState } from "react";
 import API from "../../api/axios";
 import { toast } from "react-toastify";
 import ModernLoader from "../../components/ModernLoader";
-import { FaBoxOpen, FaClipboardList, FaSearch, FaBolt } from "react-icons/fa";
+import { FaBoxOpen, FaClipboardList, FaSearch, FaBolt, FaClock } from "react-icons/fa";
+
+// "2h 05m" from a number of seconds.
+const formatDuration = (seconds) => {
+    const minutes = Math.floor(Math.abs(seconds) / 60);
+    return `${Math.floor(minutes / 60)}h ${String(minutes % 60).padStart(2, "0")}m`;
+};
 
 export default function AdminPriorityOrders() {
     const [orders, setOrders] = useState([]);
+    const [counts, setCounts] = useState(null);
     const [filteredOrders, setFilteredOrders] = useState([]);
     const [loading, setLoading] = useState(true);
     const [search, setSearch] = useState("");
@@ -37,12 +44,13 @@ export default function AdminPriorityOrders() {
 
     const fetchOrders = () => {
         setLoading(true);
-        API.get("/api/admin/orders/")
+        // Open priority orders, earliest deadline first.
+        API.get("/api/admin/orders/priority/", { params: { page_size: 100 } })
             .then((res) => {
-                // Filter for ONLY priority orders
-                const priority = res.data.filter(o => o.is_priority);
+                const priority = res.data.results;
                 setOrders(priority);
                 setFilteredOrders(priority);
+                setCounts(res.data.counts);
                 setLoading(false);
             })
             .catch((err) => {
@@ -89,6 +97,15 @@ export default function AdminPriorityOrders() {
         position: "relative"
     };
 
+    const bucketStyle = {
+        padding: "12px 18px",
+        borderRadius: "12px",
+        border: "1px solid var(--glass-border)",
+        background: "var(--bg-card)",
+        minWidth: "90px",
+        textAlign: "center"
+    };
+
     const statusColors = {
         pending: "#facc15",
         paid: "#60a5fa",
@@ -106,7 +123,7 @@ export default function AdminPriorityOrders() {
             <div style={headerStyle}>
                 <div>
                     <h1 style={{ margin: 0, fontSize: "2rem", display: "flex", alignItems: "center", gap: "12px", color: "var(--primary)" }}>
-                        <FaBolt /> Priority Orders ({orders.length})
+                        <FaBolt /> Priority Orders ({counts ? counts.total : orders.length})
                     </h1>
                     <p style={{ color: "var(--text-muted)", marginTop: "5px" }}>
                         High priority deliveries within Chennai region
@@ -148,11 +165,33 @@ export default function AdminPriorityOrders() {
                         <option value="pending">Pending</option>
                         <option value="paid">Paid</option>
                         <option value="shipped">Shipped</option>
-                        <option value="delivered">Delivered</option>
                     </select>
                 </div>
             </div>
 
+            {counts && (
+                <div style={{ display: "flex", gap: "10px", flexWrap: "wrap", marginBottom: "24px" }}>
+                    <div style={{ ...bucketStyle, borderColor: "#ef444480", color: counts.breached ? "#ef4444" : "var(--text-muted)" }}>
+                        <div style={{ fontSize: "1.4rem", fontWeight: "800" }}>{counts.breached}</div>
+                        <div style={{ fontSize: "0.8rem" }}>Overdue</div>
+                    </div>
+                    {counts.buckets.slice(0, 6).map(bucket => (
+                        <div key={bucket.hour} style={bucketStyle}>
+                            <div style={{ fontSize: "1.4rem", fontWeight: "800" }}>{bucket.count}</div>
+                            <div style={{ fontSize: "0.8rem", color: "var(--text-muted)" }}>
+                                Due by {new Date(bucket.due_before).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" })}
+                            </div>
+                        </div>
+                    ))}
+                    <div style={bucketStyle}>
+                        <div style={{ fontSize: "1.4rem", fontWeight: "800" }}>
+                            {counts.total - counts.breached - counts.buckets.slice(0, 6).reduce((sum, b) => sum + b.count, 0)}
+                        </div>
+                        <div style={{ fontSize: "0.8rem", color: "var(--text-muted)" }}>Later</div>
+                    </div>
+                </div>
+            )}
+
             {filteredOrders.length === 0 ? (
                 <div style={{ textAlign: "center", padding: "60px", background: "var(--bg-card)", borderRadius: "16px", border: "1px dashed var(--glass-border)" }}>
                     <FaClipboardList size={40} color="var(--text-muted)" />
@@ -161,7 +200,7 @@ export default function AdminPriorityOrders() {
             ) : (
                 <div style={{ display: "grid", gap: "20px" }}>
                     {filteredOrders.map(order => (
-                        <div key={order.id} style={cardStyle}>
+                        <div key={order.id} style={order.breached ? { ...cardStyle, border: "1px solid #ef4444" } : cardStyle}>
                             {/* Header Bar */}
                             <div style={{
                                 padding: "16px 24px",
@@ -191,6 +230,19 @@ export default function AdminPriorityOrders() {
                                         <FaBolt size={12} />
                                         {order.priority_hours ? `within ${order.priority_hours} hrs` : "PRIORITY"}
                                     </span>
+                                    <span style={{
+                                        color: order.breached ? "#ef4444" : "var(--text-muted)",
+                                        fontSize: "0.85rem",
+                                        fontWeight: order.breached ? "bold" : "normal",
+                                        display: "flex",
+                                        alignItems: "center",
+                                        gap: "6px"
+                                    }}>
+                                        <FaClock size={12} />
+                                        {order.breached
+                                            ? `Overdue by ${formatDuration(order.seconds_left)}`
+                                            : `Due in ${formatDuration(order.seconds_left)}`}
+                                    </span>
                                 </div>
 
                                 <div style={{ display: "flex", gap: "10px", alignItems: "center" }}>
@@ -242,7 +294,7 @@ export default function AdminPriorityOrders() {
                                     <div style={{ maxHeight: "100px", overflowY: "auto", paddingRight: "5px" }}>
                                         {order.items?.map((item, idx) => (
                                             <div key={idx} style={{ display: "flex", justifyContent: "space-between", marginBottom: "6px", fontSize: "0.9rem" }}>
-                                                <span>{item.qty} x {item.product?.title}</span>
+                                                <span>{item.quantity} x {item.title}</span>
                                                 <span style={{ color: "var(--text-main)" }}>₹{item.price_at_purchase}</span>
                                             </div>
                                         ))}
@@ -27,7 +27,7 @@ export default function AdminProducts() {
 
     const fetchProducts = async () => {
         try {
-            const res = await API.get("/api/products/");
+            const res = await API.get("/api/products/?expand=description,images,product_images");
             // Handle paginated response
             if (res.data.results) {
                 setProducts(res.data.results);
@@ -29,7 +29,7 @@ export default function AdminProjects() {
     const fetchProjects = async () => {
         try {
             // Fetch only innovative projects
-            const res = await API.get("/api/products/?is_innovative_project=true");
+            const res = await API.get("/api/products/?is_innovative_project=true&expand=description,images,product_images");
             if (res.data.results) {
                 setProjects(res.data.results);
             } else {
@@ -5,6 +5,7 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
+from django.db.models import Count
 from products.models import Category, Product
 
 # Allowed categories matching the user request/image
@@ -24,13 +25,12 @@ ALLOWED_NAMES = [
 ]
 
 print("--- Current Categories ---")
-for cat in Category.objects.all():
-    count = cat.products.count()
+for cat in Category.objects.annotate(product_count=Count('products')):
+    count = cat.product_count
     status = "KEEP" if cat.name in ALLOWED_NAMES else "DELETE"
     print(f"ID: {cat.id} | Name: {cat.name} | Products: {count} | Action: {status}")
 
 print("\n--- Products in Categories to be DELETED ---")
-categories_to_delete = Category.objects.exclude(name__in=ALLOWED_NAMES)
-for cat in categories_to_delete:
-    for p in cat.products.all():
-        print(f"Product: {p.title} (ID: {p.id}) in Category: {cat.name}")
+products_to_delete = Product.objects.exclude(category__name__in=ALLOWED_NAMES).select_related('category')
+for p in products_to_delete.only('id', 'title', 'category__name'):
+    print(f"Product: {p.title} (ID: {p.id}) in Category: {p.category.name}")
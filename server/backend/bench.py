@@ -0,0 +1,58 @@
+"""
+Helpers shared by the bench_* management commands.
+
+Benchmarks run against a throw-away test database created on the configured
+backend (SQLite or Postgres), so they never touch real data.
+"""
+import math
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(test_name=None):
+    """
+    Create a fresh test database for the duration of the block.
+    `test_name` forces a file-backed database (e.g. for multi-threaded runs
+    on SQLite, where the default in-memory test database is not shareable).
+    """
+    if test_name:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = test_name
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def time_calls(func, args_list):
+    """Call `func(*args)` for each entry of `args_list`; return durations in ms."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(label, samples):
+    """One-line p50/p95/p99 report of millisecond samples."""
+    return (
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50):.2f}ms "
+        f"p95={percentile(samples, 95):.2f}ms "
+        f"p99={percentile(samples, 99):.2f}ms "
+        f"max={max(samples, default=0):.2f}ms"
+    )
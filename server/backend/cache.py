@@ -0,0 +1,123 @@
+"""
+Versioned response cache for anonymous read endpoints.
+
+Every model a cached view depends on has a version counter in the cache.
+Cache keys embed the current versions, so bumping a counter (from model
+save/delete signals, or explicitly after queryset.update()) makes every
+stale entry unreachable at once; they simply age out.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+RESPONSE_TIMEOUT = 300
+VERSION_KEY = 'version:{}'
+STATS_KEYS = {'hit': 'response-cache:hits', 'miss': 'response-cache:misses'}
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def _fresh_version():
+    # Seeded from the clock so a counter lost to eviction never restarts at a
+    # value that older entries were cached under.
+    return int(time.time() * 1000)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def get_versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*models):
+    """
+    Invalidate cached responses that depend on `models`. Bumped now and
+    again on commit, so a read that raced the open transaction cannot
+    keep stale data cached under the new version.
+    """
+    keys = [_version_key(model) for model in models]
+
+    def bump():
+        for key in keys:
+            _incr(key)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def record(outcome):
+    key = STATS_KEYS[outcome]
+    if not cache.add(key, 1, timeout=None):
+        _incr(key)
+
+
+def get_stats():
+    stats = cache.get_many(STATS_KEYS.values())
+    hits = stats.get(STATS_KEYS['hit'], 0)
+    misses = stats.get(STATS_KEYS['miss'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+class CachedReadMixin:
+    """
+    Serve `list` and `retrieve` for anonymous users from the cache.
+    `cache_dependencies` lists the models whose changes invalidate them.
+    """
+    cache_dependencies = ()
+    cache_timeout = RESPONSE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request, **kwargs):
+        params = sorted(
+            (name, sorted(v for v in values if v))
+            for name, values in request.query_params.lists()
+        )
+        params = [(name, values) for name, values in params if values]
+        versions = get_versions(self.cache_dependencies or [self.get_queryset().model])
+        # Host is part of the key because responses embed absolute URLs.
+        raw = repr((request.build_absolute_uri('/'), self.basename, self.action,
+                    sorted(kwargs.items()), params, versions))
+        return f'response:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user and request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            record('hit')
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        record('miss')
+        response['X-Cache'] = 'MISS'
+        return response
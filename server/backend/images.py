@@ -0,0 +1,204 @@
+"""
+Resized JPEG/WebP derivatives of uploaded images, for `srcset`.
+
+Models opt in with `register(Model, 'image', 'variants')`: every save that
+brings a new original schedules a render after commit. Decoding and
+resizing run in a process pool, so large uploads never compete with request
+threads for CPU, driven from a background thread — the same fire-and-forget
+shape as `backend.utils.EmailThread`. The results are written next to the original
+through the field's storage and recorded as file names in the model's JSON
+`variants` field; `SrcsetField` turns them into URLs.
+
+With IMAGE_DERIVATIVES['SYNC'] (tests) the render happens inline instead;
+`backfill_image_derivatives` covers images uploaded before this existed.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models.functions import Now
+from django.db.models.signals import post_save
+from rest_framework import serializers
+
+from backend.cache import bump_version
+
+DEFAULTS = {
+    'WIDTHS': [320, 640, 1024],
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'SYNC': False,
+}
+SAVE_OPTIONS = {
+    'jpeg': {'format': 'JPEG', 'optimize': True, 'progressive': True},
+    'webp': {'format': 'WEBP', 'method': 4},
+}
+
+_executor = None
+REGISTERED = []
+_executor_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'IMAGE_DERIVATIVES', {})}
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=get_config()['WORKERS'])
+        return _executor
+
+
+def render_variants(data, widths, formats, quality):
+    """
+    Resize image bytes to every width (never upscaling) in every format.
+    Returns (source size, [(width, height, format, bytes)]). Runs in the
+    worker processes, so it only touches Pillow.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    source_size = image.size
+    targets = sorted({min(width, image.width) for width in widths})
+
+    rendered = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for fmt in formats:
+            frame = resized
+            if fmt == 'jpeg' and frame.mode != 'RGB':
+                frame = frame.convert('RGB')
+            elif fmt == 'webp' and frame.mode not in ('RGB', 'RGBA'):
+                frame = frame.convert('RGBA' if 'A' in frame.getbands() else 'RGB')
+            buffer = io.BytesIO()
+            frame.save(buffer, quality=quality, **SAVE_OPTIONS[fmt])
+            rendered.append((width, height, fmt, buffer.getvalue()))
+    return source_size, rendered
+
+
+def derivative_name(name, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f'derivatives/{root}_w{width}.{"jpg" if fmt == "jpeg" else fmt}'
+
+
+def needs_derivatives(instance, field_name, variants_field):
+    name = getattr(instance, field_name).name
+    return bool(name) and (getattr(instance, variants_field) or {}).get('source') != name
+
+
+def read_original(instance, field_name):
+    file = getattr(instance, field_name)
+    with file.storage.open(file.name, 'rb') as handle:
+        return handle.read()
+
+
+def store_variants(instance, field_name, variants_field, result):
+    """Save rendered files and record them on the row (if its image is unchanged)."""
+    file = getattr(instance, field_name)
+    (source_width, source_height), rendered = result
+    variants = []
+    for width, height, fmt, content in rendered:
+        name = file.storage.save(derivative_name(file.name, width, fmt), ContentFile(content))
+        variants.append({'width': width, 'height': height, 'format': fmt, 'name': name})
+
+    record = {'source': file.name, 'width': source_width, 'height': source_height, 'variants': variants}
+    model = type(instance)
+    updates = {variants_field: record}
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        updates['updated_at'] = Now()
+    # A plain update keeps post_save (and this pipeline) out of the loop.
+    model._default_manager.filter(pk=instance.pk, **{field_name: file.name}).update(**updates)
+    setattr(instance, variants_field, record)
+    bump_version(model)
+    return record
+
+
+def generate_derivatives(instance, field_name='image', variants_field='variants', executor=None):
+    """Render and store the derivatives of one instance; returns the record."""
+    config = get_config()
+    args = (read_original(instance, field_name), config['WIDTHS'], config['FORMATS'], config['QUALITY'])
+    result = executor.submit(render_variants, *args).result() if executor else render_variants(*args)
+    return store_variants(instance, field_name, variants_field, result)
+
+
+class DerivativeThread(threading.Thread):
+    def __init__(self, model, pk, field_name, variants_field):
+        self.model = model
+        self.pk = pk
+        self.field_name = field_name
+        self.variants_field = variants_field
+        threading.Thread.__init__(self, daemon=True)
+
+    def run(self):
+        try:
+            instance = self.model._default_manager.filter(pk=self.pk).first()
+            if instance and needs_derivatives(instance, self.field_name, self.variants_field):
+                generate_derivatives(instance, self.field_name, self.variants_field, executor=get_executor())
+        except Exception as e:
+            print(f"Image derivatives failed for {self.model._meta.label} {self.pk}: {e}")
+        finally:
+            connection.close()
+
+
+def schedule_derivatives(instance, field_name='image', variants_field='variants'):
+    if not needs_derivatives(instance, field_name, variants_field):
+        return
+    model, pk = type(instance), instance.pk
+
+    def start():
+        if get_config()['SYNC']:
+            generate_derivatives(model._default_manager.get(pk=pk), field_name, variants_field)
+        else:
+            DerivativeThread(model, pk, field_name, variants_field).start()
+
+    transaction.on_commit(start)
+
+
+def register(model, field_name='image', variants_field='variants'):
+    """Render derivatives whenever `model` is saved with a new image."""
+    def handler(sender, instance, raw=False, **kwargs):
+        if not raw:
+            schedule_derivatives(instance, field_name, variants_field)
+
+    REGISTERED.append((model, field_name, variants_field))
+    post_save.connect(handler, sender=model, weak=False,
+                      dispatch_uid=f'image-derivatives:{model._meta.label_lower}.{field_name}')
+
+
+def srcset(record, request=None):
+    """
+    URLs of a `variants` record, ready for <img srcset>:
+    {'width', 'height', 'webp': 'url 320w, url 640w', 'jpeg': '...'},
+    or None until the derivatives exist.
+    """
+    if not record or not record.get('variants'):
+        return None
+    from django.core.files.storage import default_storage
+
+    data = {'width': record['width'], 'height': record['height']}
+    for variant in sorted(record['variants'], key=lambda v: v['width']):
+        url = default_storage.url(variant['name'])
+        if request:
+            url = request.build_absolute_uri(url)
+        entry = f"{url} {variant['width']}w"
+        data[variant['format']] = f"{data[variant['format']]}, {entry}" if variant['format'] in data else entry
+    return data
+
+
+class SrcsetField(serializers.Field):
+    """Read-only `srcset()` of a model's variants field."""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return srcset(value, self.context.get('request'))
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor ("keyset") pagination on one ordering field plus a primary key
+    tiebreaker. The cursor holds the last row's (value, pk), and the next
+    page is fetched with `WHERE (field, pk) > (value, pk) LIMIT n`, so page
+    5,000 costs the same as page 1: no COUNT(*) and no OFFSET.
+
+    Ordering comes from `?ordering=` when it names one of `ordering_fields`
+    (falling back to the view's `ordering_fields`), else `default_ordering`.
+    """
+    page_size = 18
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    ordering_fields = None
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view=None):
+        allowed = self.ordering_fields or getattr(view, 'ordering_fields', None) or ()
+        requested = request.query_params.get(self.ordering_param, '').split(',')[0].strip()
+        if requested.lstrip('-') in allowed:
+            return requested
+        return self.default_ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, queryset, view)
+        self.field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        prefix = '-' if descending else ''
+
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            value, pk = self.decode_cursor(encoded, queryset)
+            lookup = 'lt' if descending else 'gt'
+            try:
+                # The redundant lte/gte bound lets the planner start an index range scan.
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}e': value}),
+                    Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk}),
+                )
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def decode_cursor(self, encoded, queryset):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if value is None:
+                raise ValueError('The ordering field is never NULL on a page.')
+            try:
+                field = queryset.model._meta.get_field(self.field)
+            except FieldDoesNotExist:
+                # An annotation, such as search_rank: coerce through its output field.
+                field = queryset.query.annotations[self.field].output_field
+            return field.to_python(value), int(pk)
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        raw = json.dumps([value, obj.pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -11,6 +11,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import dj_database_url
 import os
+import sys
+import tempfile
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 from pathlib import Path
@@ -46,6 +49,8 @@ CSRF_TRUSTED_ORIGINS = [
 # --- RESEND EMAIL API ---
 RESEND_API_KEY = os.getenv('RESEND_API_KEY')
 DEFAULT_FROM_EMAIL = 'Mekaro Store <noreply@mekaro.in>'
+# Who gets the low-stock digest (comma separated); defaults to staff users.
+LOW_STOCK_ALERT_EMAILS = [email.strip() for email in os.getenv('LOW_STOCK_ALERT_EMAILS', '').split(',') if email.strip()]
 
 # Application definition
 
@@ -85,6 +90,7 @@ MIDDLEWARE = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Cloudinary Storage
 CLOUDINARY_STORAGE = {
@@ -94,6 +100,13 @@ CLOUDINARY_STORAGE = {
 }
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Resized JPEG/WebP copies of uploaded images (backend/images.py).
+IMAGE_DERIVATIVES = {
+    'WIDTHS': [320, 640, 1024],
+    'WORKERS': int(os.getenv('IMAGE_WORKERS', '2')),
+    'SYNC': sys.argv[1:2] == ['test'],
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -123,6 +136,29 @@ DATABASES = {
         conn_max_age=600
     )
 }
+# A transaction-mode pooler (Supabase on port 6543, PgBouncer) may hand each
+# statement to a different server connection, so a server-side cursor opened
+# by QuerySet.iterator() can vanish mid-fetch. Long walks page by keyset
+# instead (orders.listing, products.bulk).
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# How checkouts take stock: 'locking' (SELECT ... FOR UPDATE) or 'optimistic'
+# (one guarded UPDATE, no read lock); see orders.services and bench_hot_sku.
+CHECKOUT_STOCK_STRATEGY = os.getenv('CHECKOUT_STOCK_STRATEGY', 'locking')
+
+# Cache
+# File-based by default so every worker on the host shares the response
+# cache and its version counters without an external service.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'mekaro-cache')),
+    }
+}
+
+if sys.argv[1:2] == ['test']:
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -165,6 +201,15 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Tests keep uploads and their derivatives on local disk, in a throwaway
+# directory rather than the tracked media/ tree.
+if sys.argv[1:2] == ['test']:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+    MEDIA_ROOT = tempfile.mkdtemp(prefix='mekaro-media-')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from products.views import ProductViewSet, CategoryViewSet, ReviewViewSet, YouTubeVideoViewSet
-from orders.views import create_order, get_order, get_my_orders, admin_dashboard_stats, admin_all_orders, admin_update_order_status, calculate_distance, initiate_payment, verify_payment, track_order
+from products.views import ProductViewSet, CategoryViewSet, ReviewViewSet, YouTubeVideoViewSet, cache_stats
+from orders.views import cart_quote, create_order, get_order, get_my_orders, admin_dashboard_stats, admin_sales_analytics, admin_all_orders, admin_update_order_status, admin_bulk_order_status, admin_order_sla, admin_priority_queue, calculate_distance, initiate_payment, verify_payment, track_order
 from users.views import register_user, get_current_user, update_profile, change_password, subscribe_newsletter, google_login, get_all_users, update_user_admin_status, complete_google_signup, verify_email_otp, resend_email_otp, edit_unverified_email, request_password_reset, verify_reset_otp, reset_forgotten_password, StaffMemberViewSet
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -47,8 +47,13 @@ urlpatterns = [
     # Admin Dashboard
     path("api/admin/dashboard/", admin_dashboard_stats),
     path("api/admin/stats/", admin_dashboard_stats),
+    path("api/admin/analytics/", admin_sales_analytics),
     path("api/admin/orders/", admin_all_orders),
     path("api/admin/orders/<int:pk>/status/", admin_update_order_status),
+    path("api/admin/orders/status/", admin_bulk_order_status),
+    path("api/admin/orders/sla/", admin_order_sla),
+    path("api/admin/orders/priority/", admin_priority_queue),
+    path("api/admin/cache-stats/", cache_stats),
 
     # Admin Users
     path("api/admin/users/", get_all_users),
@@ -58,6 +63,7 @@ urlpatterns = [
     # Orders
     path('api/orders/pay/initiate/', initiate_payment),
     path('api/orders/pay/verify/', verify_payment),
+    path('api/orders/quote/', cart_quote),
     path('api/orders/create/', create_order),
     path('api/orders/<int:pk>/', get_order),
     path('api/orders/my-orders/', get_my_orders),
@@ -3,6 +3,34 @@ import resend
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 
+BATCH_LIMIT = 100  # emails per Resend batch request
+
+
+def resend_params(email_message):
+    html_content = ""
+    if isinstance(email_message, EmailMultiAlternatives):
+        for alt_content, mimetype in getattr(email_message, 'alternatives', []):
+            if mimetype == "text/html":
+                html_content = alt_content
+                break
+
+    # Resend strict requirement: Sender domain MUST be the verified domain
+    from_email = email_message.from_email
+    if "gmail.com" in from_email:
+        from_email = "Mekaro Store <noreply@mekaro.in>"
+
+    params = {
+        "from": from_email,
+        "to": email_message.to,
+        "subject": email_message.subject,
+    }
+    if html_content:
+        params["html"] = html_content
+    else:
+        params["text"] = email_message.body
+    return params
+
+
 class EmailThread(threading.Thread):
     def __init__(self, email_message):
         self.email_message = email_message
@@ -11,38 +39,47 @@ class EmailThread(threading.Thread):
     def run(self):
         try:
             resend.api_key = getattr(settings, "RESEND_API_KEY", "")
-            
-            html_content = ""
-            if isinstance(self.email_message, EmailMultiAlternatives):
-                for alt_content, mimetype in getattr(self.email_message, 'alternatives', []):
-                    if mimetype == "text/html":
-                        html_content = alt_content
-                        break
-
-            # Resend strict requirement: Sender domain MUST be the verified domain
-            from_email = self.email_message.from_email
-            if "gmail.com" in from_email:
-                from_email = "Mekaro Store <noreply@mekaro.in>"
-
-            params = {
-                "from": from_email,
-                "to": self.email_message.to,
-                "subject": self.email_message.subject,
-            }
-            if html_content:
-                params["html"] = html_content
-            else:
-                params["text"] = self.email_message.body
-            
-            response = resend.Emails.send(params)
+            response = resend.Emails.send(resend_params(self.email_message))
             print(f"Resend email dispatched. ID: {response.get('id') if isinstance(response, dict) else response}")
 
         except Exception as e:
             # unique error logging if needed
             print(f"Error sending email in background via Resend API: {e}")
 
+
+class BatchEmailThread(threading.Thread):
+    def __init__(self, email_messages):
+        self.email_messages = email_messages
+        threading.Thread.__init__(self)
+
+    def run(self):
+        resend.api_key = getattr(settings, "RESEND_API_KEY", "")
+        try:
+            # Built here, so rendering many messages never holds up the caller.
+            messages = list(self.email_messages)
+        except Exception as e:
+            print(f"Error rendering email batch: {e}")
+            return
+        for start in range(0, len(messages), BATCH_LIMIT):
+            chunk = messages[start:start + BATCH_LIMIT]
+            try:
+                resend.Batch.send([resend_params(message) for message in chunk])
+                print(f"Resend batch dispatched: {len(chunk)} emails")
+            except Exception as e:
+                print(f"Error sending email batch via Resend API: {e}")
+
+
 def send_email_async(email_message):
     """
     Sends an email message via the Resend API in a separate thread.
     """
     EmailThread(email_message).start()
+
+
+def send_emails_async(email_messages):
+    """
+    Sends many email messages from one background thread, in Resend batch
+    requests of up to BATCH_LIMIT each. `email_messages` may be a lazy
+    iterable; it is consumed in the thread.
+    """
+    BatchEmailThread(email_messages).start()
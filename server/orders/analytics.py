@@ -0,0 +1,155 @@
+"""
+Sales analytics for merchandising: revenue and units per day/week/month,
+per category and per product, top sellers and average order value.
+
+Everything is a grouped aggregate over the daily rollups (orders.rollups),
+whose product revenue is the sum of OrderItem.price_at_purchase * quantity,
+so a request never reads order items. Per-period figures come from
+DailySales (one row per day) on the same item basis (item_revenue), so
+they reconcile with the breakdowns; the fees and delivery charged on top
+are reported apart as `fees`. The product and category breakdowns come
+from DailyProductSales, one row per product sold per day, which is still
+large for long ranges. So a requested range is split into calendar months:
+each closed month's breakdown is computed once and cached under the
+DailySales version, which is bumped wherever closed days' product rows
+change: by rebuild_rollups, and when deleting a product or category sets
+their rows' reference NULL (orders.signals). Only the open days at either
+end are aggregated per request, through an index covering every column
+the scan needs. Names are looked up after the cache, so a renamed product
+or category shows up at once.
+"""
+import heapq
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from backend.cache import get_versions
+from products.models import Category, Product
+from .models import DailyProductSales, DailySales
+from .rollups import parse_day
+
+PERIODS = {'day': lambda field: F(field), 'week': TruncWeek, 'month': TruncMonth}
+DEFAULT_DAYS = 30
+DEFAULT_TOP = 10
+MAX_TOP = 100
+MONTH_KEY = 'sales-analytics:month:{}:{}'
+MONTH_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def average(revenue, orders):
+    return (revenue / orders).quantize(Decimal('0.01')) if orders else Decimal('0.00')
+
+
+def month_spans(start, end):
+    """Split days start..end by calendar month: [(first, last, whole_month)]."""
+    spans = []
+    first = start
+    while first <= end:
+        next_month = (first.replace(day=1) + timedelta(days=32)).replace(day=1)
+        last = min(end, next_month - timedelta(days=1))
+        spans.append((first, last, first.day == 1 and last == next_month - timedelta(days=1)))
+        first = next_month
+    return spans
+
+
+def breakdown(product_days):
+    """({product_id: (units, revenue)}, {category_id: (units, revenue)}); two grouped queries."""
+    def grouped(field):
+        return {
+            row[field]: (row['units'], row['revenue'])
+            for row in product_days.values(field).annotate(units=Sum('units'), revenue=Sum('revenue')).order_by()
+        }
+    return grouped('product_id'), grouped('category_id')
+
+
+def sales_breakdown(start, end):
+    """Merged product and category totals for start..end, closed months from cache."""
+    today = timezone.localdate()
+    version = get_versions([DailySales])[0]
+    closed, open_days = {}, Q()
+    for first, last, whole in month_spans(start, end):
+        if whole and last < today:
+            closed[MONTH_KEY.format(first.strftime('%Y-%m'), version)] = (first, last)
+        else:
+            open_days |= Q(date__range=(first, last))
+
+    parts = cache.get_many(closed)
+    missing = {key: breakdown(DailyProductSales.objects.filter(date__range=span))
+               for key, span in closed.items() if key not in parts}
+    if missing:
+        cache.set_many(missing, MONTH_TIMEOUT)
+    parts = [*parts.values(), *missing.values()]
+    if open_days:
+        parts.append(breakdown(DailyProductSales.objects.filter(open_days)))
+
+    products, categories = {}, {}
+    for part_products, part_categories in parts:
+        for totals, part in ((products, part_products), (categories, part_categories)):
+            for key, (units, revenue) in part.items():
+                known = totals.get(key, (0, Decimal(0)))
+                totals[key] = (known[0] + units, known[1] + revenue)
+    return products, categories
+
+
+def get_analytics(start, end, period='day', top=DEFAULT_TOP):
+    series = [
+        {
+            'period': row['bucket'], 'orders': row['n'], 'revenue': row['items'],
+            'fees': row['charged'] - row['items'], 'units': row['sold'],
+            'average_order_value': average(row['items'], row['n']),
+        }
+        for row in DailySales.objects.filter(date__range=(start, end))
+        .annotate(bucket=PERIODS[period]('date')).values('bucket')
+        .annotate(n=Sum('orders'), items=Sum('item_revenue'), charged=Sum('revenue'), sold=Sum('units'))
+        .order_by('bucket')
+    ]
+    orders = sum(row['orders'] for row in series)
+    revenue = sum((row['revenue'] for row in series), Decimal(0))
+
+    products, categories = sales_breakdown(start, end)
+    # Sales of deleted products count in the totals but have no product to rank.
+    sold = ((pk, totals) for pk, totals in products.items() if pk is not None)
+    best = heapq.nsmallest(top, sold, key=lambda item: (-item[1][0], -item[1][1], item[0]))
+    category_rows = sorted(categories.items(), key=lambda item: (-item[1][1], item[0] or 0))
+    titles = dict(Product.objects.filter(pk__in=[pk for pk, _ in best]).values_list('id', 'title'))
+    names = dict(Category.objects.filter(pk__in=list(categories)).values_list('id', 'name'))
+
+    return {
+        'start': start,
+        'end': end,
+        'period': period,
+        'totals': {
+            'orders': orders, 'revenue': revenue, 'fees': sum((row['fees'] for row in series), Decimal(0)),
+            'units': sum(row['units'] for row in series), 'average_order_value': average(revenue, orders),
+        },
+        'series': series,
+        'categories': [
+            {'category_id': pk, 'name': names.get(pk, ''), 'units': units, 'revenue': revenue}
+            for pk, (units, revenue) in category_rows
+        ],
+        'top_products': [
+            {'product_id': pk, 'title': titles.get(pk, ''), 'units': units, 'revenue': revenue}
+            for pk, (units, revenue) in best
+        ],
+    }
+
+
+def analytics_params(params):
+    """(start, end, period, top) from ?start=&end=&period=&top=, defaulting to the last 30 days."""
+    end = parse_day(params, 'end') or timezone.localdate()
+    start = parse_day(params, 'start') or end - timedelta(days=DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValidationError({'start': 'Must not be after end.'})
+    period = params.get('period', 'day')
+    if period not in PERIODS:
+        raise ValidationError({'period': f"Choose one of: {', '.join(PERIODS)}."})
+    try:
+        top = min(max(int(params.get('top', DEFAULT_TOP)), 1), MAX_TOP)
+    except ValueError:
+        raise ValidationError({'top': 'Enter a number.'})
+    return start, end, period, top
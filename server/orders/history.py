@@ -0,0 +1,51 @@
+"""
+Order history snapshots and pagination.
+
+Every OrderItem keeps the product's title and a thumbnail URL as they were
+at checkout (next to price_at_purchase), so order history renders from the
+orders tables alone: two queries per page however long the history, and
+unaffected by later product edits or deletions.
+"""
+from django.core.files.storage import default_storage
+from django.db.models import JSONField, OuterRef, Prefetch, Subquery
+
+from backend.pagination import KeysetPagination
+from products.models import ProductImage
+from .models import OrderItem
+
+HISTORY_ITEM_FIELDS = (
+    'id', 'order_id', 'product_id', 'product_title', 'product_thumbnail', 'quantity', 'price_at_purchase',
+)
+
+
+class OrderHistoryPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    ordering_fields = ()
+    default_ordering = '-created_at'
+
+
+def with_history_items(queryset):
+    """Prefetch just the snapshot columns of each order's items."""
+    return queryset.prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.only(*HISTORY_ITEM_FIELDS).order_by('id'))
+    )
+
+
+def thumbnail_url(image_name, variants, legacy_images):
+    """The smallest JPEG derivative of the first image, its original, or a legacy URL."""
+    jpegs = [v for v in (variants or {}).get('variants', []) if v['format'] == 'jpeg']
+    if jpegs:
+        return default_storage.url(min(jpegs, key=lambda v: v['width'])['name'])
+    if image_name:
+        return default_storage.url(image_name)
+    return legacy_images[0] if legacy_images else ''
+
+
+def with_thumbnail(queryset):
+    """Annotate products with their first image's name and variants."""
+    first_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('id')
+    return queryset.annotate(
+        thumbnail_name=Subquery(first_image.values('image')[:1]),
+        thumbnail_variants=Subquery(first_image.values('variants')[:1], output_field=JSONField()),
+    )
@@ -0,0 +1,107 @@
+"""
+Idempotency-Key support for order-creating endpoints.
+
+The first request with a given key claims a row (keyed by a hash of user,
+path and key) before the view runs; a successful response is stored on it.
+A retry with the same key and body gets the stored response back without
+running the view, a retry while the first is still running gets 409, and
+reusing a key for a different body gets 422.
+
+The view runs in one transaction with its claim row locked, and a
+successful response is stored in that same transaction, so the response is
+committed exactly when the view's writes are. Any other outcome (an error
+response or an exception) rolls the view's writes back, so releasing the
+key then is safe and the client may try again. A claim that is still
+without a response after IDEMPOTENCY_LEASE may be taken over by a retry of
+the same request; the takeover waits on the row lock, so it only happens
+once the first attempt has ended without storing a response. Rows expire
+after IDEMPOTENCY_KEY_TTL.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL = timedelta(hours=24)
+DEFAULT_LEASE = timedelta(minutes=2)
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def claim(key_hash, request_hash, now):
+    """Claim a key at `now`; returns None when claimed, else the existing live record."""
+    expires_at = now + getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key_hash=key_hash, request_hash=request_hash, claimed_at=now,
+                                          expires_at=expires_at)
+        return None
+    except IntegrityError:
+        pass
+    # An expired row is taken over as if it were new, and so is an abandoned
+    # claim by a retry of the same request. On a claim still in flight the
+    # UPDATE waits for its row lock and then finds the response stored.
+    lease = getattr(settings, 'IDEMPOTENCY_LEASE', DEFAULT_LEASE)
+    abandoned = Q(status_code=None, request_hash=request_hash, claimed_at__lte=now - lease)
+    if IdempotencyKey.objects.filter(Q(expires_at__lte=now) | abandoned, key_hash=key_hash).update(
+        request_hash=request_hash, status_code=None, response=None, claimed_at=now, expires_at=expires_at,
+    ):
+        return None
+    return IdempotencyKey.objects.filter(key_hash=key_hash).first()
+
+
+def idempotent(view):
+    """Honour an Idempotency-Key header on a function-based api_view."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{HEADER} is too long.'}, status=400)
+
+        key_hash = _digest(f'{request.user.pk}:{request.path}:{key}')
+        request_hash = _digest(json.dumps(request.data, sort_keys=True, default=str))
+        claimed_at = timezone.now()
+        record = claim(key_hash, request_hash, claimed_at)
+        if record is not None:
+            if record.request_hash != request_hash:
+                return Response({'error': f'{HEADER} was already used for a different request.'}, status=422)
+            if record.status_code is None:
+                return Response({'error': 'This request is still being processed.'}, status=409)
+            return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+        ours = IdempotencyKey.objects.filter(key_hash=key_hash, claimed_at=claimed_at, status_code=None)
+        try:
+            with transaction.atomic():
+                if not ours.select_for_update().exists():
+                    return Response({'error': 'This request is still being processed.'}, status=409)
+                response = view(request, *args, **kwargs)
+                if 200 <= response.status_code < 300:
+                    ours.update(status_code=response.status_code, response=response.data)
+                else:
+                    transaction.set_rollback(True)
+        finally:
+            # Only a claim left without a committed response: the view's
+            # writes were rolled back with it.
+            ours.delete()
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,119 @@
+"""
+Admin order list: filters, keyset pages and an NDJSON export.
+
+Every filter maps onto an index on Order (see Order.Meta.indexes): status,
+payment method and the priority flag each lead a (..., created_at, id)
+index that also serves the newest-first keyset order, date ranges use
+(created_at, id) and an order_id prefix (a LIKE 'X%') uses the
+varchar_pattern_ops index PostgreSQL keeps beside the unique order_id one.
+Pages cost two queries (orders with their users, then snapshot items);
+the export walks the same queryset in keyset chunks (one short query each,
+no server-side cursor, so it runs behind a transaction-mode pooler), and
+memory stays flat however many orders match.
+"""
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from backend.pagination import KeysetPagination
+from .history import with_history_items
+from .models import Order
+
+ORDER_FIELDS = (
+    'id', 'order_id', 'status', 'total_amount', 'payment_method', 'shipping_address', 'is_priority',
+    'priority_hours', 'razorpay_order_id', 'razorpay_payment_id', 'created_at',
+    'user__id', 'user__username', 'user__email',
+)
+TRUE_VALUES = {'1', 'true', 'yes'}
+FALSE_VALUES = {'0', 'false', 'no'}
+EXPORT_CHUNK_SIZE = 1000
+
+
+class AdminOrderPagination(KeysetPagination):
+    page_size = 25
+    max_page_size = 100
+    ordering_fields = ()
+    default_ordering = '-created_at'
+
+
+def parse_bound(params, name, end_of_day=False):
+    """A date or datetime query parameter; a bare date covers the whole day."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            moment = datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:
+        raise ValidationError({name: 'Enter a date (YYYY-MM-DD) or an ISO datetime.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_orders(queryset, params):
+    """
+    Apply ?status= (comma separated), ?payment_method=, ?is_priority=,
+    ?created_after= / ?created_before= and ?order_id= (prefix).
+    """
+    statuses = [v for raw in params.getlist('status') for v in raw.split(',') if v]
+    if statuses:
+        valid = {choice for choice, _ in Order._meta.get_field('status').choices}
+        unknown = set(statuses) - valid
+        if unknown:
+            raise ValidationError({'status': f"Unknown status: {', '.join(sorted(unknown))}."})
+        queryset = queryset.filter(status__in=statuses)
+
+    payment_method = params.get('payment_method')
+    if payment_method:
+        if payment_method not in dict(Order.PAYMENT_METHOD_CHOICES):
+            raise ValidationError({'payment_method': f"Choose one of: {', '.join(dict(Order.PAYMENT_METHOD_CHOICES))}."})
+        queryset = queryset.filter(payment_method=payment_method)
+
+    priority = params.get('is_priority', '').lower()
+    if priority in TRUE_VALUES:
+        queryset = queryset.filter(is_priority=True)
+    elif priority in FALSE_VALUES:
+        queryset = queryset.filter(is_priority=False)
+    elif priority:
+        raise ValidationError({'is_priority': 'Use true or false.'})
+
+    created_after = parse_bound(params, 'created_after')
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    created_before = parse_bound(params, 'created_before', end_of_day=True)
+    if created_before:
+        queryset = queryset.filter(created_at__lte=created_before)
+
+    prefix = params.get('order_id', '').strip()
+    if prefix:
+        queryset = queryset.filter(order_id__startswith=prefix.upper())
+    return queryset
+
+
+def admin_orders(params):
+    """Filtered orders with their user and snapshot items, newest first."""
+    queryset = Order.objects.select_related('user').only(*ORDER_FIELDS)
+    return with_history_items(filter_orders(queryset, params)).order_by('-created_at', '-pk')
+
+
+def export_lines(queryset, serializer_class):
+    """Yield one JSON document per order, newest first."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    queryset = queryset.order_by('-created_at', '-pk')
+    chunk = list(queryset[:EXPORT_CHUNK_SIZE])
+    while chunk:
+        for order in chunk:
+            yield encoder.encode(serializer_class(order).data) + '\n'
+        last = chunk[-1]
+        chunk = list(queryset.filter(
+            Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, pk__lt=last.pk),
+        )[:EXPORT_CHUNK_SIZE])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from orders.order_ids import backfill_order_ids
+
+
+class Command(BaseCommand):
+    help = 'Assigns an order reference to every order that lacks one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = backfill_order_ids(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled {total} orders.'))
@@ -0,0 +1,95 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+from backend.bench import benchmark_database, summary, time_calls
+from backend.cache import bump_version
+from orders.analytics import get_analytics
+from orders.models import DailySales, Order, OrderItem
+from orders.rollups import day_bounds, rebuild_rollups
+from products.models import Category, Product
+
+
+def from_order_items(start, end, top):
+    # The same breakdowns straight off OrderItem, for comparison.
+    lower, upper = day_bounds(start, end)
+    items = OrderItem.objects.filter(order__created_at__gte=lower, order__created_at__lt=upper)
+    revenue = ExpressionWrapper(F('quantity') * F('price_at_purchase'), output_field=DecimalField())
+    list(items.values('product__category_id').annotate(revenue=Sum(revenue)).order_by('-revenue'))
+    list(items.values('product_id').annotate(units=Sum('quantity')).order_by('-units')[:top])
+
+
+def cold(func):
+    # A new rollup version makes every cached month a miss.
+    def call(*args):
+        bump_version(DailySales)
+        return func(*args)
+    return call
+
+
+def generate_history(item_count, days, product_count, lines_per_order=4):
+    """About `item_count` order items spread evenly over the last `days` days."""
+    rng = random.Random(7)
+    user = User.objects.create_user('bench', password='bench')
+    categories = Category.objects.bulk_create([
+        Category(name=f'Category {i}', slug=f'category-{i}') for i in range(20)
+    ])
+    products = Product.objects.bulk_create([
+        Product(title=f'Part {i}', price=10 + i % 500, stock=0, category=categories[i % 20])
+        for i in range(product_count)
+    ])
+    today = timezone.localdate()
+    orders_per_day = max(1, item_count // lines_per_order // days)
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        placed = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        orders = Order.objects.bulk_create([
+            Order(user=user, total_amount=0, shipping_address={}, created_at=placed) for _ in range(orders_per_day)
+        ])
+        items = []
+        for order in orders:
+            for product in rng.sample(products, lines_per_order):
+                items.append(OrderItem(order=order, product=product, quantity=rng.randint(1, 3),
+                                       price_at_purchase=product.price))
+        OrderItem.objects.bulk_create(items, batch_size=2000)
+
+
+class Command(BaseCommand):
+    help = 'Times the sales analytics over a generated order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            started = time.perf_counter()
+            generate_history(options['items'], options['days'], options['products'])
+            self.stdout.write(f'Generated {OrderItem.objects.count()} order items '
+                              f'in {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            rebuild_rollups()
+            self.stdout.write(f'Rebuilt rollups in {time.perf_counter() - started:.1f}s')
+
+            today = timezone.localdate()
+            runs = options['runs']
+            month = (today - timedelta(days=29), today)
+            year = (today - timedelta(days=options['days'] - 1), today)
+            cases = [
+                ('order items, 30 days', from_order_items, (*month, 10)),
+                ('order items, full range', from_order_items, (*year, 10)),
+                ('analytics cold, 30 days', cold(get_analytics), (*month, 'day', 10)),
+                ('analytics warm, 30 days', get_analytics, (*month, 'day', 10)),
+                ('analytics cold, full range', cold(get_analytics), (*year, 'month', 10)),
+                ('analytics warm, full range', get_analytics, (*year, 'month', 10)),
+            ]
+            for label, func, args in cases:
+                func(*args)  # warm up (and fill the month cache)
+                self.stdout.write(summary(f'{label:<28}', time_calls(func, [args] * runs)))
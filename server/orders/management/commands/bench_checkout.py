@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from backend.bench import benchmark_database, summary, time_calls
+from orders.models import Order, OrderItem
+from orders.services import build_order_confirmation, place_order, save_shipping_address
+from products.models import Category, Product
+
+
+def legacy_checkout(user, items):
+    # The per-line checkout that create_order/verify_payment used to run.
+    for item in items:
+        if not Product.objects.filter(id=item['product_id']).exists():
+            raise ValueError(item['product_id'])
+    with transaction.atomic():
+        order = Order.objects.create(user=user, total_amount=0, shipping_address={})
+        for item in items:
+            product = Product.objects.select_for_update().get(id=item['product_id'])
+            if product.stock < item['qty']:
+                raise ValueError(product.title)
+            product.stock -= item['qty']
+            product.save()
+            OrderItem.objects.create(order=order, product=product, quantity=item['qty'],
+                                     price_at_purchase=product.price)
+    return order
+
+
+def set_based_checkout(user, items):
+    return place_order(user, items, total_amount=0, shipping_address={})
+
+
+SHIPPING = {'address_line1': '12 Main Road', 'city': 'Chennai', 'state': 'TN', 'pincode': '600077'}
+
+
+def side_effects_inline(user, items):
+    # Profile save and email rendering inside the locked transaction.
+    with transaction.atomic():
+        order, lines = place_order(user, items, total_amount=0, shipping_address=SHIPPING)
+        save_shipping_address(user, SHIPPING)
+        build_order_confirmation(order, lines, 'Order Confirmation')
+    return order
+
+
+def side_effects_on_commit(user, items):
+    def after_commit(order, lines):
+        save_shipping_address(user, SHIPPING)
+        build_order_confirmation(order, lines, 'Order Confirmation')
+    order, _ = place_order(user, items, on_commit=after_commit, total_amount=0, shipping_address=SHIPPING)
+    return order
+
+
+class Command(BaseCommand):
+    help = 'Compares per-line and set-based checkout for one large cart'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=50)
+        parser.add_argument('--runs', type=int, default=100)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user('bench', password='bench')
+            category = Category.objects.create(name='Bench', slug='bench')
+            products = Product.objects.bulk_create([
+                Product(title=f'Part {i}', price=10 + i, stock=10 ** 6, category=category)
+                for i in range(options['lines'])
+            ])
+            cart = [{'product_id': product.pk, 'qty': 1} for product in products]
+
+            for label, checkout in [('per-line', legacy_checkout), ('set-based', set_based_checkout)]:
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    checkout(user, cart)
+                samples = time_calls(checkout, [(user, cart)] * options['runs'])
+                self.stdout.write(f"{summary(f'{label:<10}', samples)} queries/checkout={len(queries)}")
+
+            self.stdout.write('Stock lock hold time per checkout:')
+            for label, checkout in [('inline', side_effects_inline), ('on_commit', side_effects_on_commit)]:
+                held = [checkout(user, cart).lock_held_ms for _ in range(options['runs'])]
+                self.stdout.write(summary(f'{label:<10}', held))
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.test.utils import override_settings
+from backend.bench import benchmark_database, summary
+from orders.models import OrderItem
+from orders.services import STOCK_STRATEGIES, CheckoutError, place_order
+from products.inventory import set_stock
+from products.models import Category, Product
+
+
+def run_checkouts(user, product, workers, checkouts):
+    """
+    `checkouts` one-unit orders of `product` from `workers` threads started
+    together. Returns (elapsed seconds, latencies of placed orders in ms,
+    rejected count, error count).
+    """
+    start = threading.Barrier(workers)
+    lock = threading.Lock()
+    latencies, outcomes = [], {'rejected': 0, 'errors': 0}
+    cart = [{'product_id': product.pk, 'qty': 1}]
+
+    def worker(count):
+        start.wait()
+        try:
+            for _ in range(count):
+                began = time.perf_counter()
+                try:
+                    place_order(user, cart, total_amount=product.price, shipping_address={})
+                except CheckoutError:
+                    outcome = 'rejected'
+                except DatabaseError:
+                    outcome = 'errors'  # e.g. SQLite's "database is locked"
+                else:
+                    outcome = None
+                with lock:
+                    if outcome:
+                        outcomes[outcome] += 1
+                    else:
+                        latencies.append((time.perf_counter() - began) * 1000)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(checkouts // workers + (i < checkouts % workers),))
+        for i in range(workers)
+    ]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began, latencies, outcomes['rejected'], outcomes['errors']
+
+
+class Command(BaseCommand):
+    help = 'Drives concurrent checkouts at one product under each stock strategy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=32)
+        parser.add_argument('--checkouts', type=int, default=1000)
+        parser.add_argument('--stock', type=int, default=None,
+                            help='Units on hand (default: half the checkouts, so the product sells out)')
+        parser.add_argument('--strategy', choices=STOCK_STRATEGIES, action='append')
+
+    def handle(self, *args, **options):
+        stock = options['stock'] if options['stock'] is not None else options['checkouts'] // 2
+        test_name = None
+        if connection.vendor == 'sqlite':
+            # Threads need a database they can all open; SQLite's default
+            # test database is in memory and private to one connection. And
+            # a deferred transaction that upgrades to a write fails at once
+            # with "database is locked" instead of waiting, so start them
+            # IMMEDIATE: writers queue on the database lock.
+            test_name = os.path.join(tempfile.gettempdir(), 'bench_hot_sku.sqlite3')
+            connection.settings_dict.setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+        with benchmark_database(test_name):
+            user = User.objects.create_user('bench', password='bench')
+            category = Category.objects.create(name='Bench', slug='bench')
+            self.stdout.write(f"{connection.vendor}: {options['workers']} workers, "
+                              f"{options['checkouts']} checkouts, {stock} in stock")
+            for strategy in options['strategy'] or STOCK_STRATEGIES:
+                product = Product.objects.create(title=f'Launch ({strategy})', price=999, stock=0, category=category)
+                set_stock(product.pk, stock, reference='bench')
+                with override_settings(CHECKOUT_STOCK_STRATEGY=strategy):
+                    elapsed, latencies, rejected, errors = run_checkouts(
+                        user, product, options['workers'], options['checkouts'],
+                    )
+                sold = OrderItem.objects.filter(product=product).aggregate(units=Sum('quantity'))['units'] or 0
+                left = Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+                self.stdout.write(summary(f'{strategy:<10}', latencies))
+                self.stdout.write(
+                    f"{'':<10}  throughput={len(latencies) / elapsed:.0f} orders/s sold={sold} left={left} "
+                    f"rejected={rejected} errors={errors} oversold={max(sold - stock, 0) + max(-left, 0)}"
+                )
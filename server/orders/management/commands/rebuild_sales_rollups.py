@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from orders.rollups import rebuild_rollups
+
+
+def day(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily sales rollups from orders (all days, or --start/--end inclusive)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=day, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=day, help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError('--start must not be after --end.')
+        days = rebuild_rollups(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt sales rollups for {days} days.'))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def mark_duplicate_payments(apps, schema_editor):
+    # Retried verifications could record one payment on several orders. Keep
+    # it on the oldest and tag the others so the unique index can be built.
+    Order = apps.get_model('orders', 'Order')
+    duplicated = (
+        Order.objects.exclude(razorpay_payment_id=None)
+        .values('razorpay_payment_id').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('razorpay_payment_id', flat=True)
+    )
+    for payment_id in list(duplicated):
+        for order in Order.objects.filter(razorpay_payment_id=payment_id).order_by('id')[1:]:
+            order.razorpay_payment_id = f'{payment_id}:dup-{order.pk}'[:100]
+            order.save(update_fields=['razorpay_payment_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_id_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_hash', models.CharField(max_length=64, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('response', models.JSONField(null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(mark_duplicate_payments, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='order',
+            name='razorpay_payment_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import JSONField, OuterRef, Subquery
+
+
+# The backfill is a frozen copy of orders.history as it stood when this
+# migration was written, so later changes there cannot alter it.
+def thumbnail_url(image_name, variants, legacy_images):
+    jpegs = [v for v in (variants or {}).get('variants', []) if v['format'] == 'jpeg']
+    if jpegs:
+        return default_storage.url(min(jpegs, key=lambda v: v['width'])['name'])
+    if image_name:
+        return default_storage.url(image_name)
+    return legacy_images[0] if legacy_images else ''
+
+
+def snapshot_items(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    first_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('id')
+    pending = OrderItem.objects.filter(product_title='').exclude(product=None).order_by('pk')
+    last_pk = 0
+    while True:
+        items = list(pending.filter(pk__gt=last_pk)[:500])
+        if not items:
+            return
+        products = {
+            product.pk: product
+            for product in Product.objects.filter(pk__in={item.product_id for item in items}).annotate(
+                thumbnail_name=Subquery(first_image.values('image')[:1]),
+                thumbnail_variants=Subquery(first_image.values('variants')[:1], output_field=JSONField()),
+            ).only('id', 'title', 'images')
+        }
+        for item in items:
+            product = products[item.product_id]
+            item.product_title = product.title
+            item.product_thumbnail = thumbnail_url(product.thumbnail_name, product.thumbnail_variants, product.images)
+        OrderItem.objects.bulk_update(items, ['product_title', 'product_thumbnail'])
+        last_pk = items[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_idempotency_keys'),
+        ('products', '0013_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_thumbnail',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_title',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(snapshot_items, migrations.RunPython.noop),
+    ]
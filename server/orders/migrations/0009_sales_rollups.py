@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+STATUSES = ('pending', 'paid', 'shipped', 'delivered')
+
+
+def build_rollups(apps, schema_editor):
+    # A frozen copy of orders.rollups.rebuild_rollups over all days, as it
+    # stood when this migration was written.
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailySales = apps.get_model('orders', 'DailySales')
+    DailyProductSales = apps.get_model('orders', 'DailyProductSales')
+    orders = (
+        Order.objects.annotate(day=TruncDate('created_at')).values('day')
+        .annotate(
+            n=Count('id'), total=Sum('total_amount'),
+            **{f'n_{status}': Count('id', filter=Q(status=status)) for status in STATUSES},
+        )
+        .order_by()
+    )
+    units = dict(
+        OrderItem.objects.annotate(day=TruncDate('order__created_at')).values('day')
+        .annotate(units=Sum('quantity')).order_by()
+        .values_list('day', 'units')
+    )
+    line_revenue = ExpressionWrapper(F('quantity') * F('price_at_purchase'),
+                                     output_field=DecimalField(max_digits=14, decimal_places=2))
+    products = (
+        OrderItem.objects.exclude(product=None)
+        .annotate(day=TruncDate('order__created_at')).values('day', 'product_id')
+        .annotate(units=Sum('quantity'), revenue=Sum(line_revenue))
+        .order_by()
+    )
+    DailySales.objects.bulk_create([
+        DailySales(
+            date=row['day'], orders=row['n'], revenue=row['total'] or 0, units=units.get(row['day']) or 0,
+            **{status: row[f'n_{status}'] for status in STATUSES},
+        )
+        for row in orders
+    ], batch_size=1000)
+    DailyProductSales.objects.bulk_create([
+        DailyProductSales(date=row['day'], product_id=row['product_id'], units=row['units'], revenue=row['revenue'] or 0)
+        for row in products
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_admin_order_indexes'),
+        ('products', '0013_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('paid', models.IntegerField(default=0)),
+                ('shipped', models.IntegerField(default=0)),
+                ('delivered', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'date'], name='daily_product_sales_product')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='daily_product_sales_unique')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def fill_categories(apps, schema_editor):
+    DailyProductSales = apps.get_model('orders', 'DailyProductSales')
+    Product = apps.get_model('products', 'Product')
+    DailyProductSales.objects.update(category_id=Subquery(
+        Product.objects.filter(pk=OuterRef('product_id')).values('category_id')[:1]
+    ))
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_sales_rollups'),
+        ('products', '0013_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyproductsales',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='products.category'),
+        ),
+        migrations.RunPython(fill_categories, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dailyproductsales',
+            index=models.Index(fields=['date', 'product', 'category', 'units', 'revenue'], name='daily_product_sales_cover'),
+        ),
+    ]
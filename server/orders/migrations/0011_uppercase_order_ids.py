@@ -0,0 +1,40 @@
+import logging
+
+from django.db import IntegrityError, migrations, transaction
+from django.db.models.functions import Upper
+
+logger = logging.getLogger('orders.migrations')
+
+
+def uppercase_order_ids(apps, schema_editor):
+    # Tracking looks references up upper-case. A reference whose upper-case
+    # form is already taken keeps its case rather than failing the migration,
+    # and is reported: tracking cannot find it until it is renamed by hand.
+    Order = apps.get_model('orders', 'Order')
+    mixed = (
+        Order.objects.exclude(order_id=None).exclude(order_id=Upper('order_id'))
+        .values_list('pk', 'order_id')
+    )
+    collisions = []
+    for pk, order_id in list(mixed):
+        try:
+            with transaction.atomic():
+                Order.objects.filter(pk=pk).update(order_id=order_id.upper())
+        except IntegrityError:
+            collisions.append(f'{order_id} (order {pk})')
+    if collisions:
+        logger.warning(
+            'Left %d order reference(s) mixed-case because their upper-case form is taken; '
+            'tracking will not find them: %s', len(collisions), ', '.join(collisions),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_product_sales_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_order_ids, migrations.RunPython.noop),
+    ]
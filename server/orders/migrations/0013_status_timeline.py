@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_timeline(apps, schema_editor):
+    # Orders placed before the timeline existed get a placement event at
+    # their creation time, holding the status they were most likely placed
+    # with. When they have moved on since, a second event brings the
+    # timeline to their current status. Order keeps no time of that change,
+    # so the event is stamped with this migration's run and carries no
+    # previous_at, which keeps it out of the SLA report.
+    Order = apps.get_model('orders', 'Order')
+    OrderStatusEvent = apps.get_model('orders', 'OrderStatusEvent')
+    pending = Order.objects.filter(status_events__isnull=True).order_by('pk')
+    now = timezone.now()
+    last_pk = 0
+    while True:
+        orders = list(pending.filter(pk__gt=last_pk).only('id', 'status', 'razorpay_payment_id', 'created_at')[:1000])
+        if not orders:
+            return
+        events = []
+        for order in orders:
+            placed = (order.status if order.status in ('pending', 'paid')
+                      else 'paid' if order.razorpay_payment_id else 'pending')
+            events.append(OrderStatusEvent(order_id=order.pk, to_status=placed, created_at=order.created_at))
+            if order.status != placed:
+                events.append(OrderStatusEvent(order_id=order.pk, from_status=placed, to_status=order.status,
+                                               created_at=max(now, order.created_at)))
+        OrderStatusEvent.objects.bulk_create(events)
+        last_pk = orders[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_order_status_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderstatusevent',
+            name='previous_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatusevent',
+            index=models.Index(fields=['created_at'], name='order_status_event_created'),
+        ),
+        migrations.RunPython(backfill_timeline, migrations.RunPython.noop),
+    ]
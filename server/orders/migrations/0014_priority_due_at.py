@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from datetime import timedelta
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_due_at(apps, schema_editor):
+    # One UPDATE per distinct priority_hours.
+    Order = apps.get_model('orders', 'Order')
+    pending = Order.objects.filter(is_priority=True, priority_hours__gt=0, due_at__isnull=True)
+    for hours in list(pending.values_list('priority_hours', flat=True).distinct().order_by()):
+        pending.filter(priority_hours=hours).update(due_at=F('created_at') + timedelta(hours=hours))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_status_timeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill_due_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('due_at__isnull', False), ('is_priority', True), models.Q(('status', 'delivered'), _negated=True)), fields=['due_at', 'id'], name='order_priority_due'),
+        ),
+    ]
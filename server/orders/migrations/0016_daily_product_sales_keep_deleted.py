@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def add_deleted_product_sales(apps, schema_editor):
+    # Until now deleting a product also deleted its rollup rows, and rebuilds
+    # skipped items without a product. Their sales go back in, one
+    # product-less row per day, as rebuild_rollups now files them.
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailyProductSales = apps.get_model('orders', 'DailyProductSales')
+    line_revenue = ExpressionWrapper(F('quantity') * F('price_at_purchase'),
+                                     output_field=DecimalField(max_digits=14, decimal_places=2))
+    DailyProductSales.objects.filter(product=None).delete()
+    DailyProductSales.objects.bulk_create([
+        DailyProductSales(date=row['day'], product=None, category=None, units=row['units'], revenue=row['revenue'] or 0)
+        for row in OrderItem.objects.filter(product=None)
+        .annotate(day=TruncDate('order__created_at')).values('day')
+        .annotate(units=Sum('quantity'), revenue=Sum(line_revenue)).order_by()
+    ], batch_size=1000)
+
+
+def drop_deleted_product_sales(apps, schema_editor):
+    apps.get_model('orders', 'DailyProductSales').objects.filter(product=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_idempotency_lease'),
+        ('products', '0014_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyproductsales',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='products.product'),
+        ),
+        migrations.RunPython(add_deleted_product_sales, drop_deleted_product_sales),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_item_revenue(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailySales = apps.get_model('orders', 'DailySales')
+    line_revenue = ExpressionWrapper(F('quantity') * F('price_at_purchase'),
+                                     output_field=DecimalField(max_digits=14, decimal_places=2))
+    revenue = dict(
+        OrderItem.objects.annotate(day=TruncDate('order__created_at')).values('day')
+        .annotate(revenue=Sum(line_revenue)).order_by().values_list('day', 'revenue')
+    )
+    days = [day for day in DailySales.objects.only('id', 'date') if revenue.get(day.date)]
+    for day in days:
+        day.item_revenue = revenue[day.date]
+    DailySales.objects.bulk_update(days, ['item_revenue'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_daily_product_sales_keep_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysales',
+            name='item_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(fill_item_revenue, migrations.RunPython.noop),
+    ]
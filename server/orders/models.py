@@ -1,9 +1,13 @@
+from datetime import timedelta
+
 from django.db import models
-from django.contrib.auth.models import User
-from products.models import Product
-import random
-import string
 from django.utils import timezone
+from django.contrib.auth.models import User
+from products.models import Category, Product
+from .order_ids import next_order_id
+
+# Priority orders still to be delivered: the dispatch queue (orders.priority).
+OPEN_PRIORITY = models.Q(is_priority=True, due_at__isnull=False) & ~models.Q(status='delivered')
 
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
@@ -32,37 +36,149 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHOD_CHOICES, default='COD')
     
     razorpay_order_id = models.CharField(max_length=100, null=True, blank=True)
-    razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True)
+    # Unique: a retried payment verification must not create a second order.
+    razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True, unique=True)
 
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so due_at is computed from the
+    # same instant that is stored.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     # Priority Order Fields
     is_priority = models.BooleanField(default=False)
     priority_hours = models.IntegerField(null=True, blank=True)
+    # created_at + priority_hours, kept in save() so the queue reads it off an index.
+    due_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Newest-first keyset pages, alone and under each admin filter (orders.listing).
+            models.Index(fields=['created_at', 'id'], name='order_created_keyset'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_keyset'),
+            models.Index(fields=['payment_method', 'created_at', 'id'], name='order_payment_keyset'),
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_priority=True),
+                         name='order_priority_keyset'),
+            # Only open priority orders, so it stays as small as the queue.
+            models.Index(fields=['due_at', 'id'], condition=OPEN_PRIORITY, name='order_priority_due'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.order_id:
-            year = timezone.now().year
-            while True:
-                # Generate random 6-char string (e.g., A1B2C3)
-                random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-                candidate_id = f"MEKARO-{year}-{random_str}"
-                if not Order.objects.filter(order_id=candidate_id).exists():
-                    self.order_id = candidate_id
-                    break
+            self.order_id = next_order_id()
+        # Stored upper-case so tracking lookups are exact matches on the index.
+        self.order_id = self.order_id.upper()
+        # Zero or negative hours set no deadline (as in migration 0014).
+        hours = int(self.priority_hours or 0)
+        self.due_at = self.created_at + timedelta(hours=hours) if self.is_priority and hours > 0 else None
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.order_id} ({self.id})"
 
 
+class OrderStatusEvent(models.Model):
+    """
+    One status change of an order (orders.timeline); placement is the first,
+    with a blank from_status. Append-only.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+    # When the order entered from_status (the previous event), so the time
+    # spent in it needs no lookup of earlier rows.
+    previous_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='order_status_event_order'),
+            models.Index(fields=['created_at'], name='order_status_event_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
 
     quantity = models.IntegerField()
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
+    # Snapshot taken at checkout, so history survives product edits (orders.history).
+    product_title = models.CharField(max_length=255, blank=True)
+    product_thumbnail = models.CharField(max_length=500, blank=True)
 
     def __str__(self):
         return f"{self.quantity} x {self.product}"
+
+
+class OrderIdSequence(models.Model):
+    """Per-year counter behind order references (orders.order_ids)."""
+    year = models.PositiveSmallIntegerField(primary_key=True)
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.next_value}"
+
+
+class IdempotencyKey(models.Model):
+    """Claimed Idempotency-Key and the response it produced (orders.idempotency)."""
+    key_hash = models.CharField(max_length=64, unique=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    # When the running attempt claimed it; a claim still without a response
+    # after IDEMPOTENCY_LEASE is taken to have died and may be reclaimed.
+    claimed_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key_hash
+
+
+class DailySales(models.Model):
+    """Orders placed on one day and where they stand now (orders.rollups)."""
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    # What the orders charged, fees included; item_revenue is the sum of
+    # their items' price_at_purchase * quantity, as in DailyProductSales.
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    item_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    paid = models.IntegerField(default=0)
+    shipped = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date}: {self.orders} orders"
+
+
+class DailyProductSales(models.Model):
+    """
+    Units and revenue of one product on one day (orders.rollups). Sales of
+    products deleted since stay, with product NULL, so the breakdowns still
+    add up to DailySales.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='daily_sales')
+    # The product's category when sold; lets category breakdowns skip the join.
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='daily_sales')
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='daily_product_sales_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'date'], name='daily_product_sales_product'),
+            # Covers the analytics scans, which then never touch the table.
+            models.Index(fields=['date', 'product', 'category', 'units', 'revenue'],
+                         name='daily_product_sales_cover'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.units} x {self.product_id}"
@@ -0,0 +1,112 @@
+"""
+Order reference allocation: MEKARO-<year>-XXXXXX without per-order lookups.
+
+Each year has a counter row (OrderIdSequence). A counter value is mapped to
+six base-36 characters through a fixed permutation of the 36**6 code space
+(multiplication by a constant coprime with 36, plus an offset), so distinct
+values always give distinct codes, yet consecutive orders do not look
+sequential. The unique index on Order.order_id stays the final guarantee.
+
+Processes reserve blocks of values and hand them out from memory, so most
+orders cost no query at all. A reserved block is screened once against
+existing references, which only matters for the random ones issued before
+this allocator. Reservations are committed on their own, so call
+next_order_id() before opening the transaction that inserts the order;
+inside a transaction it reserves just one value there instead, so a
+rollback cannot strand a block that another process would then reuse.
+"""
+import threading
+from collections import deque
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+PREFIX = 'MEKARO'
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+CODE_LENGTH = 6
+SPACE = len(ALPHABET) ** CODE_LENGTH
+MULTIPLIER = 1_301_081  # neither even nor a multiple of 3: a bijection mod 36**6
+OFFSET = 104_729
+BLOCK_SIZE = 50
+
+_blocks = {}
+_lock = threading.Lock()
+
+
+def encode(year, value):
+    if not 0 <= value < SPACE:
+        raise ValueError(f'Order reference space for {year} is exhausted')
+    number = (value * MULTIPLIER + OFFSET) % SPACE
+    chars = []
+    for _ in range(CODE_LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return f"{PREFIX}-{year}-{''.join(reversed(chars))}"
+
+
+def reserve(year, count):
+    """Reserve `count` consecutive counter values for `year`; returns the first."""
+    from .models import OrderIdSequence
+
+    counter = OrderIdSequence.objects.filter(year=year)
+    with transaction.atomic():
+        if not counter.update(next_value=F('next_value') + count):
+            try:
+                with transaction.atomic():
+                    OrderIdSequence.objects.create(year=year, next_value=count)
+            except IntegrityError:
+                counter.update(next_value=F('next_value') + count)  # created concurrently
+        end = counter.values_list('next_value', flat=True).get()
+    return end - count
+
+
+def reserve_codes(year, count):
+    """At least `count` fresh references for `year`, skipping any already in use."""
+    from .models import Order
+
+    codes = []
+    while len(codes) < count:
+        start = reserve(year, count - len(codes))
+        batch = [encode(year, value) for value in range(start, start + count - len(codes))]
+        taken = set(Order.objects.filter(order_id__in=batch).values_list('order_id', flat=True))
+        codes.extend(code for code in batch if code not in taken)
+    return codes
+
+
+def next_order_id(year=None):
+    year = year or timezone.now().year
+    if transaction.get_connection().in_atomic_block:
+        return reserve_codes(year, 1)[0]
+    with _lock:
+        block = _blocks.setdefault(year, deque())
+        if not block:
+            block.extend(reserve_codes(year, BLOCK_SIZE))
+        return block.popleft()
+
+
+def assign_order_ids(orders):
+    """Give every order a reference (by its created_at year) ahead of bulk writes."""
+    by_year = {}
+    for order in orders:
+        by_year.setdefault((order.created_at or timezone.now()).year, []).append(order)
+    for year, pending in by_year.items():
+        for order, code in zip(pending, reserve_codes(year, len(pending))):
+            order.order_id = code
+
+
+def backfill_order_ids(batch_size=500):
+    """Fill missing order references in batches; returns the number updated."""
+    from django.db.models import Q
+    from .models import Order
+
+    missing = Order.objects.filter(Q(order_id__isnull=True) | Q(order_id='')).only('id', 'created_at', 'order_id')
+    total = 0
+    while True:
+        batch = list(missing.order_by('pk')[:batch_size])
+        if not batch:
+            return total
+        with transaction.atomic():
+            assign_order_ids(batch)
+            Order.objects.bulk_update(batch, ['order_id'])
+        total += len(batch)
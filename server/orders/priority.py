@@ -0,0 +1,57 @@
+"""
+Dispatch queue for priority (same-day) orders.
+
+Order.save() stores each priority order's deadline, due_at = created_at +
+priority_hours, and the partial (due_at, id) index holds open priority
+orders only (OPEN_PRIORITY): a delivered order leaves it and an ordinary
+order never enters it. The queue is a keyset walk of that index in
+deadline order, and its breach and per-hour counts are one aggregate
+over it, so both cost what the open queue costs however many orders the
+history holds.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q
+
+from backend.pagination import KeysetPagination
+from .history import with_history_items
+from .listing import ORDER_FIELDS
+from .models import OPEN_PRIORITY, Order
+
+# Hourly buckets counted ahead of now; later deadlines share one count.
+QUEUE_HOURS = 24
+
+
+class PriorityQueuePagination(KeysetPagination):
+    page_size = 25
+    max_page_size = 100
+    ordering_fields = ()
+    default_ordering = 'due_at'
+
+
+def priority_queue():
+    """Open priority orders with their user and snapshot items, earliest deadline first."""
+    queryset = Order.objects.filter(OPEN_PRIORITY).select_related('user').only(*ORDER_FIELDS, 'due_at')
+    return with_history_items(queryset).order_by('due_at', 'pk')
+
+
+def queue_counts(now):
+    """Open priority orders: how many are overdue at `now`, and how many fall due in each coming hour."""
+    def due_within(start, end):
+        return Count('pk', filter=Q(due_at__gte=now + timedelta(hours=start), due_at__lt=now + timedelta(hours=end)))
+
+    counts = Order.objects.filter(OPEN_PRIORITY).aggregate(
+        total=Count('pk'),
+        breached=Count('pk', filter=Q(due_at__lt=now)),
+        later=Count('pk', filter=Q(due_at__gte=now + timedelta(hours=QUEUE_HOURS))),
+        **{f'hour_{hour}': due_within(hour, hour + 1) for hour in range(QUEUE_HOURS)},
+    )
+    return {
+        'total': counts['total'],
+        'breached': counts['breached'],
+        'buckets': [
+            {'hour': hour, 'due_before': now + timedelta(hours=hour + 1), 'count': counts[f'hour_{hour}']}
+            for hour in range(QUEUE_HOURS)
+        ],
+        'later': counts['later'],
+    }
@@ -0,0 +1,89 @@
+"""
+Cart quotes: current prices, stock and totals for a whole cart in one
+query, plus a short-lived signed token that checkout accepts instead of
+trusting a client-side total. A checkout without a token is re-priced
+at current prices (checkout_prices); the client's total is never charged.
+
+The token is a timestamped django.core.signing payload of the quoted
+lines and total, so nothing is stored server side. Checkout verifies its
+signature and age, checks the cart still matches the quoted lines and
+charges the quoted prices. A quote reserves no stock; the checkout's
+guarded stock UPDATE still decides.
+"""
+from decimal import Decimal
+
+from django.core import signing
+
+from products.models import Product
+from .services import CheckoutError, cart_quantities
+
+QUOTE_SALT = 'orders.quote'
+QUOTE_MAX_AGE = 15 * 60
+# Mirrors the fees the cart page shows.
+PLATFORM_FEE = Decimal('7')
+DELIVERY_FEE = Decimal('100')
+FREE_DELIVERY_FROM = Decimal('499')
+
+
+def quote_cart(items):
+    """Price `items` ([{'product_id', 'qty'}]) at current prices and stock."""
+    quantities = cart_quantities(items)
+    products = {
+        product.pk: product
+        for product in Product.objects.filter(pk__in=quantities).only('id', 'title', 'price', 'stock')
+    }
+    lines = [
+        {
+            'product_id': product.pk, 'title': product.title, 'price': product.price, 'qty': qty,
+            'stock': product.stock, 'in_stock': product.stock >= qty, 'line_total': product.price * qty,
+        }
+        for product, qty in ((products[pk], qty) for pk, qty in quantities.items() if pk in products)
+    ]
+    missing = [pk for pk in quantities if pk not in products]
+    subtotal = sum((line['line_total'] for line in lines), Decimal(0))
+    delivery_fee = Decimal(0) if subtotal >= FREE_DELIVERY_FROM else DELIVERY_FEE
+    total = subtotal + PLATFORM_FEE + delivery_fee
+
+    orderable = not missing and all(line['in_stock'] for line in lines)
+    token = signing.dumps({
+        'lines': [[line['product_id'], line['qty'], str(line['price'])] for line in lines],
+        'total': str(total),
+    }, salt=QUOTE_SALT, compress=True) if orderable else None
+    return {
+        'lines': lines,
+        'missing': missing,
+        'subtotal': subtotal,
+        'platform_fee': PLATFORM_FEE,
+        'delivery_fee': delivery_fee,
+        'total': total,
+        'quote': token,
+        'expires_in': QUOTE_MAX_AGE if token else None,
+    }
+
+
+def read_quote(token, quantities=None):
+    """
+    ({product_id: price}, total) from a quote token. Raises CheckoutError if
+    it is forged or expired, or if `quantities` ({product_id: qty}) is not
+    the quoted cart.
+    """
+    try:
+        payload = signing.loads(token, salt=QUOTE_SALT, max_age=QUOTE_MAX_AGE)
+    except signing.SignatureExpired:
+        raise CheckoutError("Your prices have expired. Please review your cart.")
+    except signing.BadSignature:
+        raise CheckoutError("Invalid quote. Please review your cart.")
+    if quantities is not None and quantities != {pk: qty for pk, qty, _ in payload['lines']}:
+        raise CheckoutError("Your cart changed after it was priced. Please review your cart.")
+    return {pk: Decimal(price) for pk, _, price in payload['lines']}, Decimal(payload['total'])
+
+
+def checkout_prices(data, items):
+    """
+    ({product_id: price}, total) a checkout charges: the quoted ones when
+    `data` carries a quote token, else the cart priced now.
+    """
+    if data.get('quote'):
+        return read_quote(data['quote'], cart_quantities(items))
+    quote = quote_cart(items)
+    return {line['product_id']: line['price'] for line in quote['lines']}, quote['total']
@@ -0,0 +1,209 @@
+"""
+Daily sales rollups behind the admin dashboard.
+
+DailySales holds, per calendar day (in TIME_ZONE), the orders placed, their
+revenue (charged, and from items alone) and units, and how many of them are
+in each status now;
+DailyProductSales holds units and revenue per product (and its category)
+per day. Checkouts add to both with one INSERT ... ON CONFLICT DO UPDATE
+each, as the last statements of the checkout transaction (so the rollups
+never drift from the orders, and the hot row for today is locked only from
+there to the commit), and status changes move counts between the status
+columns. The dashboard then sums a few rows per day instead of scanning
+every order.
+
+`rebuild_rollups` recomputes a date range from Order/OrderItem and is the
+way to repair drift (orders created outside place_order, deletions); the
+`rebuild_sales_rollups` command wraps it. Items whose product has been
+deleted are kept in one product-less row per day: the order tables no
+longer know their category, so a rebuild files them under none.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Least, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from backend.cache import bump_version
+from .models import DailyProductSales, DailySales, Order, OrderItem
+
+STATUSES = ('pending', 'paid', 'shipped', 'delivered')
+BATCH_SIZE = 1000
+
+
+def order_day(order):
+    return timezone.localdate(order.created_at)
+
+
+def upsert_add(model, unique_fields, rows, add_fields):
+    """
+    Insert `rows` (dicts), or on a unique clash add their `add_fields` to
+    the existing row, in one statement.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(rows))
+    conflict = ', '.join(quote(model._meta.get_field(name).column) for name in unique_fields)
+    updates = ', '.join(
+        f"{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}"
+        for column in (model._meta.get_field(name).column for name in add_fields)
+    )
+    params = [
+        field.get_db_prep_save(row[field.name], connection) for row in rows for field in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) VALUES {placeholders} "
+            f"ON CONFLICT ({conflict}) DO UPDATE SET {updates}",
+            params,
+        )
+
+
+def record_order(order, lines):
+    """Add a placed order (lines as [(product, qty)]) to the rollups."""
+    day = order_day(order)
+    units = sum(qty for _, qty in lines)
+    item_revenue = sum((qty * Decimal(str(product.price)) for product, qty in lines), Decimal(0))
+    row = {'date': day, 'orders': 1, 'revenue': Decimal(str(order.total_amount)), 'item_revenue': item_revenue,
+           'units': units}
+    row.update({status: int(status == order.status) for status in STATUSES})
+    upsert_add(DailySales, ['date'], [row], [name for name in row if name != 'date'])
+
+    by_product = {}
+    for product, qty in lines:
+        category_id, units, revenue = by_product.get(product.pk, (product.category_id, 0, Decimal(0)))
+        by_product[product.pk] = (category_id, units + qty, revenue + qty * Decimal(str(product.price)))
+    upsert_add(DailyProductSales, ['date', 'product'], [
+        {'date': day, 'product': product_id, 'category': category_id, 'units': units, 'revenue': revenue}
+        for product_id, (category_id, units, revenue) in sorted(by_product.items())
+    ], ['units', 'revenue'])
+
+
+def record_status_changes(changes):
+    """
+    Move status counts for orders that changed status. `changes` is an
+    iterable of (order, old_status); one UPDATE per day and status move.
+    A move takes at most what the old status column holds, so orders the
+    rollups never counted (see rebuild_rollups) cannot drive it negative.
+    """
+    moves = Counter()
+    for order, old_status in changes:
+        if old_status != order.status and old_status in STATUSES and order.status in STATUSES:
+            moves[order_day(order), old_status, order.status] += 1
+    for (day, old_status, new_status), count in moves.items():
+        moved = Least(F(old_status), Value(count))
+        DailySales.objects.filter(date=day).update(**{
+            old_status: F(old_status) - moved, new_status: F(new_status) + moved,
+        })
+
+
+def day_bounds(start, end):
+    """Aware datetimes bracketing local days [start, end]; either may be None."""
+    lower = timezone.make_aware(datetime.combine(start, time.min)) if start else None
+    upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)) if end else None
+    return lower, upper
+
+
+def rebuild_rollups(start=None, end=None):
+    """
+    Recompute the rollups for days start..end (inclusive; None = unbounded)
+    from the order tables. Returns the number of days rebuilt.
+    """
+    lower, upper = day_bounds(start, end)
+
+    def created(prefix=''):
+        q = Q()
+        if lower:
+            q &= Q(**{f'{prefix}created_at__gte': lower})
+        if upper:
+            q &= Q(**{f'{prefix}created_at__lt': upper})
+        return q
+
+    days = Q()
+    if start:
+        days &= Q(date__gte=start)
+    if end:
+        days &= Q(date__lte=end)
+
+    orders = (
+        Order.objects.filter(created())
+        .annotate(day=TruncDate('created_at')).values('day')
+        .annotate(
+            n=Count('id'), total=Sum('total_amount'),
+            **{f'n_{status}': Count('id', filter=Q(status=status)) for status in STATUSES},
+        )
+        .order_by()
+    )
+    line_revenue = ExpressionWrapper(F('quantity') * F('price_at_purchase'),
+                                     output_field=DecimalField(max_digits=14, decimal_places=2))
+    items = {
+        row['day']: row
+        for row in OrderItem.objects.filter(created('order__'))
+        .annotate(day=TruncDate('order__created_at')).values('day')
+        .annotate(units=Sum('quantity'), revenue=Sum(line_revenue)).order_by()
+    }
+    products = (
+        OrderItem.objects.filter(created('order__'))
+        .annotate(day=TruncDate('order__created_at')).values('day', 'product_id', 'product__category_id')
+        .annotate(units=Sum('quantity'), revenue=Sum(line_revenue))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        DailySales.objects.filter(days).delete()
+        DailyProductSales.objects.filter(days).delete()
+        rows = [
+            DailySales(
+                date=row['day'], orders=row['n'], revenue=row['total'] or 0,
+                item_revenue=items.get(row['day'], {}).get('revenue') or 0,
+                units=items.get(row['day'], {}).get('units') or 0,
+                **{status: row[f'n_{status}'] for status in STATUSES},
+            )
+            for row in orders
+        ]
+        DailySales.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(date=row['day'], product_id=row['product_id'], category_id=row['product__category_id'],
+                                units=row['units'], revenue=row['revenue'] or 0)
+            for row in products
+        ], batch_size=BATCH_SIZE)
+    # Closed-period analytics are cached under this version (orders.analytics).
+    bump_version(DailySales)
+    return len(rows)
+
+
+def parse_day(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: 'Enter a date (YYYY-MM-DD).'})
+    return day
+
+
+def dashboard_totals(start=None, end=None):
+    """Order, revenue, unit and status totals for local days start..end, in one query."""
+    days = DailySales.objects.all()
+    if start:
+        days = days.filter(date__gte=start)
+    if end:
+        days = days.filter(date__lte=end)
+    return days.aggregate(
+        total_orders=Coalesce(Sum('orders'), 0),
+        total_revenue=Coalesce(Sum('revenue'), Decimal(0), output_field=DecimalField()),
+        total_units=Coalesce(Sum('units'), 0),
+        **{f'{status}_orders': Coalesce(Sum(status), 0) for status in STATUSES},
+    )
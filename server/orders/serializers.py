@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Order, OrderItem
+from .timeline import timeline
 from products.serializers import ProductSerializer
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -25,3 +26,64 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = '__all__'
         read_only_fields = ['order_id']
+
+
+class OrderHistoryItemSerializer(serializers.ModelSerializer):
+    """An order line from its checkout snapshot; never touches the product."""
+    product = serializers.IntegerField(source='product_id', read_only=True)
+    title = serializers.CharField(source='product_title')
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'title', 'thumbnail', 'quantity', 'price_at_purchase']
+
+    def get_thumbnail(self, obj):
+        request = self.context.get('request')
+        if obj.product_thumbnail and request:
+            return request.build_absolute_uri(obj.product_thumbnail)
+        return obj.product_thumbnail or None
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    items = OrderHistoryItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_id', 'status', 'total_amount', 'payment_method', 'shipping_address',
+            'is_priority', 'priority_hours', 'created_at', 'items',
+        ]
+
+
+class OrderDetailSerializer(OrderHistorySerializer):
+    """One order with its status timeline (needs orders.timeline.with_timeline)."""
+    timeline = serializers.SerializerMethodField()
+
+    class Meta(OrderHistorySerializer.Meta):
+        fields = OrderHistorySerializer.Meta.fields + ['timeline']
+
+    def get_timeline(self, obj):
+        return timeline(obj)
+
+
+class AdminOrderSerializer(OrderHistorySerializer):
+    user = UserSerializer(read_only=True)
+
+    class Meta(OrderHistorySerializer.Meta):
+        fields = OrderHistorySerializer.Meta.fields + ['user', 'razorpay_order_id', 'razorpay_payment_id']
+
+
+class PriorityOrderSerializer(AdminOrderSerializer):
+    """An order in the dispatch queue (orders.priority); needs context['now']."""
+    breached = serializers.SerializerMethodField()
+    seconds_left = serializers.SerializerMethodField()
+
+    class Meta(AdminOrderSerializer.Meta):
+        fields = AdminOrderSerializer.Meta.fields + ['due_at', 'breached', 'seconds_left']
+
+    def get_breached(self, obj):
+        return obj.due_at < self.context['now']
+
+    def get_seconds_left(self, obj):
+        return round((obj.due_at - self.context['now']).total_seconds())
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.cache import bump_version
+from products.models import Category, Product
+from .models import DailySales, Order
+from .tracking import invalidate_tracking
+
+
+@receiver(post_save, sender=Order)
+def drop_tracking_brief(sender, instance, raw=False, **kwargs):
+    if not raw and instance.order_id:
+        # After commit, so a lookup between the save and the commit cannot
+        # cache the old status again.
+        order_id = instance.order_id
+        transaction.on_commit(lambda: invalidate_tracking(order_id))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def drop_sales_breakdowns(sender, **kwargs):
+    # The delete has set DailyProductSales.product/category NULL, closed
+    # days included, so cached month breakdowns (orders.analytics) are stale.
+    bump_version(DailySales)
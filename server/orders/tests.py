@@ -1,3 +1,715 @@
+import json
+from decimal import Decimal
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from .models import DailyProductSales, DailySales, Order, OrderItem, OrderStatusEvent
+from .rollups import STATUSES, rebuild_rollups
+from .services import CheckoutError, place_order
+from .transitions import change_status
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', email='buyer@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Boards', slug='boards')
+        self.products = [
+            Product.objects.create(title=f'Part {i}', price=10 + i, stock=5, category=category)
+            for i in range(12)
+        ]
+
+    def checkout(self, items):
+        return self.client.post('/api/orders/create/', {
+            'items': items, 'total_amount': '100.00', 'payment_method': 'COD',
+            'shipping_address': {'city': 'Chennai'},
+        }, format='json')
+
+    def test_cod_checkout_takes_stock_and_creates_items(self):
+        response = self.checkout([
+            {'product_id': self.products[0].id, 'qty': 2},
+            {'product_id': self.products[1].id, 'qty': 1},
+            {'product_id': self.products[0].id, 'qty': 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual(
+            sorted(order.items.values_list('product_id', 'quantity', 'price_at_purchase')),
+            [(self.products[0].id, 3, 10), (self.products[1].id, 1, 11)],
+        )
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 2)
+
+    def test_side_effects_wait_for_commit(self):
+        from unittest import mock
+        with mock.patch('orders.services.send_email_async') as send:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.checkout([{'product_id': self.products[0].id, 'qty': 1}])
+                self.user.profile.refresh_from_db()
+                self.assertNotEqual(self.user.profile.city, 'Chennai')
+                send.assert_not_called()
+            for callback in callbacks:
+                callback()
+        self.assertEqual(response.status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.city, 'Chennai')
+        self.assertEqual(send.call_args.args[0].to, ['buyer@example.com'])
+
+    def test_short_stock_or_missing_product_changes_nothing(self):
+        response = self.checkout([
+            {'product_id': self.products[0].id, 'qty': 1},
+            {'product_id': self.products[1].id, 'qty': 6},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Insufficient stock for Part 1', response.data['error'])
+        response = self.checkout([{'product_id': 999999, 'qty': 1}])
+        self.assertIn('no longer exists', response.data['error'])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(sorted(Product.objects.values_list('stock', flat=True).distinct()), [5])
+
+    def test_conditional_update_guards_stale_stock(self):
+        from .services import take_stock
+        with self.assertRaises(CheckoutError):
+            take_stock([], {self.products[0].id: 1, self.products[1].id: 6}, 'ORD-TEST')
+
+    def test_optimistic_strategy_rolls_back_a_lost_race(self):
+        from .services import load_products
+        product = self.products[0]
+
+        def sold_out_meanwhile(quantities, lock=True):
+            products = load_products(quantities, lock)
+            Product.objects.filter(pk=product.pk).update(stock=0)
+            return products
+
+        items = [{'product_id': product.id, 'qty': 2}]
+        with self.settings(CHECKOUT_STOCK_STRATEGY='optimistic'):
+            order, _ = place_order(self.user, items, total_amount=0, shipping_address={})
+            self.assertEqual(Product.objects.get(pk=product.pk).stock, 3)
+            with mock.patch('orders.services.load_products', sold_out_meanwhile):
+                with self.assertRaises(CheckoutError):
+                    place_order(self.user, items, total_amount=0, shipping_address={})
+        self.assertEqual(list(Order.objects.all()), [order])
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        def count(lines):
+            items = [{'product_id': p.id, 'qty': 1} for p in self.products[:lines]]
+            with CaptureQueriesContext(connection) as queries:
+                place_order(self.user, items, total_amount=0, shipping_address={})
+            return len(queries)
+        count(1)  # first order of the year creates its reference counter
+        self.assertEqual(count(2), count(12))
+
+
+class OrderIdAllocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', password='pw')
+
+    def test_references_are_distinct_and_formatted(self):
+        import re
+        from .order_ids import encode
+        self.assertEqual(len({encode(2026, value) for value in range(20000)}), 20000)
+        orders = [Order.objects.create(user=self.user, total_amount=1) for _ in range(5)]
+        references = [order.order_id for order in orders]
+        self.assertEqual(len(set(references)), 5)
+        for reference in references:
+            self.assertRegex(reference, r'^MEKARO-\d{4}-[0-9A-Z]{6}$')
+
+    def test_legacy_reference_is_skipped(self):
+        from django.utils import timezone
+        from .order_ids import encode
+        year = timezone.now().year
+        Order.objects.create(user=self.user, total_amount=1, order_id=encode(year, 0))
+        self.assertNotEqual(Order.objects.create(user=self.user, total_amount=1).order_id, encode(year, 0))
+
+    def test_backfill_assigns_in_batches(self):
+        from io import StringIO
+        from django.core.management import call_command
+        Order.objects.bulk_create([Order(user=self.user, total_amount=1) for _ in range(120)])
+        with CaptureQueriesContext(connection) as queries:
+            call_command('backfill_order_ids', batch_size=50, stdout=StringIO())
+        references = list(Order.objects.values_list('order_id', flat=True))
+        self.assertEqual(len(set(references)), 120)
+        self.assertNotIn(None, references)
+        self.assertLess(len(queries), 40)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', email='buyer@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            title='Uno', price=650, stock=5, category=Category.objects.create(name='Boards', slug='boards')
+        )
+        self.payload = {
+            'items': [{'product_id': self.product.id, 'qty': 1}], 'total_amount': '650.00',
+            'payment_method': 'COD', 'shipping_address': {'city': 'Chennai'},
+        }
+
+    def post(self, path, payload, key):
+        return self.client.post(path, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_stored_response_without_touching_stock(self):
+        first = self.post('/api/orders/create/', self.payload, 'k-1')
+        with CaptureQueriesContext(connection) as queries:
+            replay = self.post('/api/orders/create/', self.payload, 'k-1')
+        self.assertEqual((replay.status_code, replay.data), (200, first.data))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertFalse(any('products_product' in q['sql'] for q in queries))
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+    def test_key_reuse_with_other_body_is_rejected_and_failures_release_it(self):
+        self.post('/api/orders/create/', self.payload, 'k-2')
+        other = dict(self.payload, total_amount='1.00')
+        self.assertEqual(self.post('/api/orders/create/', other, 'k-2').status_code, 422)
+
+        too_many = dict(self.payload, items=[{'product_id': self.product.id, 'qty': 50}])
+        self.assertEqual(self.post('/api/orders/create/', too_many, 'k-3').status_code, 400)
+        self.product.stock = 100
+        self.product.save()
+        self.assertEqual(self.post('/api/orders/create/', too_many, 'k-3').status_code, 200)
+
+    def test_abandoned_claim_is_retried_after_the_lease(self):
+        from .models import IdempotencyKey
+        self.post('/api/orders/create/', self.payload, 'k-4')
+        # As if the worker died mid-request: its order rolled back, its claim stayed.
+        Order.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        self.assertEqual(self.post('/api/orders/create/', self.payload, 'k-4').status_code, 409)
+
+        IdempotencyKey.objects.update(claimed_at=timezone.now() - timedelta(minutes=3))
+        other = dict(self.payload, total_amount='1.00')
+        self.assertEqual(self.post('/api/orders/create/', other, 'k-4').status_code, 422)
+        retry = self.post('/api/orders/create/', self.payload, 'k-4')
+        self.assertEqual(retry.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', retry)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failure_after_placing_rolls_the_order_back_before_releasing_the_key(self):
+        def place_then_fail(*args, **kwargs):
+            place_order(*args, **kwargs)
+            raise RuntimeError('confirmation template missing')
+
+        with mock.patch('orders.views.place_order', side_effect=place_then_fail):
+            with self.assertRaises(RuntimeError):
+                self.post('/api/orders/create/', self.payload, 'k-5')
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.post('/api/orders/create/', self.payload, 'k-5').status_code, 200)
+        self.assertEqual(self.post('/api/orders/create/', self.payload, 'k-5')['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_verify_payment_dedupes_on_payment_id(self):
+        from unittest import mock
+        payload = dict(self.payload, razorpay_order_id='order_1', razorpay_payment_id='pay_1',
+                       razorpay_signature='sig')
+        with mock.patch('orders.views.razorpay.Client') as client:
+            client.return_value.utility.verify_payment_signature.return_value = True
+            first = self.client.post('/api/orders/pay/verify/', payload, format='json')
+            second = self.client.post('/api/orders/pay/verify/', payload, format='json')
+        self.assertEqual(first.data['order_id'], second.data['order_id'])
+        self.assertEqual(Order.objects.filter(razorpay_payment_id='pay_1').count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('history', email='history@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Kits', slug='kits')
+        self.product = Product.objects.create(title='Rover Kit', price=499, stock=100, category=category,
+                                              images=['https://cdn.example.com/rover.jpg'])
+        for _ in range(5):
+            place_order(self.user, [{'product_id': self.product.pk, 'qty': 1}],
+                        total_amount=499, shipping_address={})
+
+    def test_items_are_snapshotted_at_checkout(self):
+        item = OrderItem.objects.filter(order__user=self.user).first()
+        self.assertEqual(item.product_title, 'Rover Kit')
+        self.assertEqual(item.product_thumbnail, 'https://cdn.example.com/rover.jpg')
+
+        self.product.delete()
+        response = self.client.get(f'/api/orders/{item.order_id}/')
+        self.assertEqual(response.data['items'][0]['title'], 'Rover Kit')
+        self.assertIsNone(response.data['items'][0]['product'])
+
+    def test_history_pages_in_constant_queries(self):
+        seen = []
+        url = '/api/orders/my-orders/?page_size=2'
+        while url:
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(queries), 2)
+            seen += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, list(Order.objects.filter(user=self.user).order_by('-created_at', '-pk')
+                                    .values_list('id', flat=True)))
+
+    def test_missing_or_foreign_order_is_404(self):
+        other = User.objects.create_user('other', password='pw')
+        order = Order.objects.create(user=other, total_amount=1)
+        self.assertEqual(self.client.get(f'/api/orders/{order.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/orders/999999/').status_code, 404)
+
+
+class AdminOrderListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        buyer = User.objects.create_user('buyer', email='buyer@example.com', password='pw')
+        category = Category.objects.create(name='Tools', slug='tools')
+        product = Product.objects.create(title='Driver Set', price=150, stock=100, category=category)
+        for i in range(6):
+            order, _ = place_order(buyer, [{'product_id': product.pk, 'qty': 1}], total_amount=150,
+                                   shipping_address={}, payment_method='COD' if i % 2 else 'ONLINE',
+                                   status='paid' if i < 2 else 'pending', is_priority=i == 5)
+        self.last = order
+
+    def test_filters(self):
+        def ids(query):
+            response = self.client.get(f'/api/admin/orders/?{query}')
+            self.assertEqual(response.status_code, 200, response.data)
+            return [order['id'] for order in response.data['results']]
+
+        self.assertEqual(len(ids('status=paid')), 2)
+        self.assertEqual(len(ids('status=paid,pending&payment_method=COD')), 3)
+        self.assertEqual(ids('is_priority=true'), [self.last.pk])
+        self.assertEqual(ids(f'order_id={self.last.order_id[:-1].lower()}')[:1], [self.last.pk])
+        self.assertEqual(len(ids('created_after=2000-01-01&created_before=2999-12-31')), 6)
+        self.assertEqual(ids('created_before=2000-01-01'), [])
+        self.assertEqual(self.client.get('/api/admin/orders/?status=lost').status_code, 400)
+
+    def test_pages_in_constant_queries(self):
+        seen, url = [], '/api/admin/orders/?page_size=4'
+        while url:
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertLessEqual(len(queries), 2)
+            self.assertEqual(response.data['results'][0]['user']['username'], 'buyer')
+            seen += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_ndjson_export_streams_matching_orders(self):
+        Order.objects.filter(pk__lt=self.last.pk).update(created_at=self.last.created_at)
+        with mock.patch('orders.listing.EXPORT_CHUNK_SIZE', 3):
+            response = self.client.get('/api/admin/orders/?as=ndjson&status=pending')
+            self.assertTrue(response.streaming)
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], sorted(Order.objects.filter(status='pending').values_list('pk', flat=True), reverse=True))
+        self.assertEqual(rows[0]['items'][0]['title'], 'Driver Set')
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.buyer = User.objects.create_user('shopper', password='pw')
+        category = Category.objects.create(name='Chips', slug='chips')
+        self.a = Product.objects.create(title='MCU', price=100, stock=50, category=category)
+        self.b = Product.objects.create(title='Sensor', price=25, stock=50, category=category)
+
+    def snapshot(self):
+        return (
+            list(DailySales.objects.order_by('date').values('date', 'orders', 'revenue', 'item_revenue', 'units', *STATUSES)),
+            list(DailyProductSales.objects.order_by('date', 'product_id').values('date', 'product_id', 'units', 'revenue')),
+        )
+
+    def test_incremental_rollups_match_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order, _ = place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 2}, {'product_id': self.b.pk, 'qty': 1}],
+                                   total_amount=225, shipping_address={})
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 1}], total_amount=100, shipping_address={})
+        with mock.patch('orders.transitions.send_emails_async'):
+            self.client.put(f'/api/admin/orders/{order.pk}/status/', {'status': 'shipped'}, format='json')
+
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.revenue, day.item_revenue, day.units, day.pending, day.shipped),
+                         (2, 325, 325, 4, 1, 1))
+        self.assertEqual(DailyProductSales.objects.get(product=self.a).units, 3)
+
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rollups_commit_with_the_order(self):
+        place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 1}], total_amount=100, shipping_address={})
+        self.assertEqual(DailySales.objects.get().orders, 1)  # no on_commit needed
+
+        with mock.patch('orders.services.record_order', side_effect=RuntimeError('rollup down')):
+            with self.assertRaises(RuntimeError):
+                place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 1}], total_amount=100, shipping_address={})
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.a.pk).stock, 49)
+
+    def test_status_changes_of_uncounted_orders_never_go_negative(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            counted, _ = place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 1}], total_amount=100,
+                                     shipping_address={})
+        uncounted = Order.objects.create(user=self.buyer, total_amount=5, shipping_address={}, status='paid')
+        with mock.patch('orders.transitions.send_emails_async'):
+            change_status([counted.pk, uncounted.pk], 'shipped')
+        day = DailySales.objects.get()
+        self.assertEqual((day.pending, day.paid, day.shipped), (0, 0, 1))
+
+    def test_sales_of_deleted_products_stay_in_the_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.buyer, [{'product_id': self.a.pk, 'qty': 2}, {'product_id': self.b.pk, 'qty': 1}],
+                        total_amount=225, shipping_address={})
+        self.b.delete()
+
+        def breakdown():
+            today = timezone.localdate()
+            response = self.client.get('/api/admin/analytics/', {'start': today, 'end': today})
+            return ([(row['name'], row['revenue']) for row in response.data['categories']],
+                    [row['title'] for row in response.data['top_products']])
+
+        self.assertEqual(breakdown(), ([('Chips', 225)], ['MCU']))
+        rebuild_rollups()
+        self.assertEqual(DailyProductSales.objects.get(product=None).revenue, 25)
+        self.assertEqual(breakdown(), ([('Chips', 200), ('', 25)], ['MCU']))
+
+    def test_dashboard_reads_rollups_by_date_range(self):
+        today = timezone.localdate()
+        DailySales.objects.create(date=today - timedelta(days=3), orders=4, revenue=400, units=6, delivered=4)
+        DailySales.objects.create(date=today, orders=1, revenue=50, units=1, pending=1)
+
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/stats/')
+        self.assertEqual(len(queries), 2)  # users, rollups
+        self.assertEqual((response.data['total_orders'], response.data['total_revenue']), (5, 450))
+        self.assertEqual(response.data['delivered_orders'], 4)
+
+        response = self.client.get(f'/api/admin/dashboard/?start={today - timedelta(days=1)}')
+        self.assertEqual((response.data['total_orders'], response.data['pending_orders']), (1, 1))
+        self.assertEqual(self.client.get('/api/admin/stats/?end=yesterday').status_code, 400)
+
+
+class SalesAnalyticsTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('analyst', password='pw', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.kits = Category.objects.create(name='Kits', slug='kits')
+        self.parts = Category.objects.create(name='Parts', slug='parts')
+        self.kit = Product.objects.create(title='Arm Kit', price=300, stock=1, category=self.kits)
+        self.gear = Product.objects.create(title='Gear', price=20, stock=1, category=self.parts)
+        # Two days in a closed month and one today.
+        self.today = timezone.localdate()
+        closed = (self.today.replace(day=1) - timedelta(days=1)).replace(day=10)
+        self.start = closed.replace(day=1)
+        for day, product, units in [(closed, self.kit, 1), (closed + timedelta(days=1), self.gear, 10),
+                                    (self.today, self.gear, 5)]:
+            revenue = units * product.price
+            # Orders charge a platform fee on top of their items.
+            DailySales.objects.create(date=day, orders=1, revenue=revenue + 7, item_revenue=revenue, units=units)
+            DailyProductSales.objects.create(date=day, product=product, category=product.category,
+                                             units=units, revenue=revenue)
+
+    def get(self, **params):
+        response = self.client.get('/api/admin/analytics/', {'start': self.start, **params})
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response.data
+
+    def test_breakdowns(self):
+        data = self.get(period='month', top=1)
+        self.assertEqual(data['totals']['orders'], 3)
+        self.assertEqual((data['totals']['revenue'], data['totals']['fees']), (600, 21))
+        self.assertEqual(data['totals']['revenue'], sum(row['revenue'] for row in data['categories']))
+        self.assertEqual(data['totals']['average_order_value'], Decimal('200.00'))
+        self.assertEqual([row['units'] for row in data['series']], [11, 5])
+        self.assertEqual([(row['name'], row['units'], row['revenue']) for row in data['categories']],
+                         [('Kits', 1, 300), ('Parts', 15, 300)])
+        self.assertEqual(data['top_products'], [{'product_id': self.gear.pk, 'title': 'Gear', 'units': 15, 'revenue': 300}])
+        self.assertEqual(self.client.get('/api/admin/analytics/?period=year').status_code, 400)
+
+    def test_closed_months_are_cached_until_rebuild(self):
+        self.get()
+        DailyProductSales.objects.filter(product=self.kit).update(units=99)
+        self.assertEqual(self.get(top=5)['top_products'][-1]['units'], 1)
+
+        kit_id = self.kit.pk
+        self.kit.delete()  # its closed-month row loses the product, so the month is recomputed
+        self.assertNotIn(kit_id, [row['product_id'] for row in self.get(top=5)['top_products']])
+
+        rebuild_rollups()  # no orders: closed and open days are all recomputed (empty)
+        self.assertEqual(self.get()['top_products'], [])
+
+
+class OrderTrackingTests(TestCase):
+    def setUp(self):
+        cache.clear()  # references repeat across tests once their rows roll back
+        buyer = User.objects.create_user('tracker', password='pw')
+        category = Category.objects.create(name='Bots', slug='bots')
+        self.products = [
+            Product.objects.create(title=f'Bot {i}', price=50, stock=10, category=category) for i in range(3)
+        ]
+        self.order, _ = place_order(buyer, [{'product_id': p.pk, 'qty': 1} for p in self.products],
+                                    total_amount=150, shipping_address={'city': 'Chennai'})
+        self.client = APIClient()
+
+    def test_lookup_is_case_insensitive_and_survives_deleted_products(self):
+        self.assertEqual(self.order.order_id, self.order.order_id.upper())
+        self.products[0].delete()
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/orders/track/{self.order.order_id.lower()}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 3)  # order, snapshot items, status events
+        self.assertEqual([item['product_title'] for item in response.data['items']], ['Bot 0', 'Bot 1', 'Bot 2'])
+        self.assertEqual(self.client.get('/api/orders/track/MEKARO-1999-XXXXXX/').status_code, 404)
+
+    def test_brief_is_cached_until_status_changes(self):
+        url = f'/api/orders/track/{self.order.order_id}/'
+        self.client.get(url)
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).data['status'], 'pending')
+        self.assertEqual(len(queries), 0)
+
+        self.order.status = 'shipped'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.order.save()
+        self.assertEqual(len(callbacks), 1)  # dropped at commit, not at save
+        self.assertEqual(self.client.get(url).data['status'], 'shipped')
+
+
+class CartQuoteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', email='buyer@example.com', password='pw')
+        self.client = APIClient()
+        category = Category.objects.create(name='Boards', slug='boards')
+        self.uno = Product.objects.create(title='Uno', price=300, stock=5, category=category)
+        self.nano = Product.objects.create(title='Nano', price=150, stock=1, category=category)
+
+    def quote(self, items):
+        return self.client.post('/api/orders/quote/', {'items': items}, format='json')
+
+    def test_quote_prices_the_cart_in_one_query(self):
+        from .quotes import quote_cart
+        with self.assertNumQueries(1):
+            quote = quote_cart([{'product_id': self.uno.id, 'qty': 2}, {'product_id': self.nano.id, 'qty': 2},
+                                {'product_id': 999999, 'qty': 1}])
+        self.assertEqual([(line['title'], line['line_total'], line['in_stock']) for line in quote['lines']],
+                         [('Uno', 600, True), ('Nano', 300, False)])
+        self.assertEqual((quote['missing'], quote['total'], quote['quote']), ([999999], Decimal('907'), None))
+
+        response = self.quote([{'product_id': self.nano.id, 'qty': 1}])
+        self.assertEqual((response.data['delivery_fee'], response.data['total']), (100, 257))
+        self.assertTrue(response.data['quote'])
+
+    def test_checkout_charges_the_quoted_prices(self):
+        items = [{'product_id': self.uno.id, 'qty': 2}]
+        token = self.quote(items).data['quote']
+        Product.objects.filter(pk=self.uno.pk).update(price=350)
+
+        self.client.force_authenticate(self.user)
+        payload = {'items': items, 'total_amount': '1.00', 'shipping_address': {}, 'quote': token}
+        response = self.client.post('/api/orders/create/', payload, format='json')
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual((order.total_amount, order.items.get().price_at_purchase), (Decimal('607'), 300))
+
+        payload['items'] = [{'product_id': self.uno.id, 'qty': 1}]
+        self.assertEqual(self.client.post('/api/orders/create/', payload, format='json').status_code, 400)
+        payload.update(items=items, quote=token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+        self.assertIn('Invalid quote', self.client.post('/api/orders/create/', payload, format='json').data['error'])
+        with mock.patch('orders.quotes.QUOTE_MAX_AGE', -1):
+            payload['quote'] = token
+            self.assertIn('expired', self.client.post('/api/orders/create/', payload, format='json').data['error'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_checkout_without_a_quote_is_repriced(self):
+        self.client.force_authenticate(self.user)
+        payload = {'items': [{'product_id': self.uno.id, 'qty': 2}], 'total_amount': '1.00', 'shipping_address': {}}
+        response = self.client.post('/api/orders/create/', payload, format='json')
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual((order.total_amount, order.items.get().price_at_purchase), (Decimal('607'), 300))
+
+        with mock.patch('orders.views.razorpay.Client') as client:
+            client.return_value.order.create.return_value = {'id': 'order_1', 'amount': 60700, 'currency': 'INR'}
+            self.client.post('/api/orders/pay/initiate/', {'amount': 1, 'items': payload['items']}, format='json')
+            self.assertEqual(self.client.post('/api/orders/pay/initiate/', {'amount': 1}, format='json').status_code, 400)
+        self.assertEqual(client.return_value.order.create.call_args.kwargs['data']['amount'], 60700)
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        buyer = User.objects.create_user('shopper', email='shopper@example.com', password='pw')
+        self.orders = [
+            Order.objects.create(user=buyer, total_amount=10, shipping_address={}, status=status)
+            for status in ['pending'] * 6 + ['paid', 'delivered']
+        ]
+        rebuild_rollups()
+
+    def bulk(self, ids, status='shipped'):
+        return self.client.post('/api/admin/orders/status/', {'ids': ids, 'status': status}, format='json')
+
+    def test_bulk_transition_is_constant_queries_and_one_email_batch(self):
+        def count(orders):
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                with mock.patch('orders.transitions.send_emails_async') as send:
+                    with self.captureOnCommitCallbacks(execute=True):
+                        response = self.bulk([order.pk for order in orders])
+            self.assertEqual(send.call_count, 1)
+            self.assertEqual(len(list(send.call_args[0][0])), len(orders))
+            self.assertEqual(len(response.data['updated']), len(orders))
+            return len(queries)
+        self.assertEqual(count(self.orders[:1]), count(self.orders[1:6]))
+
+        events = OrderStatusEvent.objects.filter(to_status='shipped')
+        self.assertEqual(events.count(), 6)
+        self.assertEqual(set(events.values_list('from_status', 'changed_by')), {('pending', self.admin.pk)})
+        self.assertEqual(DailySales.objects.get().shipped, 6)
+
+    def test_only_forward_transitions_are_applied(self):
+        paid, delivered = self.orders[6], self.orders[7]
+        response = self.bulk([paid.pk, delivered.pk, 999999], status='paid')
+        self.assertEqual(response.data['updated'], [])
+        self.assertEqual([row['reason'] for row in response.data['skipped']],
+                         ['Already paid.', 'Cannot move from delivered to paid.', 'Order not found.'])
+        self.assertEqual(self.bulk([], status='shipped').status_code, 400)
+        self.assertEqual(self.bulk(str(paid.pk), status='shipped').status_code, 400)  # not its digits
+        self.assertEqual(self.bulk([paid.pk], status='lost').status_code, 400)
+
+        # The single-order endpoint still allows corrections.
+        response = self.client.put(f'/api/admin/orders/{delivered.pk}/status/', {'status': 'paid'}, format='json')
+        self.assertEqual(response.data['new_status'], 'paid')
+        self.assertEqual(self.client.put('/api/admin/orders/999999/status/', {'status': 'paid'}, format='json').status_code, 404)
+
+
+class StatusTimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('boss', password='pw', is_staff=True)
+        self.buyer = User.objects.create_user('shopper', password='pw')
+        category = Category.objects.create(name='Kits', slug='kits')
+        self.product = Product.objects.create(title='Kit', price=50, stock=10, category=category)
+        self.client = APIClient()
+
+    def order(self):
+        order, _ = place_order(self.buyer, [{'product_id': self.product.pk, 'qty': 1}],
+                               total_amount=50, shipping_address={})
+        return order
+
+    def test_timeline_is_returned_by_tracking_and_order_detail(self):
+        from .transitions import change_status
+        order = self.order()
+        with mock.patch('orders.transitions.send_emails_async'):
+            change_status([order.pk], 'shipped', self.admin)
+        brief = self.client.get(f'/api/orders/track/{order.order_id}/').data
+        self.assertEqual([event['status'] for event in brief['timeline']], ['pending', 'shipped'])
+
+        self.client.force_authenticate(self.buyer)
+        detail = self.client.get(f'/api/orders/{order.pk}/').data
+        self.assertEqual([event['status'] for event in detail['timeline']], ['pending', 'shipped'])
+        self.assertEqual(OrderStatusEvent.objects.get(to_status='shipped').previous_at, order.created_at)
+
+    def test_sla_reports_median_and_p90_per_transition(self):
+        now = timezone.now()
+        for hours in range(1, 11):
+            order = self.order()
+            OrderStatusEvent.objects.create(order=order, from_status='pending', to_status='shipped',
+                                            previous_at=now - timedelta(hours=hours), created_at=now)
+        OrderStatusEvent.objects.create(order=order, from_status='shipped', to_status='delivered',
+                                        previous_at=now - timedelta(days=40), created_at=now - timedelta(days=35))
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/admin/orders/sla/')
+        [shipping] = response.data['transitions']
+        self.assertEqual((shipping['from_status'], shipping['to_status'], shipping['count']), ('pending', 'shipped', 10))
+        self.assertEqual((shipping['median_seconds'], shipping['p90_seconds']), (5.5 * 3600, 9.1 * 3600))
+        response = self.client.get('/api/admin/orders/sla/', {'start': timezone.localdate() - timedelta(days=60)})
+        self.assertEqual(len(response.data['transitions']), 2)
+        self.assertEqual(self.client.get('/api/admin/orders/sla/', {'start': 'soon'}).status_code, 400)
+
+    def test_backfill_ends_each_timeline_at_the_current_status(self):
+        legacy = {status: Order.objects.create(user=self.buyer, total_amount=50, status=status)
+                  for status in ('pending', 'paid', 'shipped', 'delivered')}
+        Order.objects.filter(pk=legacy['delivered'].pk).update(razorpay_payment_id='pay_9')
+        import_module('orders.migrations.0013_status_timeline').backfill_timeline(apps, None)
+
+        def statuses(order):
+            return list(order.status_events.order_by('created_at', 'id').values_list('to_status', flat=True))
+        self.assertEqual(statuses(legacy['pending']), ['pending'])
+        self.assertEqual(statuses(legacy['paid']), ['paid'])
+        self.assertEqual(statuses(legacy['shipped']), ['pending', 'shipped'])
+        self.assertEqual(statuses(legacy['delivered']), ['paid', 'delivered'])
+        self.assertFalse(OrderStatusEvent.objects.filter(previous_at__isnull=False).exists())
+
+
+class PriorityQueueTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('dispatch', password='pw', is_staff=True)
+        self.buyer = User.objects.create_user('rush', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.now = timezone.now()
+
+    def order(self, placed_ago, hours=4, **fields):
+        fields.setdefault('is_priority', True)
+        return Order.objects.create(user=self.buyer, total_amount=50, shipping_address={}, priority_hours=hours,
+                                    created_at=self.now - timedelta(minutes=placed_ago), **fields)
+
+    def test_due_at_is_stored_and_backfilled(self):
+        category = Category.objects.create(name='Rush', slug='rush')
+        product = Product.objects.create(title='Cable', price=20, stock=3, category=category)
+        order, _ = place_order(self.buyer, [{'product_id': product.pk, 'qty': 1}], total_amount=20,
+                               shipping_address={}, is_priority=True, priority_hours='6')
+        self.assertEqual(order.due_at, order.created_at + timedelta(hours=6))
+        self.assertIsNone(self.order(0, is_priority=False).due_at)
+        self.assertIsNone(self.order(0, hours=0).due_at)
+        self.assertIsNone(self.order(0, hours=-3).due_at)
+
+        migration = import_module('orders.migrations.0014_priority_due_at')
+        Order.objects.update(due_at=None)
+        migration.backfill_due_at(apps, None)
+        order.refresh_from_db()
+        self.assertEqual(order.due_at, order.created_at + timedelta(hours=6))
+
+    def test_queue_orders_open_priority_orders_by_deadline(self):
+        late = self.order(300)          # due an hour ago
+        soon = self.order(210)          # due in 30 minutes
+        later = self.order(30)          # due in 3.5 hours
+        self.order(400, status='delivered')
+        self.order(10, is_priority=False)
+
+        response = self.client.get('/api/admin/orders/priority/', {'page_size': 2})
+        self.assertEqual([order['id'] for order in response.data['results']], [late.pk, soon.pk])
+        self.assertEqual([order['breached'] for order in response.data['results']], [True, False])
+        self.assertAlmostEqual(response.data['results'][1]['seconds_left'], 30 * 60, delta=5)
+        counts = response.data['counts']
+        self.assertEqual((counts['total'], counts['breached'], counts['later']), (3, 1, 0))
+        self.assertEqual([bucket['count'] for bucket in counts['buckets'][:4]], [1, 0, 0, 1])
 
-# Create your tests here.
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([order['id'] for order in rest.data['results']], [later.pk])
+        self.assertIsNone(rest.data['next'])
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get('/api/admin/orders/priority/').status_code, 403)
@@ -0,0 +1,89 @@
+"""
+Order status timeline and fulfilment SLAs.
+
+Order.status is the current status; OrderStatusEvent keeps how it got
+there. place_order appends the placement event and orders.transitions one
+per change, each carrying when the order entered the status it leaves
+(previous_at). A timeline is then one read on the (order, created_at)
+index, and the time spent in a status is a subtraction of two columns of
+one row, so the SLA report is a single range scan on created_at with the
+percentiles taken in Python.
+"""
+import statistics
+from datetime import timedelta
+
+from django.db.models import DurationField, ExpressionWrapper, F, Max, Prefetch
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import OrderStatusEvent
+from .rollups import day_bounds, parse_day
+
+TIMELINE_FIELDS = ('id', 'order_id', 'to_status', 'created_at')
+DEFAULT_SLA_DAYS = 30
+
+
+def with_timeline(queryset):
+    """Prefetch each order's status events, oldest first."""
+    return queryset.prefetch_related(
+        Prefetch('status_events', queryset=OrderStatusEvent.objects.only(*TIMELINE_FIELDS).order_by('created_at', 'id'))
+    )
+
+
+def timeline(order):
+    return [{'status': event.to_status, 'at': event.created_at} for event in order.status_events.all()]
+
+
+def placement_event(order):
+    return OrderStatusEvent(order=order, to_status=order.status, created_at=order.created_at)
+
+
+def latest_event_times(order_ids):
+    """{order_id: time of its latest status event}, one grouped query."""
+    return dict(
+        OrderStatusEvent.objects.filter(order_id__in=order_ids).values('order_id')
+        .annotate(last=Max('created_at')).order_by().values_list('order_id', 'last')
+    )
+
+
+def quantile(ordered, fraction):
+    """Linearly interpolated quantile of sorted numbers."""
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def sla_report(start, end):
+    """Median and p90 time per status transition for changes made on local days start..end."""
+    lower, upper = day_bounds(start, end)
+    spent = ExpressionWrapper(F('created_at') - F('previous_at'), output_field=DurationField())
+    rows = (
+        OrderStatusEvent.objects.filter(created_at__gte=lower, created_at__lt=upper, previous_at__isnull=False)
+        .exclude(from_status='').values_list('from_status', 'to_status').annotate(spent=spent)
+        .values_list('from_status', 'to_status', 'spent')
+    )
+    durations = {}
+    for from_status, to_status, duration in rows.iterator():
+        durations.setdefault((from_status, to_status), []).append(duration.total_seconds())
+
+    transitions = []
+    for (from_status, to_status), seconds in sorted(durations.items()):
+        seconds.sort()
+        transitions.append({
+            'from_status': from_status,
+            'to_status': to_status,
+            'count': len(seconds),
+            'median_seconds': round(statistics.median(seconds)),
+            'p90_seconds': round(quantile(seconds, 0.9)),
+        })
+    return {'start': start, 'end': end, 'transitions': transitions}
+
+
+def sla_params(params):
+    """(start, end) from ?start=&end=, defaulting to the last 30 days."""
+    end = parse_day(params, 'end') or timezone.localdate()
+    start = parse_day(params, 'start') or end - timedelta(days=DEFAULT_SLA_DAYS - 1)
+    if start > end:
+        raise ValidationError({'start': 'Must not be after end.'})
+    return start, end
@@ -0,0 +1,60 @@
+"""
+Public order tracking.
+
+Order references are stored upper-case (Order.save), so a lookup is an
+exact match on the unique index after upper-casing the input. Items come
+from the checkout snapshots and the status timeline from its events, so a
+brief is three queries with no product reads. Customers refresh the tracking page a lot right after ordering, so
+briefs are cached for a short while and dropped whenever the order is
+saved (orders.signals); writers that bypass save() call
+invalidate_tracking() themselves.
+"""
+from django.core.cache import cache
+
+from .history import with_history_items
+from .models import Order
+from .timeline import timeline, with_timeline
+
+TRACKING_KEY = 'order-tracking:{}'
+TRACKING_TIMEOUT = 60
+
+
+def canonical_order_id(order_id):
+    return (order_id or '').strip().upper()
+
+
+def build_tracking(order_id):
+    """The public brief of an order, or None if there is no such order."""
+    order = with_timeline(with_history_items(
+        Order.objects.filter(order_id=canonical_order_id(order_id))
+        .only('order_id', 'status', 'total_amount', 'created_at', 'shipping_address', 'payment_method')
+    )).first()
+    if order is None:
+        return None
+    return {
+        "order_id": order.order_id,
+        "status": order.status,
+        "total_amount": order.total_amount,
+        "created_at": order.created_at,
+        "shipping_address": order.shipping_address,
+        "items": [
+            {"product_title": item.product_title, "qty": item.quantity, "price": item.price_at_purchase}
+            for item in order.items.all()
+        ],
+        "payment_method": order.payment_method,
+        "timeline": timeline(order),
+    }
+
+
+def get_tracking(order_id):
+    key = TRACKING_KEY.format(canonical_order_id(order_id))
+    brief = cache.get(key)
+    if brief is None:
+        brief = build_tracking(order_id)
+        if brief is not None:
+            cache.set(key, brief, TRACKING_TIMEOUT)
+    return brief
+
+
+def invalidate_tracking(*order_ids):
+    cache.delete_many([TRACKING_KEY.format(canonical_order_id(order_id)) for order_id in order_ids])
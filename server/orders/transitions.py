@@ -0,0 +1,99 @@
+"""
+Order status changes, one order or a whole selection at a time.
+
+A change locks the selected orders in one SELECT ... FOR UPDATE, checks
+each against TRANSITIONS in memory, moves every order that may move with a
+single UPDATE ... WHERE id IN (...), appends their OrderStatusEvent rows
+(orders.timeline) with one bulk INSERT and shifts the rollup status counts (one UPDATE per
+order day). The customer emails are rendered and sent after commit from
+one background thread in Resend batch requests, so a call costs the same
+few queries whether it moves one order or several hundred.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from backend.utils import send_emails_async
+from .models import Order, OrderStatusEvent
+from .rollups import STATUSES, record_status_changes
+from .timeline import latest_event_times
+from .tracking import invalidate_tracking
+
+# Statuses an order may move to from each status (forward only).
+TRANSITIONS = {
+    'pending': {'paid', 'shipped', 'delivered'},
+    'paid': {'shipped', 'delivered'},
+    'shipped': {'delivered'},
+    'delivered': set(),
+}
+MAX_BATCH = 1000
+
+
+def build_status_email(order):
+    html_content = render_to_string(
+        "emails/order_status.html",
+        {
+            "name": order.user.first_name or "Customer",
+            "order_id": order.id,
+            "status": order.status,
+            "year": datetime.now().year,
+        }
+    )
+    email = EmailMultiAlternatives(
+        subject=f"Order Update - MEKARO #{order.id}",
+        body=strip_tags(html_content),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[order.user.email],
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def change_status(order_ids, status, changed_by=None, strict=True):
+    """
+    Move the orders `order_ids` to `status`. With `strict`, only moves
+    allowed by TRANSITIONS are made; otherwise any change is (single-order
+    corrections by an admin). Returns (changed orders, {order_id: reason}
+    for the ones left as they were).
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(of=('self',)).filter(pk__in=order_ids).select_related('user')
+            .only('id', 'order_id', 'status', 'created_at', 'user__first_name', 'user__email')
+            .order_by('pk')
+        )
+        skipped = {pk: 'Order not found.' for pk in set(order_ids) - {order.pk for order in orders}}
+        changes = []
+        for order in orders:
+            if order.status == status:
+                skipped[order.pk] = f'Already {status}.'
+            elif strict and status not in TRANSITIONS[order.status]:
+                skipped[order.pk] = f'Cannot move from {order.status} to {status}.'
+            else:
+                changes.append((order, order.status))
+        if not changes:
+            return [], skipped
+
+        changed = [order for order, _ in changes]
+        Order.objects.filter(pk__in=[order.pk for order in changed]).update(status=status)
+        since = latest_event_times([order.pk for order in changed])
+        OrderStatusEvent.objects.bulk_create([
+            OrderStatusEvent(order=order, from_status=previous, to_status=status, changed_by=changed_by,
+                             previous_at=since.get(order.pk))
+            for order, previous in changes
+        ])
+        for order in changed:
+            order.status = status
+        record_status_changes(changes)
+        # The UPDATE skips post_save, which is what drops cached tracking briefs.
+        transaction.on_commit(lambda: invalidate_tracking(*[order.order_id for order in changed]))
+        transaction.on_commit(lambda: send_emails_async(
+            build_status_email(order) for order in changed if order.user.email
+        ))
+    return changed, skipped
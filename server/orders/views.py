@@ -5,21 +5,31 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 
 from .models import Order, OrderItem
 from products.models import Product
-from .serializers import OrderSerializer
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from .serializers import OrderHistorySerializer, OrderDetailSerializer, AdminOrderSerializer, PriorityOrderSerializer
 from django.conf import settings
-from backend.utils import send_email_async
 from datetime import datetime
 from django.contrib.auth.models import User
-from django.db.models import Sum
 from .permissions import IsAdminUserOnly
-
-from django.db import transaction
+from .services import CheckoutError, place_order, save_shipping_address, send_order_confirmation
+from .quotes import checkout_prices, quote_cart, read_quote
+from .idempotency import idempotent
+from .history import OrderHistoryPagination, with_history_items
+from .listing import AdminOrderPagination, admin_orders, export_lines
+from .rollups import STATUSES, dashboard_totals, parse_day
+from .transitions import MAX_BATCH, change_status
+from .analytics import analytics_params, get_analytics
+from .tracking import get_tracking
+from .timeline import sla_params, sla_report, with_timeline
+from .priority import PriorityQueuePagination, priority_queue, queue_counts
+
+from django.db import IntegrityError
+from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_order(request):
     """
     Handles COD orders directly.
@@ -33,99 +43,37 @@ def create_order(request):
     """
     user = request.user
     items = request.data['items']
-    total_amount = request.data['total_amount']
     shipping = request.data['shipping_address']
     payment_method = request.data.get('payment_method', 'COD')
     is_priority = request.data.get('is_priority', False)
     priority_hours = request.data.get('priority_hours', None)
 
-    # Validate products
-    for item in items:
-        if not Product.objects.filter(id=item['product_id']).exists():
-            return Response({"error": f"Product with ID {item['product_id']} no longer exists. Please clear your cart."}, status=400)
+    # Runs once the order has committed and the stock locks are released.
+    def after_commit(order, lines):
+        save_shipping_address(user, shipping)
+        send_order_confirmation(order, lines, "Order Confirmation")
 
     try:
-        with transaction.atomic():
-            order = Order.objects.create(
-                user=user,
-                total_amount=total_amount,
-                shipping_address=shipping,
-                payment_method=payment_method,
-                is_priority=is_priority,
-                priority_hours=priority_hours
-            )
-
-            # Auto-save address to profile
-            try:
-                profile = user.profile
-                profile.address_line1 = shipping.get('address_line1', profile.address_line1)
-                profile.city = shipping.get('city', profile.city)
-                profile.state = shipping.get('state', profile.state)
-                profile.pincode = shipping.get('pincode', profile.pincode)
-                profile.phone = shipping.get('phone', profile.phone)
-                profile.save()
-            except Exception as e:
-                print(f"Failed to auto-save profile: {e}")
-
-            items_html = "<table width='100%' cellpadding='6' cellspacing='0' style='border-collapse:collapse;'>"
-
-            for item in items:
-                product = Product.objects.select_for_update().get(id=item['product_id'])
-
-                if product.stock < item['qty']:
-                    raise Exception(f"Insufficient stock for {product.title}. Only {product.stock} left.")
-
-                product.stock -= item['qty']
-                product.save()
-
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=item['qty'],
-                    price_at_purchase=product.price
-                )
-
-                items_html += f"""
-                <tr style="border-bottom:1px solid #eee;">
-                    <td>{product.title}</td>
-                    <td align="center">{item['qty']}</td>
-                    <td align="right">₹{product.price}</td>
-                </tr>
-                """
-            
-            items_html += "</table>"
-            
-        # Render HTML email
-        html_content = render_to_string(
-            "emails/order_confirmation.html",
-            {
-                "name": user.first_name or "Customer",
-                "order_id": order.id,
-                "items_html": items_html,
-                "total": total_amount,
-                "address": shipping,
-                "year": datetime.now().year,
-                "payment_method": payment_method
-            }
-        )
-
-        text_content = strip_tags(html_content)
-
-        email = EmailMultiAlternatives(
-            subject=f"Order Confirmation - MEKARO #{order.id}",
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
+        # A quote fixes the prices and total; without one the cart is re-priced.
+        prices, total_amount = checkout_prices(request.data, items)
+        order, lines = place_order(
+            user, items,
+            on_commit=after_commit,
+            prices=prices,
+            total_amount=total_amount,
+            shipping_address=shipping,
+            payment_method=payment_method,
+            is_priority=is_priority,
+            priority_hours=priority_hours
         )
 
-        email.attach_alternative(html_content, "text/html")
-        send_email_async(email)
-
         return Response({
             "success": True,
             "order_id": order.id
         })
-    except Exception as e:
+    except (CheckoutError, ValueError) as e:
+        # Only a rejected cart is the client's error; anything else is a 500,
+        # which also rolls the order back under an Idempotency-Key.
         return Response({"error": str(e)}, status=400)
 
 
@@ -134,7 +82,16 @@ import razorpay
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def initiate_payment(request):
-    amount = float(request.data['amount']) # Amount in INR
+    # The quoted total, or the posted cart priced now; never a client amount.
+    try:
+        if request.data.get('quote'):
+            amount = float(read_quote(request.data['quote'])[1])  # Amount in INR
+        elif request.data.get('items'):
+            amount = float(checkout_prices(request.data, request.data['items'])[1])
+        else:
+            raise CheckoutError("Please review your cart.")
+    except CheckoutError as e:
+        return Response({"error": str(e)}, status=400)
     
     client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
 
@@ -159,6 +116,7 @@ def initiate_payment(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def verify_payment(request):
     try:
         razorpay_order_id = request.data['razorpay_order_id']
@@ -168,7 +126,6 @@ def verify_payment(request):
         # Order Details to Create Order in DB
         user = request.user
         items = request.data['items']
-        total_amount = request.data['total_amount']
         shipping = request.data['shipping_address']
         is_priority = request.data.get('is_priority', False)
         priority_hours = request.data.get('priority_hours', None)
@@ -187,10 +144,22 @@ def verify_payment(request):
         if not check:
              return Response({'error': 'Signature Mismatch'}, status=400)
 
+        # A payment belongs to at most one order (unique index): a retried
+        # verification gets the existing order back without touching stock.
+        existing = Order.objects.filter(razorpay_payment_id=razorpay_payment_id).only('id', 'user_id').first()
+        if existing:
+            if existing.user_id != user.id:
+                return Response({'error': 'Payment already used'}, status=400)
+            return Response({'success': True, 'order_id': existing.id})
+
+        prices, total_amount = checkout_prices(request.data, items)
+
         # Create Order in DB (Same logic as create_order but Status = Paid)
-        with transaction.atomic():
-            order = Order.objects.create(
-                user=user,
+        try:
+            order, lines = place_order(
+                user, items,
+                prices=prices,
+                on_commit=lambda order, lines: send_order_confirmation(order, lines, "Order Confirmed"),
                 total_amount=total_amount,
                 shipping_address=shipping,
                 payment_method='ONLINE',
@@ -200,138 +169,151 @@ def verify_payment(request):
                 is_priority=is_priority,
                 priority_hours=priority_hours
             )
-            
-            # Reduce Stock & Create Items
-            items_html = "<table width='100%' cellpadding='6' cellspacing='0' style='border-collapse:collapse;'>"
-            for item in items:
-                product = Product.objects.select_for_update().get(id=item['product_id'])
-                if product.stock < item['qty']:
-                     raise Exception(f"Insufficient stock for {product.title}")
-                product.stock -= item['qty']
-                product.save()
-                
-                OrderItem.objects.create(
-                    order=order, product=product, quantity=item['qty'], price_at_purchase=product.price
-                )
-                items_html += f"<tr><td>{product.title}</td><td>{item['qty']}</td><td>₹{product.price}</td></tr>"
-            items_html += "</table>"
-            
-            # Send Email
-            html_content = render_to_string(
-                "emails/order_confirmation.html",
-                {
-                    "name": user.first_name,
-                    "order_id": order.id,
-                    "items_html": items_html,
-                    "total": total_amount,
-                    "address": shipping,
-                    "year": datetime.now().year,
-                    "payment_method": "ONLINE"
-                }
-            )
-            text_content = strip_tags(html_content)
-            email = EmailMultiAlternatives(
-                subject=f"Order Confirmed - MEKARO #{order.id}",
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            send_email_async(email)
+        except IntegrityError:
+            # A concurrent verification of the same payment committed first.
+            existing = Order.objects.filter(razorpay_payment_id=razorpay_payment_id, user=user).first()
+            if existing is None:
+                raise
+            return Response({'success': True, 'order_id': existing.id})
 
-            return Response({'success': True, 'order_id': order.id})
+        return Response({'success': True, 'order_id': order.id})
 
     except Exception as e:
         return Response({'error': str(e)}, status=400)
 
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def cart_quote(request):
+    """Current prices, stock and totals for the posted cart, with a quote token checkout accepts."""
+    try:
+        return Response(quote_cart(request.data.get('items') or []))
+    except CheckoutError as e:
+        return Response({"error": str(e)}, status=400)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_order(request, pk):
-    order = Order.objects.get(id=pk, user=request.user)
-    serializer = OrderSerializer(order)
+    order = get_object_or_404(with_timeline(with_history_items(Order.objects.filter(user=request.user))), id=pk)
+    serializer = OrderDetailSerializer(order, context={'request': request})
     return Response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_my_orders(request):
-    user = request.user
-    orders = Order.objects.filter(user=user).order_by('-created_at')
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data)
+    """The user's orders, newest first, a cursor page at a time (`next`, `results`)."""
+    paginator = OrderHistoryPagination()
+    orders = paginator.paginate_queryset(with_history_items(Order.objects.filter(user=request.user)), request)
+    serializer = OrderHistorySerializer(orders, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUserOnly])
 def admin_dashboard_stats(request):
-    total_users = User.objects.count()
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(
-        total=Sum("total_amount")
-    )["total"] or 0
-
-    pending_orders = Order.objects.filter(status="pending").count()
-    delivered_orders = Order.objects.filter(status="delivered").count()
-
+    """Totals from the daily sales rollups; ?start= / ?end= (YYYY-MM-DD) bound the days."""
+    start = parse_day(request.query_params, "start")
+    end = parse_day(request.query_params, "end")
     return Response({
-        "total_users": total_users,
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "pending_orders": pending_orders,
-        "delivered_orders": delivered_orders,
+        "total_users": User.objects.count(),
+        **dashboard_totals(start, end),
+        "start": start,
+        "end": end,
     })
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUserOnly])
+def admin_sales_analytics(request):
+    """
+    Revenue and units by ?period=day|week|month, by category and for the
+    ?top= best-selling products, over ?start= / ?end= (default: last 30 days).
+    """
+    return Response(get_analytics(*analytics_params(request.query_params)))
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUserOnly])
 def admin_all_orders(request):
-    orders = Order.objects.select_related('user').prefetch_related('items__product').all().order_by("-created_at")
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data)
+    """
+    Filtered keyset pages of all orders (see orders.listing for filters), or
+    with ?as=ndjson every matching order streamed one JSON line each.
+    """
+    orders = admin_orders(request.query_params)
+    if request.query_params.get('as') == 'ndjson':
+        response = StreamingHttpResponse(export_lines(orders, AdminOrderSerializer), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="orders.ndjson"'
+        return response
+
+    paginator = AdminOrderPagination()
+    page = paginator.paginate_queryset(orders, request)
+    serializer = AdminOrderSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUserOnly])
+def admin_priority_queue(request):
+    """
+    Keyset pages of open priority orders by deadline, each flagged when
+    breached, with the queue's overdue and per-hour counts.
+    """
+    now = timezone.now()
+    paginator = PriorityQueuePagination()
+    page = paginator.paginate_queryset(priority_queue(), request)
+    serializer = PriorityOrderSerializer(page, many=True, context={'request': request, 'now': now})
+    response = paginator.get_paginated_response(serializer.data)
+    response.data.update({'now': now, 'counts': queue_counts(now)})
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUserOnly])
+def admin_order_sla(request):
+    """Median and p90 time per status transition; ?start= / ?end= (YYYY-MM-DD), default the last 30 days."""
+    return Response(sla_report(*sla_params(request.query_params)))
 
 
 @api_view(["PUT"])
 @permission_classes([IsAuthenticated, IsAdminUserOnly])
 def admin_update_order_status(request, pk):
-    order = Order.objects.get(id=pk)
     status = request.data.get("status")
-
-    if status not in ["pending", "paid", "shipped", "delivered"]:
+    if status not in STATUSES:
         return Response({"error": "Invalid status"}, status=400)
 
-    # Only send email if status actually changes
-    if order.status != status:
-        order.status = status
-        order.save()
+    # Any change is allowed here, so an admin can correct a mistake.
+    changed, skipped = change_status([pk], status, changed_by=request.user, strict=False)
+    if skipped.get(pk) == 'Order not found.':
+        return Response({"error": "Order not found"}, status=404)
+    return Response({"success": True, "new_status": status})
 
-        # Send Email Notification
-        try:
-            subject = f"Order Update - MEKARO #{order.id}"
-            html_content = render_to_string(
-                "emails/order_status.html",
-                {
-                    "name": order.user.first_name or "Customer",
-                    "order_id": order.id,
-                    "status": status,
-                    "year": datetime.now().year,
-                }
-            )
-            text_content = strip_tags(html_content)
 
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[order.user.email],
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.attach_alternative(html_content, "text/html")
-            send_email_async(email)
-        except Exception as e:
-            print(f"Failed to send status update email: {e}")
-
-    return Response({"success": True, "new_status": order.status})
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminUserOnly])
+def admin_bulk_order_status(request):
+    """Move the orders in `ids` to `status`, forward only; reports the orders left unchanged."""
+    status = request.data.get("status")
+    if status not in STATUSES:
+        return Response({"error": "Invalid status"}, status=400)
+    ids = request.data.get("ids")
+    try:
+        if not isinstance(ids, list):
+            raise TypeError
+        ids = sorted({int(pk) for pk in ids})
+    except (TypeError, ValueError):
+        return Response({"error": "ids must be a list of order ids"}, status=400)
+    if not ids or len(ids) > MAX_BATCH:
+        return Response({"error": f"Select between 1 and {MAX_BATCH} orders"}, status=400)
+
+    changed, skipped = change_status(ids, status, changed_by=request.user)
+    return Response({
+        "success": True,
+        "new_status": status,
+        "updated": [order.id for order in changed],
+        "skipped": [{"id": pk, "reason": reason} for pk, reason in sorted(skipped.items())],
+    })
 
 
 from geopy.geocoders import Nominatim
@@ -486,28 +468,7 @@ def calculate_distance(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def track_order(request, order_id):
-    try:
-        # Case-insensitive search
-        order = Order.objects.filter(order_id__iexact=order_id).first()
-        if not order:
-             return Response({"error": "Order ID not found."}, status=404)
-        
-        items_data = []
-        for item in order.items.all():
-            items_data.append({
-                "product_title": item.product.title,
-                "qty": item.quantity,
-                "price": item.price_at_purchase
-            })
-
-        return Response({
-            "order_id": order.order_id,
-            "status": order.status,
-            "total_amount": order.total_amount,
-            "created_at": order.created_at,
-            "shipping_address": order.shipping_address,
-            "items": items_data,
-            "payment_method": order.payment_method
-        })
-    except Exception as e:
-        return Response({"error": str(e)}, status=400)
+    brief = get_tracking(order_id)
+    if brief is None:
+        return Response({"error": "Order ID not found."}, status=404)
+    return Response(brief)
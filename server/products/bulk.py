@@ -0,0 +1,300 @@
+"""
+Streaming catalog import/export in CSV and NDJSON.
+
+Exports walk the table in primary-key chunks (no server-side cursor, so
+they run behind a transaction-mode pooler) and yield one line at a time.
+Imports read the upload line by line, resolve categories from an
+in-memory map and write each batch with two statements: an INSERT ... ON
+CONFLICT updating the products it matches and a plain INSERT of the rest.
+A row updates the product with its SKU, or else the product with its id
+if that product has no SKU yet (so an export of a catalog without SKUs
+round-trips); other rows are inserted. Stock changes of updated products
+are ledger adjustments; new products open their ledger. Apart from the set of keys seen,
+used to report duplicate rows, memory stays flat however large the file is.
+"""
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from backend.cache import bump_version
+from .inventory import LOCK_FIELDS, apply_stock_changes, record_opening_stock
+from .models import Category, Product, StockMovement
+from .search import index_products
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_FIELDS = ['id', 'sku', 'title', 'description', 'price', 'stock', 'category', 'is_innovative_project', 'images']
+# Stock is left out: a re-imported SKU's stock moves through the ledger.
+UPDATE_FIELDS = ['title', 'description', 'price', 'category', 'is_innovative_project', 'images', 'updated_at']
+BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+MAX_STOCK = 2 ** 31 - 1
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def _chunked(queryset, size):
+    """Iterate a pk-ordered queryset one keyset chunk (query) at a time."""
+    chunk = list(queryset[:size])
+    while chunk:
+        yield from chunk
+        chunk = list(queryset.filter(pk__gt=chunk[-1].pk)[:size])
+
+
+def export_lines(file_format, queryset=None):
+    """Yield the catalog as CSV or NDJSON lines."""
+    queryset = (queryset if queryset is not None else Product.objects.all()).select_related('category').only(
+        'id', 'sku', 'title', 'description', 'price', 'stock', 'is_innovative_project', 'images', 'category__slug',
+    ).order_by('pk')
+
+    writer = csv.writer(_Echo()) if file_format == 'csv' else None
+    if writer:
+        yield writer.writerow(EXPORT_FIELDS)
+    for product in _chunked(queryset, EXPORT_CHUNK_SIZE):
+        row = {
+            'id': product.pk,
+            'sku': product.sku or '',
+            'title': product.title,
+            'description': product.description,
+            'price': str(product.price),
+            'stock': product.stock,
+            'category': product.category.slug,
+            'is_innovative_project': product.is_innovative_project,
+            'images': product.images or [],
+        }
+        if writer:
+            row['images'] = '|'.join(row['images'])
+            row['is_innovative_project'] = 'true' if row['is_innovative_project'] else 'false'
+            yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+        else:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def read_rows(stream, file_format):
+    """Yield dict rows from a binary stream (upload or file), one line at a time."""
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if file_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield ImportRowError(f'Invalid JSON: {exc.msg}')
+
+
+class CategoryResolver:
+    """Slug/name -> Category map, loaded once per import."""
+    def __init__(self):
+        self.lookup = {}
+        for category in Category.objects.only('id', 'name', 'slug'):
+            self.lookup[category.slug.lower()] = category
+            self.lookup[category.name.lower()] = category
+
+    def __call__(self, value):
+        category = self.lookup.get(str(value or '').strip().lower())
+        if category is None:
+            raise ImportRowError(f'Unknown category "{value}"')
+        return category
+
+
+def _max_length(name):
+    return Product._meta.get_field(name).max_length
+
+
+def _parse_price(value):
+    """A non-negative price that fits Product.price, rounded to its decimal places."""
+    field = Product._meta.get_field('price')
+    try:
+        price = Decimal(str(value).strip())
+        if not price.is_finite() or price < 0:
+            raise InvalidOperation
+        price = price.quantize(Decimal(1).scaleb(-field.decimal_places))
+    except (InvalidOperation, TypeError):
+        raise ImportRowError(f'Invalid price "{value}"')
+    if price >= Decimal(10) ** (field.max_digits - field.decimal_places):
+        raise ImportRowError(f'Price "{value}" is too large')
+    return price
+
+
+def build_product(row, resolve_category):
+    """Validate one import row into an unsaved Product (pk set from an id column)."""
+    if isinstance(row, Exception):
+        raise row
+    title = str(row.get('title') or '').strip()
+    if not title:
+        raise ImportRowError('title is required')
+    if len(title) > _max_length('title'):
+        raise ImportRowError(f'title is longer than {_max_length("title")} characters')
+    sku = str(row.get('sku') or '').strip() or None
+    if sku and len(sku) > _max_length('sku'):
+        raise ImportRowError(f'sku is longer than {_max_length("sku")} characters')
+    try:
+        pk = int(str(row.get('id') or '').strip() or 0) or None
+    except ValueError:
+        raise ImportRowError(f'Invalid id "{row.get("id")}"')
+    if pk is not None and pk < 0:
+        raise ImportRowError(f'Invalid id "{row.get("id")}"')
+    price = _parse_price(row.get('price'))
+    try:
+        stock = int(row.get('stock') or 0)
+    except (TypeError, ValueError):
+        raise ImportRowError(f'Invalid stock "{row.get("stock")}"')
+    if not 0 <= stock <= MAX_STOCK:
+        raise ImportRowError(f'Invalid stock "{row.get("stock")}"')
+
+    images = row.get('images') or []
+    if isinstance(images, str):
+        images = [url for url in images.split('|') if url]
+    innovative = row.get('is_innovative_project')
+    if not isinstance(innovative, bool):
+        innovative = str(innovative or '').strip().lower() in TRUE_VALUES
+
+    return Product(
+        pk=pk,
+        sku=sku,
+        title=title,
+        description=row.get('description') or '',
+        price=price,
+        stock=stock,
+        category=resolve_category(row.get('category')),
+        is_innovative_project=innovative,
+        images=images,
+    )
+
+
+def _lock_existing(batch):
+    """Lock the products a batch's SKUs and ids refer to (ordered by id)."""
+    return list(
+        Product.objects.select_for_update()
+        .filter(Q(sku__in=[product.sku for _, product in batch if product.sku])
+                | Q(pk__in=[product.pk for _, product in batch if product.pk]))
+        .only(*LOCK_FIELDS, 'sku').order_by('pk')
+    )
+
+
+def _write_batch(batch):
+    """
+    Write one batch of (row number, product). Returns (created, updated,
+    [(row number, error)]) with the rows left unwritten.
+    """
+    ids = [product.pk for _, product in batch]
+    try:
+        return _upsert_batch(batch)
+    except IntegrityError:
+        # Another import created one of the new SKUs after the lookup. Matched
+        # again, that row is an update, and its stock moves through the ledger.
+        for (_, product), pk in zip(batch, ids):
+            product.pk = pk
+        return _upsert_batch(batch)
+
+
+def _upsert_batch(batch):
+    errors = []
+    with transaction.atomic():
+        # Matched products are locked so the stock deltas below are exact.
+        current = _lock_existing(batch)
+        by_sku = {product.sku: product for product in current if product.sku}
+        by_id = {product.pk: product for product in current}
+
+        matched, created = {}, []
+        for line, product in batch:
+            target = by_sku.get(product.sku) if product.sku else None
+            if target is None and product.pk:
+                target = by_id.get(product.pk)
+                if target is None and not product.sku:
+                    errors.append((line, f'Unknown product id {product.pk}; leave id empty to create'))
+                    continue
+                if target is not None and target.sku:
+                    # The id belongs to a product with another SKU, so this is a new one.
+                    target = None
+            if target is None:
+                product.pk = None
+                created.append(product)
+            elif target.pk in matched:
+                errors.append((line, f'Matches the same product as row {matched[target.pk][0]}'))
+            else:
+                product.pk = target.pk
+                matched[target.pk] = (line, product, target)
+
+        updated = [product for _, product, _ in matched.values()]
+        # One INSERT ... ON CONFLICT DO UPDATE for the matched rows; bulk_update's
+        # CASE WHEN per column grows quadratically with the batch size.
+        Product.objects.bulk_create(
+            updated, update_conflicts=True, unique_fields=['id'], update_fields=UPDATE_FIELDS + ['sku'],
+        )
+        # A plain INSERT: only products that did not exist start a ledger.
+        Product.objects.bulk_create(created)
+        record_opening_stock(created)
+        locked = [target for _, _, target in matched.values()]
+        apply_stock_changes(
+            {target.pk: product.stock - target.stock for _, product, target in matched.values()},
+            StockMovement.ADJUSTMENT, 'import', products=locked,
+        )
+        # bulk writes skip post_save, so keep the search index in step here.
+        index_products(updated + created)
+    return len(created), len(updated), errors
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    """
+    Upsert products from an iterable of row dicts. Invalid rows, and rows
+    repeating the SKU or id of an earlier row, are skipped and reported by
+    row number (the first data row is 1).
+    """
+    resolve_category = CategoryResolver()
+    stats = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    batch = []
+    seen = {}
+
+    def fail(line, error):
+        stats['failed'] += 1
+        if len(stats['errors']) < MAX_REPORTED_ERRORS:
+            stats['errors'].append({'row': line, 'error': error})
+
+    def flush():
+        created, updated, errors = _write_batch(batch)
+        stats['created'] += created
+        stats['updated'] += updated
+        for line, error in errors:
+            fail(line, error)
+        batch.clear()
+
+    for line, row in enumerate(rows, start=1):
+        try:
+            product = build_product(row, resolve_category)
+        except ImportRowError as exc:
+            fail(line, str(exc))
+            continue
+        keys = [key for key in (('sku', product.sku), ('id', product.pk)) if key[1]]
+        first = next((seen[key] for key in keys if key in seen), None)
+        if first is not None:
+            fail(line, f'Duplicate of row {first}')
+            continue
+        seen.update((key, line) for key in keys)
+        batch.append((line, product))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    stats['errors'].sort(key=lambda error: error['row'])
+    bump_version(Product)
+    return stats
@@ -0,0 +1,44 @@
+"""
+Product counts per category for the category grid.
+
+Counts come from one grouped aggregate over Product, cached under the
+Product version counter (see backend.cache) so any product write makes the
+next read recompute them. Nothing is stored per category, so queryset
+updates and bulk imports cannot leave counters drifting.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+from backend.cache import get_versions
+from .models import Product
+
+COUNTS_KEY = 'category-counts:{}'
+COUNTS_TIMEOUT = 60 * 60 * 24
+EMPTY = {'product_count': 0, 'in_stock_count': 0}
+
+
+def compute_category_counts():
+    """{category_id: {'product_count', 'in_stock_count'}} in one grouped query."""
+    rows = (
+        Product.objects.order_by()
+        .values('category_id')
+        .annotate(product_count=Count('id'), in_stock_count=Count('id', filter=Q(stock__gt=0)))
+    )
+    return {
+        row['category_id']: {'product_count': row['product_count'], 'in_stock_count': row['in_stock_count']}
+        for row in rows
+    }
+
+
+def get_category_counts():
+    key = COUNTS_KEY.format(get_versions([Product])[0])
+    counts = cache.get(key)
+    if counts is None:
+        counts = refresh_category_counts(key)
+    return counts
+
+
+def refresh_category_counts(key=None):
+    """Recompute the counts and overwrite the cached copy."""
+    counts = compute_category_counts()
+    cache.set(key or COUNTS_KEY.format(get_versions([Product])[0]), counts, COUNTS_TIMEOUT)
+    return counts
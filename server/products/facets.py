@@ -0,0 +1,80 @@
+"""
+Catalog facet counts for the storefront sidebar.
+
+All facets come from one grouped query: rows are grouped by category and
+each row carries conditional counts for stock and every price bucket, so
+per-bucket totals are just sums over the category rows. Each facet is
+counted under every active facet filter except its own (the category
+counts honour the price and stock filters, and so on), so a facet shows
+what picking one of its values would return.
+"""
+from django.db.models import Count, Q
+
+FACETS = ('category', 'price', 'stock')
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BUCKETS = [
+    ('under-500', 0, 500),
+    ('500-1000', 500, 1000),
+    ('1000-2500', 1000, 2500),
+    ('2500-5000', 2500, 5000),
+    ('5000-plus', 5000, None),
+]
+
+
+def price_bucket_q(low, high):
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def count(condition=Q()):
+    return Count('id', filter=condition) if condition else Count('id')
+
+
+def catalog_facets(queryset, conditions=None):
+    """
+    Counts per category, per price bucket and in/out of stock for
+    `queryset`, each under the `conditions` ({facet: Q}) of the other facets.
+    """
+    conditions = conditions or {}
+
+    def others(facet):
+        combined = Q()
+        for name in FACETS:
+            if name != facet and conditions.get(name):
+                combined &= conditions[name]
+        return combined
+
+    rows = list(
+        queryset.values('category_id', 'category__name', 'category__slug')
+        .annotate(
+            total=count(others('category')),
+            listed=count(others('stock')),
+            in_stock=count(others('stock') & Q(stock__gt=0)),
+            **{
+                f'bucket_{index}': count(others('price') & price_bucket_q(low, high))
+                for index, (_, low, high) in enumerate(PRICE_BUCKETS)
+            },
+        )
+        .order_by('category__name')
+    )
+
+    in_stock = sum(row['in_stock'] for row in rows)
+    return {
+        'categories': [
+            {'id': row['category_id'], 'name': row['category__name'],
+             'slug': row['category__slug'], 'count': row['total']}
+            for row in rows if row['total']
+        ],
+        'price': [
+            {'bucket': label, 'min': low, 'max': high,
+             'count': sum(row[f'bucket_{index}'] for row in rows)}
+            for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'stock': {
+            'in_stock': in_stock,
+            'out_of_stock': sum(row['listed'] for row in rows) - in_stock,
+        },
+    }
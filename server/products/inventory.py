@@ -0,0 +1,199 @@
+"""
+Stock ledger and low-stock alerts.
+
+Product.stock stays the current stock, so reads stay a single column read.
+Every change to it goes through this module, which applies it as a
+relative UPDATE (stock = stock + delta, guarded so stock never goes
+negative) and appends a StockMovement row in the same transaction; per
+product the ledger sums to Product.stock. A whole cart is one UPDATE, a
+CASE over its lines, so a checkout writes the same few statements however
+many products it takes. The UPDATE returns the new stock, so alerts are
+decided from the row as updated, with or without a prior lock.
+
+When a change takes a product to or below its low_stock_threshold, a
+LowStockAlert is queued (at most one pending per product, enforced by a
+partial unique constraint), and `send_low_stock_alerts` mails everything
+pending as one digest, however many orders drained the stock.
+
+`compact_ledger` folds movements older than a cutoff into one snapshot row
+per product, so the ledger grows with recent activity only.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from backend.cache import bump_version
+from backend.utils import send_email_async
+from .models import LowStockAlert, Product, StockMovement
+
+LOCK_FIELDS = ('id', 'stock')
+BATCH_SIZE = 1000
+
+
+class StockError(ValueError):
+    pass
+
+
+def lock_stock(product_ids):
+    """Lock products (ordered by id, so overlapping callers cannot deadlock)."""
+    return list(
+        Product.objects.select_for_update().filter(pk__in=product_ids).only(*LOCK_FIELDS).order_by('pk')
+    )
+
+
+def _update_stock(changes):
+    """
+    Add each delta to its product's stock unless that would go negative.
+    Returns {product_id: (new_stock, low_stock_threshold)} for the rows updated.
+    """
+    # Raw SQL: compiling an ORM Case/When per line cost more than the
+    # statement itself for large carts, and RETURNING hands back the new
+    # stock without a second read.
+    quote = connection.ops.quote_name
+    column = lambda name: quote(Product._meta.get_field(name).column)
+    pk, stock = column('id'), column('stock')
+    case = f"CASE {pk} {' '.join(['WHEN %s THEN %s'] * len(changes))} END"
+    ids = ', '.join(['%s'] * len(changes))
+    sql = (
+        f"UPDATE {quote(Product._meta.db_table)} SET {stock} = {stock} + {case}, {column('updated_at')} = %s "
+        f"WHERE {pk} IN ({ids}) AND {stock} + {case} >= 0 "
+        f"RETURNING {pk}, {stock}, {column('low_stock_threshold')}"
+    )
+    pairs = [value for line in changes.items() for value in line]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, pairs + [now] + list(changes) + pairs)
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+
+def apply_stock_changes(changes, reason, reference='', products=()):
+    """
+    Apply {product_id: delta} and record the movements, atomically. Raises
+    StockError, changing nothing, if a product is missing or would go
+    negative. The guarded UPDATE is what keeps stock from going negative,
+    so callers need no row lock unless the deltas themselves depend on the
+    current stock. `products` instances are given their new stock. Returns
+    {product_id: new_stock}.
+    """
+    changes = {product_id: delta for product_id, delta in changes.items() if delta}
+    if not changes:
+        return {}
+    with transaction.atomic():
+        updated = _update_stock(changes)
+        if len(updated) != len(changes):
+            raise StockError("Not enough stock for this change.")
+
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=product_id, change=delta, reason=reason, reference=reference)
+            for product_id, delta in changes.items()
+        ])
+        # Crossed the threshold with this change; a product that already has
+        # a pending alert keeps that one.
+        LowStockAlert.objects.bulk_create([
+            LowStockAlert(product_id=product_id, stock=stock)
+            for product_id, (stock, threshold) in updated.items()
+            if threshold and stock <= threshold < stock - changes[product_id]
+        ], ignore_conflicts=True)
+        # A raw update skips post_save, so invalidate cached catalog reads here.
+        bump_version(Product)
+    for product in products:
+        if product.pk in updated:
+            product.stock = updated[product.pk][0]
+    return {product_id: stock for product_id, (stock, _) in updated.items()}
+
+
+def move_stock(product_id, change, reason, reference=''):
+    """Apply one signed movement; returns the product's new stock."""
+    return apply_stock_changes({product_id: change}, reason, reference)[product_id]
+
+
+def set_stock(product_id, stock, reason=StockMovement.ADJUSTMENT, reference=''):
+    """Record the movement that brings a product's stock to `stock`; returns it."""
+    if stock < 0:
+        raise StockError("Stock cannot be negative.")
+    with transaction.atomic():
+        # Locked so the delta is computed from the stock it is applied to.
+        locked = lock_stock([product_id])
+        if not locked:
+            raise StockError("Product does not exist.")
+        apply_stock_changes({product_id: stock - locked[0].stock}, reason, reference)
+    return stock
+
+
+def record_opening_stock(products):
+    """Start the ledger of newly created products at their stock."""
+    StockMovement.objects.bulk_create([
+        StockMovement(product_id=product.pk, change=product.stock, reason=StockMovement.SNAPSHOT,
+                       reference='opening')
+        for product in products if product.stock
+    ], batch_size=BATCH_SIZE)
+
+
+def compact_ledger(before, batch_size=BATCH_SIZE):
+    """
+    Replace each product's movements older than `before` with one snapshot
+    movement holding their sum. Returns the number of movements folded.
+    """
+    old = (
+        StockMovement.objects.filter(created_at__lt=before).values('product_id')
+        .annotate(total=Sum('change'), count=Count('id'), last=Max('created_at'))
+        .filter(count__gt=1).order_by('product_id')
+    )
+    folded, last_product = 0, 0
+    while True:
+        groups = list(old.filter(product_id__gt=last_product)[:batch_size])
+        if not groups:
+            return folded
+        product_ids = [group['product_id'] for group in groups]
+        with transaction.atomic():
+            StockMovement.objects.filter(created_at__lt=before, product_id__in=product_ids).delete()
+            StockMovement.objects.bulk_create([
+                StockMovement(product_id=group['product_id'], change=group['total'], reason=StockMovement.SNAPSHOT,
+                              reference='compacted', created_at=group['last'])
+                for group in groups
+            ])
+        folded += sum(group['count'] for group in groups)
+        last_product = product_ids[-1]
+
+
+def ledger_drift():
+    """Products whose stock differs from the sum of their movements."""
+    return (
+        Product.objects.annotate(ledger=Coalesce(Sum('stock_movements__change'), 0))
+        .exclude(stock=F('ledger')).only('id', 'title', 'stock')
+    )
+
+
+def alert_recipients():
+    return list(settings.LOW_STOCK_ALERT_EMAILS or (
+        User.objects.filter(is_staff=True, is_active=True).exclude(email='').values_list('email', flat=True)
+    ))
+
+
+def send_low_stock_alerts():
+    """Mail every pending alert as one digest and mark them sent; returns how many."""
+    pending = list(
+        LowStockAlert.objects.filter(sent_at=None).select_related('product')
+        .only('id', 'stock', 'product__id', 'product__title', 'product__stock', 'product__low_stock_threshold')
+        .order_by('product__stock', 'product_id')
+    )
+    recipients = alert_recipients()
+    if not pending or not recipients:
+        return 0
+    lines = [
+        f"{alert.product.title} (#{alert.product.pk}): {alert.product.stock} left, "
+        f"threshold {alert.product.low_stock_threshold}"
+        for alert in pending
+    ]
+    send_email_async(EmailMultiAlternatives(
+        subject=f"Low stock: {len(pending)} product{'s' if len(pending) != 1 else ''}",
+        body='\n'.join(lines),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=recipients,
+    ))
+    LowStockAlert.objects.filter(pk__in=[alert.pk for alert in pending]).update(sent_at=timezone.now())
+    return len(pending)
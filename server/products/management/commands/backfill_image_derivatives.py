@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from backend import images
+
+
+class Command(BaseCommand):
+    help = 'Renders missing resized derivatives for every registered image field'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--force', action='store_true', help='Re-render images that already have derivatives')
+
+    def handle(self, *args, **options):
+        config = images.get_config()
+        workers = options['workers'] or config['WORKERS']
+        render_args = (config['WIDTHS'], config['FORMATS'], config['QUALITY'])
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for model, field_name, variants_field in images.REGISTERED:
+                queryset = model._default_manager.exclude(**{field_name: ''}).exclude(
+                    **{f'{field_name}__isnull': True}).order_by('pk')
+                done = failed = 0
+                pending = []
+
+                def drain():
+                    nonlocal done, failed
+                    for instance, future in pending:
+                        try:
+                            images.store_variants(instance, field_name, variants_field, future.result())
+                            done += 1
+                        except Exception as e:
+                            failed += 1
+                            self.stderr.write(f'{model._meta.label} {instance.pk}: {e}')
+                    pending.clear()
+
+                for instance in queryset.iterator(chunk_size=200):
+                    if not options['force'] and not images.needs_derivatives(instance, field_name, variants_field):
+                        continue
+                    try:
+                        data = images.read_original(instance, field_name)
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{model._meta.label} {instance.pk}: {e}')
+                        continue
+                    pending.append((instance, executor.submit(images.render_variants, data, *render_args)))
+                    # Bounded window: keeps a few renders per worker in flight.
+                    if len(pending) >= workers * 4:
+                        drain()
+                drain()
+                self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: {done} rendered, {failed} failed'))
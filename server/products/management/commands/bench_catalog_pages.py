@@ -0,0 +1,57 @@
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from backend.bench import benchmark_database, summary, time_calls
+from products.models import Category, Product
+from products.views import ProductCursorPagination
+
+
+class Command(BaseCommand):
+    help = 'Compares page-number and cursor pagination latency at page 1 and a deep page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--page', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        page_size = ProductCursorPagination.page_size
+        deep_page = min(options['page'], options['products'] // page_size)
+
+        with benchmark_database():
+            category = Category.objects.create(name='Sensors', slug='sensors')
+            batch = []
+            for i in range(options['products']):
+                batch.append(Product(
+                    title=f'Part {i}', description='', price=rng.randint(20, 5000), stock=10, category=category
+                ))
+                if len(batch) == 5000:
+                    Product.objects.bulk_create(batch)
+                    batch = []
+            Product.objects.bulk_create(batch)
+
+            client = APIClient()
+            for ordering in ['-created_at', 'price']:
+                # Cursor pointing at the last row before `deep_page`.
+                paginator = ProductCursorPagination()
+                paginator.field = ordering.lstrip('-')
+                prefix = '-' if ordering.startswith('-') else ''
+                anchor = Product.objects.order_by(f'{prefix}{paginator.field}', f'{prefix}pk')[
+                    (deep_page - 1) * page_size - 1
+                ]
+                deep_cursor = paginator.encode_cursor(anchor)
+
+                cases = [
+                    ('page=1', {'ordering': ordering, 'page': 1}),
+                    (f'page={deep_page}', {'ordering': ordering, 'page': deep_page}),
+                    ('cursor page 1', {'ordering': ordering, 'pagination': 'cursor'}),
+                    (f'cursor page {deep_page}', {'ordering': ordering, 'cursor': deep_cursor}),
+                ]
+                for mode, params in cases:
+                    label = f'{ordering:<12} {mode:<18}'
+                    samples = time_calls(
+                        lambda p: client.get('/api/products/', p), [(params,)] * options['requests']
+                    )
+                    self.stdout.write(summary(label, samples))
@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from backend.bench import benchmark_database
+from products.models import Category, Product, ProductImage
+from products.serializers import ProductListSerializer, ProductSerializer
+from products.views import ProductViewSet
+
+
+class Command(BaseCommand):
+    help = 'Compares full and compact product list payloads on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--pages', type=int, default=100)
+        parser.add_argument('--page-size', type=int, default=18)
+
+    def handle(self, *args, **options):
+        rng = random.Random(3)
+        page_size = options['page_size']
+        words = ['sensor', 'module', 'arduino', 'compatible', 'voltage', 'output', 'digital', 'analog',
+                 'board', 'precision', 'range', 'interface', 'supply', 'current', 'pins', 'mounting']
+
+        with benchmark_database():
+            categories = [Category.objects.create(name=f'Category {i}', slug=f'category-{i}') for i in range(12)]
+            products = Product.objects.bulk_create([
+                Product(
+                    title=f'{rng.choice(words).title()} {rng.choice(words).title()} {i}',
+                    description=' '.join(rng.choices(words, k=120)),
+                    price=rng.randint(20, 9000),
+                    stock=rng.randint(0, 100),
+                    images=[f'https://cdn.example.com/legacy/{i}-{n}.jpg' for n in range(3)],
+                    category=rng.choice(categories),
+                )
+                for i in range(options['products'])
+            ], batch_size=1000)
+            ProductImage.objects.bulk_create([
+                ProductImage(product=product, image=f'products/{product.pk}-{n}.jpg')
+                for product in products for n in range(4)
+            ], batch_size=1000)
+
+            factory = APIRequestFactory()
+            renderer = JSONRenderer()
+            last_page = options['products'] // page_size
+            pages = [rng.randint(1, last_page) for _ in range(options['pages'])]
+
+            def full_page(page):
+                # The list representation before the compact serializer.
+                request = factory.get('/api/products/')
+                queryset = Product.objects.select_related('category').prefetch_related(
+                    'product_images').order_by('-created_at')[(page - 1) * page_size:page * page_size]
+                data = ProductSerializer(queryset, many=True, context={'request': request}).data
+                return renderer.render(data)
+
+            def compact_page(page):
+                view = ProductViewSet(action='list', request=Request(factory.get('/api/products/')))
+                queryset = view.get_queryset().order_by('-created_at')[(page - 1) * page_size:page * page_size]
+                data = ProductListSerializer(queryset, many=True, context={'request': view.request}).data
+                return renderer.render(data)
+
+            for label, render_page in [('full ProductSerializer', full_page), ('compact list', compact_page)]:
+                total_bytes = 0
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for page in pages:
+                        total_bytes += len(render_page(page))
+                    elapsed = (time.perf_counter() - start) * 1000 / len(pages)
+                self.stdout.write(
+                    f"{label:<24} {total_bytes / len(pages) / 1024:8.1f} KiB/page "
+                    f"{elapsed:7.2f} ms/page {len(queries) / len(pages):4.1f} queries/page"
+                )
@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from backend.bench import benchmark_database, summary, time_calls
+from products.models import Category, Product, SearchTerm
+from products.search import reindex_products, search_products
+
+WORDS = [
+    'arduino', 'uno', 'nano', 'mega', 'esp32', 'esp8266', 'raspberry', 'pi', 'sensor', 'module',
+    'ultrasonic', 'servo', 'stepper', 'motor', 'driver', 'relay', 'battery', 'lithium', 'charger',
+    'propeller', 'drone', 'frame', 'brushless', 'controller', 'display', 'oled', 'lcd', 'bluetooth',
+    'wifi', 'gps', 'temperature', 'humidity', 'infrared', 'camera', 'filament', 'nozzle', 'extruder',
+    'gear', 'bearing', 'wheel', 'chassis', 'kit', 'breadboard', 'jumper', 'wire', 'resistor',
+    'capacitor', 'transistor', 'diode', 'led', 'buzzer', 'switch', 'pump', 'solenoid', 'regulator',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks ranked product search on a throw-away database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Long tail of made-up part names on top of the common vocabulary.
+        vocabulary = WORDS + [
+            ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+            for _ in range(2000)
+        ]
+
+        with benchmark_database():
+            categories = [
+                Category.objects.create(name=name, slug=f'cat-{i}')
+                for i, name in enumerate(['Development Boards', 'Drone Parts', 'Sensors', 'Motors Drivers Pumps',
+                                          'IoT and Wireless', 'Mechanical Parts', '3D Printers and Parts'])
+            ]
+
+            start = time.perf_counter()
+            batch = []
+            for i in range(options['products']):
+                batch.append(Product(
+                    title=' '.join(rng.choices(vocabulary, k=rng.randint(2, 6))),
+                    description=' '.join(rng.choices(vocabulary, k=rng.randint(15, 40))),
+                    price=rng.randint(20, 20000),
+                    stock=rng.randint(0, 200),
+                    category=rng.choice(categories),
+                ))
+                if len(batch) == 5000:
+                    Product.objects.bulk_create(batch)
+                    batch = []
+            Product.objects.bulk_create(batch)
+            reindex_products(Product.objects.all())
+            self.stdout.write(
+                f"Indexed {Product.objects.count()} products / {SearchTerm.objects.count()} terms "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            queries = []
+            for _ in range(options['queries']):
+                words = rng.sample(WORDS, rng.randint(1, 2)) if rng.random() < 0.7 else [rng.choice(vocabulary)]
+                if rng.random() < 0.4:
+                    # Simulate search-as-you-type on the last word.
+                    words[-1] = words[-1][:max(2, len(words[-1]) // 2)]
+                queries.append((' '.join(words),))
+
+            base = Product.objects.select_related('category')
+
+            def run_page(query):
+                # What ProductViewSet does for page 1: a count plus an 18-row slice.
+                results = search_products(base, query)
+                results.count()
+                list(results[:18])
+
+            self.stdout.write(summary('search page (count + 18 rows)', time_calls(run_page, queries)))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from products.inventory import compact_ledger, ledger_drift
+
+
+class Command(BaseCommand):
+    help = 'Folds old stock movements into one snapshot per product and reports ledger drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Keep movements of the last N days as they are')
+
+    def handle(self, *args, **options):
+        folded = compact_ledger(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Compacted {folded} stock movements'))
+        for product in ledger_drift():
+            self.stdout.write(self.style.WARNING(
+                f'Product {product.pk} ({product.title}): stock {product.stock}, ledger {product.ledger}'
+            ))
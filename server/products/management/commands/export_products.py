@@ -0,0 +1,21 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from products.bulk import FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Streams the product catalog out as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for line in export_lines(options['format']):
+                out.write(line)
+        finally:
+            if options['output']:
+                out.close()
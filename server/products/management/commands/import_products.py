@@ -0,0 +1,31 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from products.bulk import FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Upserts products (matched by SKU, else id) from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError('Pass --format csv or --format ndjson')
+
+        start = time.perf_counter()
+        with open(path, 'rb') as stream:
+            stats = import_rows(read_rows(stream, file_format), batch_size=options['batch_size'])
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats['created']}, updated {stats['updated']}, failed {stats['failed']} "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
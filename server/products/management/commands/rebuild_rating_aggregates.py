@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored review aggregates of every product'
+
+    def handle(self, *args, **options):
+        rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS('Rating aggregates rebuilt'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import reindex_products
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the product search index from scratch'
+
+    def handle(self, *args, **options):
+        total = reindex_products(Product.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} products'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.counts import refresh_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the cached product counts of every category'
+
+    def handle(self, *args, **options):
+        counts = refresh_category_counts()
+        self.stdout.write(self.style.SUCCESS(f'Counted products in {len(counts)} categories'))
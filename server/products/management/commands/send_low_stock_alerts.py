@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.inventory import send_low_stock_alerts
+
+
+class Command(BaseCommand):
+    help = 'Mails pending low-stock alerts as one digest'
+
+    def handle(self, *args, **options):
+        sent = send_low_stock_alerts()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} low-stock alerts'))
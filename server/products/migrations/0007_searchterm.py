@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:11
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Term weighting as products.search had it when this migration was written;
+# rebuild_search_index rebuilds the index under the current rules.
+STOP_WORDS = {'a', 'an', 'and', 'the', 'for', 'with', 'of', 'to', 'in', 'on', 'is', 'it', 'by', 'or'}
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [token[:32] for token in TOKEN_RE.findall(text.casefold()) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def product_terms(title, description, category_name):
+    weights = {}
+    for tokens, weight, prefix_weight in ((tokenize(title), 10, 5), (tokenize(category_name), 4, 2)):
+        for token in set(tokens):
+            weights[token] = weights.get(token, 0) + weight
+            for end in range(2, len(token)):
+                weights[token[:end]] = weights.get(token[:end], 0) + prefix_weight
+    repeats = {}
+    for token in tokenize(description):
+        repeats[token] = repeats.get(token, 0) + 1
+    for token, count in repeats.items():
+        weights[token] = weights.get(token, 0) + min(count, 3)
+    return weights
+
+
+def build_search_index(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    SearchTerm = apps.get_model('products', 'SearchTerm')
+    rows = []
+    for product in Product.objects.select_related('category').iterator(chunk_size=500):
+        terms = product_terms(product.title, product.description, product.category.name)
+        rows.extend(
+            SearchTerm(term=term, product_id=product.pk, weight=weight)
+            for term, weight in terms.items()
+        )
+        if len(rows) >= 5000:
+            SearchTerm.objects.bulk_create(rows)
+            rows = []
+    SearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_youtubevideo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'product'), name='unique_search_term_per_product')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:21
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+STARS = range(1, 6)
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    # Ratings outside 1-5 (legacy rows) are left out of the aggregates.
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('products', 'Review')
+    rows = Review.objects.filter(rating__in=STARS).values('product_id').annotate(
+        total=Sum('rating'),
+        count=Count('id'),
+        **{f'star_{star}': Count('id', filter=Q(rating=star)) for star in STARS},
+    )
+    fields = ['rating_sum', 'review_count', 'average_rating'] + [f'rating_count_{star}' for star in STARS]
+    Product.objects.bulk_update([
+        Product(
+            pk=row['product_id'], rating_sum=row['total'], review_count=row['count'],
+            average_rating=row['total'] / row['count'],
+            **{f'rating_count_{star}': row[f'star_{star}'] for star in STARS},
+        )
+        for row in rows.order_by('product_id')
+    ], fields, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
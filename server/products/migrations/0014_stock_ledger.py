@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    # Each existing product's ledger opens with one snapshot of its stock.
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    StockMovement.objects.bulk_create([
+        StockMovement(product_id=product_id, change=stock, reason='snapshot', reference='opening')
+        for product_id, stock in Product.objects.exclude(stock=0).values_list('id', 'stock').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('sent_at', None)), fields=('product',), name='low_stock_alert_pending')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change', models.IntegerField()),
+                ('reason', models.CharField(choices=[('sale', 'Sale'), ('restock', 'Restock'), ('adjustment', 'Manual adjustment'), ('return', 'Return'), ('snapshot', 'Snapshot of compacted movements')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'created_at', 'id'], name='stock_movement_keyset'), models.Index(fields=['created_at'], name='stock_movement_created')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
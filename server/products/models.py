@@ -1,34 +1,119 @@
 from django.db import models
+from django.utils import timezone
 
 class Category(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     image = models.ImageField(upload_to='categories/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
 class Product(models.Model):
+    # Stable external key used by bulk import/export upserts.
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     images = models.JSONField(default=list)  
+    # Current stock; every change goes through products.inventory, which
+    # records it in StockMovement.
     stock = models.IntegerField(default=0)
+    # Stock at or below this queues a low-stock alert; 0 disables alerts.
+    low_stock_threshold = models.PositiveIntegerField(default=0)
     is_innovative_project = models.BooleanField(default=False)
 
 
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
 
+    # Review aggregates, maintained by products/ratings.py
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_count_1 = models.PositiveIntegerField(default=0)
+    rating_count_2 = models.PositiveIntegerField(default=0)
+    rating_count_3 = models.PositiveIntegerField(default=0)
+    rating_count_4 = models.PositiveIntegerField(default=0)
+    rating_count_5 = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Keyset pagination walks (ordering field, id), optionally within a category.
+        indexes = [
+            models.Index(fields=['price', 'id'], name='product_price_keyset'),
+            models.Index(fields=['created_at', 'id'], name='product_created_keyset'),
+            models.Index(fields=['average_rating', 'id'], name='product_rating_keyset'),
+            models.Index(fields=['category', 'price', 'id'], name='product_cat_price_keyset'),
+            models.Index(fields=['category', 'created_at', 'id'], name='product_cat_created_keyset'),
+            # Catalog filters; price and rating ranges use the keyset indexes above.
+            models.Index(fields=['stock'], name='product_stock_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class StockMovement(models.Model):
+    """Append-only stock ledger; per product the changes sum to Product.stock."""
+    SALE = 'sale'
+    RESTOCK = 'restock'
+    ADJUSTMENT = 'adjustment'
+    RETURN = 'return'
+    SNAPSHOT = 'snapshot'
+    REASON_CHOICES = [
+        (SALE, 'Sale'),
+        (RESTOCK, 'Restock'),
+        (ADJUSTMENT, 'Manual adjustment'),
+        (RETURN, 'Return'),
+        (SNAPSHOT, 'Snapshot of compacted movements'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    change = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at', 'id'], name='stock_movement_keyset'),
+            models.Index(fields=['created_at'], name='stock_movement_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.change:+d} {self.product_id} ({self.reason})"
+
+
+class LowStockAlert(models.Model):
+    """A product that dropped to its threshold, waiting for the next alert email."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='low_stock_alerts')
+    stock = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # At most one pending alert per product.
+            models.UniqueConstraint(fields=['product'], condition=models.Q(sent_at=None),
+                                    name='low_stock_alert_pending'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} at {self.stock}"
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='product_images')
     image = models.ImageField(upload_to='products/')
+    # Resized derivatives, see backend.images.
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.product.title} Image"
@@ -53,6 +138,7 @@ class YouTubeVideo(models.Model):
     youtube_url = models.URLField()
     thumbnail_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -69,3 +155,18 @@ class YouTubeVideo(models.Model):
     def __str__(self):
         return self.title or self.youtube_url
 
+
+
+class SearchTerm(models.Model):
+    """One row of the product search index, see products/search.py."""
+    term = models.CharField(max_length=32)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'product'], name='unique_search_term_per_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.product_id}"
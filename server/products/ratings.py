@@ -0,0 +1,90 @@
+"""
+Review aggregates stored on Product (sum, count, 1-5 star histogram and
+average), kept in step with reviews through single UPDATE statements so
+concurrent reviews never lose an increment.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Now
+from backend.cache import bump_version
+
+RATING_VALUES = range(1, 6)
+AGGREGATE_FIELDS = ['rating_sum', 'review_count', 'average_rating'] + [
+    f'rating_count_{star}' for star in RATING_VALUES
+]
+
+
+def apply_rating_change(product_id, added=None, removed=None):
+    """
+    Fold one review change into the product's aggregates: `added` is the
+    new rating (create/edit), `removed` the old one (edit/delete). Ratings
+    outside RATING_VALUES (legacy rows) were never counted, as in
+    rebuild_rating_aggregates, so they are ignored here too.
+    """
+    from .models import Product
+
+    if added not in RATING_VALUES:
+        added = None
+    if removed not in RATING_VALUES:
+        removed = None
+    delta_sum = (added or 0) - (removed or 0)
+    delta_count = (added is not None) - (removed is not None)
+    histogram = {}
+    if added is not None:
+        histogram[added] = histogram.get(added, 0) + 1
+    if removed is not None:
+        histogram[removed] = histogram.get(removed, 0) - 1
+
+    updates = {
+        f'rating_count_{star}': F(f'rating_count_{star}') + delta
+        for star, delta in histogram.items() if delta
+    }
+    if not updates and not delta_sum:
+        return
+    # Every right-hand side sees the pre-update row, so the new average is
+    # derived from the old sum/count plus the deltas.
+    updates.update(
+        rating_sum=F('rating_sum') + delta_sum,
+        review_count=F('review_count') + delta_count,
+        average_rating=Case(
+            When(review_count=-delta_count, then=Value(0.0)),
+            default=Cast(F('rating_sum') + delta_sum, FloatField()) / (F('review_count') + delta_count),
+            output_field=FloatField(),
+        ),
+        updated_at=Now(),
+    )
+    Product.objects.filter(pk=product_id).update(**updates)
+
+
+def rebuild_rating_aggregates(batch_size=1000):
+    """
+    Recompute every product's aggregates from the Review table in one
+    grouped query.
+    """
+    from .models import Product, Review
+
+    rows = Review.objects.filter(rating__in=RATING_VALUES).values('product_id').annotate(
+        total=Sum('rating'),
+        count=Count('id'),
+        **{f'star_{star}': Count('id', filter=Q(rating=star)) for star in RATING_VALUES},
+    )
+    with transaction.atomic():
+        Product.objects.update(
+            rating_sum=0, review_count=0, average_rating=0, updated_at=Now(),
+            **{f'rating_count_{star}': 0 for star in RATING_VALUES},
+        )
+        batch = []
+        for row in rows.order_by('product_id').iterator():
+            product = Product(
+                pk=row['product_id'],
+                rating_sum=row['total'],
+                review_count=row['count'],
+                average_rating=row['total'] / row['count'],
+                **{f'rating_count_{star}': row[f'star_{star}'] for star in RATING_VALUES},
+            )
+            batch.append(product)
+            if len(batch) >= batch_size:
+                Product.objects.bulk_update(batch, AGGREGATE_FIELDS)
+                batch = []
+        Product.objects.bulk_update(batch, AGGREGATE_FIELDS)
+    bump_version(Product)
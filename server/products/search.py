@@ -0,0 +1,129 @@
+"""
+Inverted index for catalog search.
+
+Every product is broken into terms (title, description and category name)
+stored in the SearchTerm table, one row per (term, product) with a summed
+relevance weight. Title and category words are also stored by prefix so
+partial words ("ardu", "esp3") match while typing. A search is then a single
+indexed lookup on `term IN (...)`, grouped by product and ranked by weight,
+which works the same on SQLite and Postgres.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Count, Sum
+
+TERM_MAX_LENGTH = 32
+MIN_PREFIX_LENGTH = 2
+
+# Relevance weight per field; prefix matches score lower than whole words.
+TITLE_WEIGHT = 10
+TITLE_PREFIX_WEIGHT = 5
+CATEGORY_WEIGHT = 4
+CATEGORY_PREFIX_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+DESCRIPTION_MAX_REPEATS = 3
+
+STOP_WORDS = {'a', 'an', 'and', 'the', 'for', 'with', 'of', 'to', 'in', 'on', 'is', 'it', 'by', 'or'}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lower-cased words of `text`, without stop words and 1-char noise."""
+    if not text:
+        return []
+    return [
+        token[:TERM_MAX_LENGTH]
+        for token in TOKEN_RE.findall(text.casefold())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def _add_word_and_prefixes(weights, token, weight, prefix_weight):
+    weights[token] = weights.get(token, 0) + weight
+    for end in range(MIN_PREFIX_LENGTH, len(token)):
+        prefix = token[:end]
+        weights[prefix] = weights.get(prefix, 0) + prefix_weight
+
+
+def product_terms(title, description, category_name):
+    """Map every indexed term of a product to its relevance weight."""
+    weights = {}
+    for token in set(tokenize(title)):
+        _add_word_and_prefixes(weights, token, TITLE_WEIGHT, TITLE_PREFIX_WEIGHT)
+    for token in set(tokenize(category_name)):
+        _add_word_and_prefixes(weights, token, CATEGORY_WEIGHT, CATEGORY_PREFIX_WEIGHT)
+
+    repeats = {}
+    for token in tokenize(description):
+        repeats[token] = repeats.get(token, 0) + 1
+    for token, count in repeats.items():
+        weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT * min(count, DESCRIPTION_MAX_REPEATS)
+    return weights
+
+
+def query_terms(query):
+    """Distinct terms of a search query, in the order they were typed."""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def index_products(products):
+    """
+    (Re)build the index rows of the given products. Each product needs its
+    category loaded (select_related) to avoid a query per product.
+    """
+    from .models import SearchTerm
+
+    products = list(products)
+    if not products:
+        return
+    rows = []
+    for product in products:
+        terms = product_terms(product.title, product.description, product.category.name)
+        rows.extend((term, product.pk, weight) for term, weight in terms.items())
+
+    SearchTerm.objects.filter(product_id__in=[p.pk for p in products]).delete()
+    # Plain executemany: products carry ~50 terms each, and building model
+    # instances for bulk_create dominated bulk imports.
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}, {}, {}) VALUES (%s, %s, %s)'.format(
+        quote(SearchTerm._meta.db_table), quote('term'), quote('product_id'), quote('weight'),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def reindex_products(queryset, chunk_size=500):
+    """Rebuild the index for every product of `queryset`, in chunks."""
+    queryset = queryset.select_related('category').only(
+        'id', 'title', 'description', 'category__name'
+    ).order_by('pk')
+    chunk = []
+    total = 0
+    for product in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(product)
+        if len(chunk) >= chunk_size:
+            index_products(chunk)
+            total += len(chunk)
+            chunk = []
+    index_products(chunk)
+    return total + len(chunk)
+
+
+def search_products(queryset, query):
+    """
+    Restrict `queryset` to products matching every term of `query`,
+    annotated with `search_rank` and ordered best match first.
+    """
+    terms = query_terms(query)
+    if not terms:
+        # Nothing indexable (e.g. a single character): keep the old behaviour.
+        return queryset.filter(title__icontains=query.strip())
+
+    return (
+        queryset.filter(search_terms__term__in=terms)
+        .annotate(search_rank=Sum('search_terms__weight'), matched_terms=Count('search_terms'))
+        .filter(matched_terms=len(terms))
+        .order_by('-search_rank', '-id')
+    )
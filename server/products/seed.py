@@ -1,4 +1,5 @@
 from .models import Product, Category
+from .inventory import record_opening_stock
 
 def run():
     cat, _ = Category.objects.get_or_create(name="General", slug="general")
@@ -11,7 +12,7 @@ def run():
     ]
 
     for p in sample_products:
-        Product.objects.create(
+        product = Product.objects.create(
             title=p["title"],
             description="Sample description",
             price=p["price"],
@@ -19,5 +20,6 @@ def run():
             images=["https://picsum.photos/300"],
             category=cat
         )
+        record_opening_stock([product])
 
     print("Seed data added!")
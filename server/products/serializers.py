@@ -1,16 +1,40 @@
 from rest_framework import serializers
-from .models import Product, Category, ProductImage, Review, YouTubeVideo
+from .models import Product, Category, ProductImage, Review, StockMovement, YouTubeVideo
+from .ratings import AGGREGATE_FIELDS
+from .inventory import record_opening_stock, set_stock
+from backend.images import SrcsetField, schedule_derivatives, srcset
+from .counts import EMPTY as EMPTY_COUNTS, get_category_counts
 
 class CategorySerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image_variants')
+    product_count = serializers.SerializerMethodField()
+    in_stock_count = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'image']
+        fields = ['id', 'name', 'slug', 'image', 'image_srcset', 'product_count', 'in_stock_count']
+
+    def get_counts(self, obj):
+        # The view passes every category's counts in the context; nested
+        # uses fall back to the cached aggregate.
+        counts = self.context.get('category_counts')
+        if counts is None:
+            counts = get_category_counts()
+        return counts.get(obj.pk, EMPTY_COUNTS)
+
+    def get_product_count(self, obj):
+        return self.get_counts(obj)['product_count']
+
+    def get_in_stock_count(self, obj):
+        return self.get_counts(obj)['in_stock_count']
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='variants')
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset']
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -21,8 +45,108 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'user', 'username', 'rating', 'comment', 'created_at']
         read_only_fields = ['user', 'created_at']
 
+    def validate_rating(self, value):
+        if not 1 <= value <= 5:
+            raise serializers.ValidationError("Rating must be between 1 and 5.")
+        return value
+
+
+class SparseFieldsetMixin:
+    """
+    Let a read serializer be trimmed with `fields` (only these) or widened
+    with `expand` (defaults plus these of the `expandable_fields`).
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for param, names, allowed in (('fields', fields, self.fields), ('expand', expand, self.expandable_fields)):
+            unknown = sorted(set(names or ()) - set(allowed))
+            if unknown:
+                raise serializers.ValidationError({
+                    param: [f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}."],
+                })
+        if fields:
+            keep = set(fields)
+        else:
+            keep = (set(self.fields) - set(self.expandable_fields)) | set(expand or ())
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class CategoryBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
+
+
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Compact product card for catalog grids; heavy fields on ?expand=."""
+    category = CategoryBriefSerializer(read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
+    total_reviews = serializers.IntegerField(source='review_count', read_only=True)
+    product_images = ProductImageSerializer(many=True, read_only=True)
+
+    expandable_fields = ('description', 'images', 'product_images', 'created_at', 'updated_at')
 
-class ProductSerializer(serializers.ModelSerializer):
+    # Model columns each output field needs, for queryset.only().
+    source_columns = {
+        'id': ['id'],
+        'title': ['title'],
+        'price': ['price'],
+        'stock': ['stock'],
+        'is_innovative_project': ['is_innovative_project'],
+        'average_rating': ['average_rating'],
+        'total_reviews': ['review_count'],
+        'category': ['category__id', 'category__name', 'category__slug'],
+        'thumbnail': ['images'],  # legacy fallback; the file name is annotated
+        'thumbnail_srcset': [],  # annotated
+        'description': ['description'],
+        'images': ['images'],
+        'created_at': ['created_at'],
+        'updated_at': ['updated_at'],
+    }
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'title', 'price', 'stock', 'is_innovative_project', 'average_rating', 'total_reviews',
+            'category', 'thumbnail', 'thumbnail_srcset', 'description', 'images', 'product_images', 'created_at', 'updated_at',
+        ]
+
+    @classmethod
+    def selected_fields(cls, fields=None, expand=None):
+        """Output field names for a fieldset, without building the serializer."""
+        if fields:
+            return [name for name in cls.Meta.fields if name in fields]
+        return [name for name in cls.Meta.fields if name not in cls.expandable_fields or name in (expand or ())]
+
+    def get_thumbnail(self, obj):
+        # The list queryset annotates the first image's file name; otherwise
+        # use the first prefetched image, then the legacy URL list.
+        if hasattr(obj, 'thumbnail_name'):
+            name = obj.thumbnail_name
+        else:
+            first = next(iter(obj.product_images.all()), None)
+            name = first.image.name if first else None
+        if not name:
+            return obj.images[0] if obj.images else None
+        url = ProductImage._meta.get_field('image').storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_thumbnail_srcset(self, obj):
+        if hasattr(obj, 'thumbnail_variants'):
+            variants = obj.thumbnail_variants
+        else:
+            first = next(iter(obj.product_images.all()), None)
+            variants = first.variants if first else None
+        return srcset(variants, self.context.get('request'))
+
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source='category', write_only=True
@@ -32,31 +156,61 @@ class ProductSerializer(serializers.ModelSerializer):
         child=serializers.ImageField(), write_only=True, required=False
     )
     
-    average_rating = serializers.SerializerMethodField()
-    total_reviews = serializers.SerializerMethodField()
+    total_reviews = serializers.IntegerField(source='review_count', read_only=True)
 
     class Meta:
         model = Product
         fields = '__all__'
+        read_only_fields = AGGREGATE_FIELDS
 
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if not reviews:
-            return 0
-        return sum([review.rating for review in reviews]) / len(reviews)
-
-    def get_total_reviews(self, obj):
-        return obj.reviews.count()
+    def validate_stock(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Stock cannot be negative.")
+        return value
 
     def create(self, validated_data):
         uploaded_images = validated_data.pop('uploaded_images', [])
         product = Product.objects.create(**validated_data)
-        
-        for image in uploaded_images:
-            ProductImage.objects.create(product=product, image=image)
-            
+        record_opening_stock([product])
+        images = ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=image) for image in uploaded_images
+        )
+        # bulk_create sends no post_save, which is what starts the derivatives.
+        for image in images:
+            schedule_derivatives(image)
         return product
 
+    def update(self, instance, validated_data):
+        # Stock moves through the ledger, as a relative change, and is left
+        # out of the save so an edit never overwrites concurrent sales.
+        stock = validated_data.pop('stock', None)
+        validated_data.pop('uploaded_images', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[
+            field.name for field in Product._meta.concrete_fields
+            if not field.primary_key and field.name not in ('stock', *AGGREGATE_FIELDS)
+        ])
+        if stock is not None:
+            instance.stock = set_stock(instance.pk, stock, reference='edit')
+        return instance
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    reason = serializers.ChoiceField(choices=[
+        StockMovement.RESTOCK, StockMovement.ADJUSTMENT, StockMovement.RETURN,
+    ])
+
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'change', 'reason', 'reference', 'created_at']
+        read_only_fields = ['created_at']
+
+    def validate_change(self, value):
+        if not value:
+            raise serializers.ValidationError("Enter a non-zero change.")
+        return value
+
 
 class YouTubeVideoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from backend.cache import bump_version
+from backend import images
+from .models import Category, Product, ProductImage, Review, YouTubeVideo
+from .search import index_products, reindex_products
+
+
+# What a product contributes to the search index (search.product_terms).
+INDEXED_FIELDS = {'title', 'description', 'category', 'category_id'}
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    # A save limited to other columns (e.g. stock) leaves the terms as they are.
+    if raw or (update_fields is not None and not INDEXED_FIELDS & update_fields):
+        return
+    index_products([instance])
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._indexed_name = None
+        return
+    instance._indexed_name = (
+        Category.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    # Only a rename changes what the category contributes to the index.
+    if raw or created or getattr(instance, '_indexed_name', None) == instance.name:
+        return
+    reindex_products(instance.products.all())
+
+# Deletes need no handler: SearchTerm rows cascade with their product.
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=YouTubeVideo)
+def invalidate_cached_reads(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_cached_reviews(sender, **kwargs):
+    # Reviews also move the rating aggregates stored on Product.
+    bump_version(Review, Product)
+
+
+images.register(ProductImage, 'image', 'variants')
+images.register(Category, 'image', 'image_variants')
@@ -1,3 +1,624 @@
+import base64
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Category, LowStockAlert, Product, ProductImage, SearchTerm, StockMovement
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.boards = Category.objects.create(name='Development Boards', slug='development-boards')
+        self.sensors = Category.objects.create(name='Sensors', slug='sensors')
+        self.uno = Product.objects.create(
+            title='Arduino Uno R3', description='ATmega328P board', price=650, stock=5, category=self.boards
+        )
+        self.ultrasonic = Product.objects.create(
+            title='Ultrasonic Distance Sensor', description='Works with any Arduino', price=120, stock=5,
+            category=self.sensors,
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/products/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [p['id'] for p in response.data['results']]
+
+    def test_title_match_ranks_above_description_match(self):
+        self.assertEqual(self.search('arduino'), [self.uno.id, self.ultrasonic.id])
+
+    def test_prefix_and_category_terms(self):
+        self.assertEqual(self.search('ultra'), [self.ultrasonic.id])
+        self.assertEqual(self.search('sensors distance'), [self.ultrasonic.id])
+        self.assertEqual(self.search('sensor uno'), [])
+
+    def test_index_follows_product_and_category_changes(self):
+        self.uno.title = 'Arduino Nano'
+        self.uno.save()
+        self.assertEqual(self.search('uno'), [])
+        self.assertEqual(self.search('nano'), [self.uno.id])
+
+        self.boards.name = 'Microcontrollers'
+        self.boards.save()
+        self.assertEqual(self.search('microcontrollers'), [self.uno.id])
+
+        uno_id = self.uno.id
+        self.uno.delete()
+        self.assertFalse(SearchTerm.objects.filter(product_id=uno_id).exists())
+
+    def test_saves_of_unindexed_fields_leave_the_index_alone(self):
+        with mock.patch('products.signals.index_products') as index:
+            self.uno.stock = 4
+            self.uno.save(update_fields=['stock'])
+            index.assert_not_called()
+            self.uno.title = 'Arduino Nano'
+            self.uno.save(update_fields=['title', 'stock'])
+            index.assert_called_once_with([self.uno])
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        self.client = APIClient()
+        self.user = User.objects.create_user('reviewer', password='pw')
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Sensors', slug='sensors')
+        self.product = Product.objects.create(title='PIR Sensor', description='', price=90, category=category)
+
+    def assertAggregates(self, rating_sum, count, average, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.review_count), (rating_sum, count))
+        self.assertAlmostEqual(self.product.average_rating, average)
+        self.assertEqual([getattr(self.product, f'rating_count_{s}') for s in range(1, 6)], histogram)
+
+    def test_create_edit_delete_keep_aggregates_in_step(self):
+        first = self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 5, 'comment': 'Great'})
+        self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 2, 'comment': 'Meh'})
+        self.assertAggregates(7, 2, 3.5, [0, 1, 0, 0, 1])
+
+        self.client.patch(f"/api/reviews/{first.data['id']}/", {'rating': 4})
+        self.assertAggregates(6, 2, 3.0, [0, 1, 0, 1, 0])
+
+        for review in self.product.reviews.all():
+            self.client.delete(f'/api/reviews/{review.id}/')
+        self.assertAggregates(0, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_rating_out_of_range_is_rejected(self):
+        response = self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 9, 'comment': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_legacy_out_of_range_ratings_are_ignored_on_edit_and_delete(self):
+        from .models import Review
+
+        self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 3, 'comment': 'Ok'})
+        legacy = [Review.objects.create(product=self.product, user=self.user, rating=rating, comment='old')
+                  for rating in (0, 7)]
+        self.client.patch(f'/api/reviews/{legacy[0].id}/', {'comment': 'still old'})
+        self.assertAggregates(3, 1, 3.0, [0, 0, 1, 0, 0])
+        self.assertEqual(self.client.patch(f'/api/reviews/{legacy[1].id}/', {'rating': 4}).status_code, 200)
+        self.assertAggregates(7, 2, 3.5, [0, 0, 1, 1, 0])
+        self.assertEqual(self.client.delete(f'/api/reviews/{legacy[0].id}/').status_code, 204)
+        self.assertAggregates(7, 2, 3.5, [0, 0, 1, 1, 0])
+
+    def test_rebuild_command_matches_incremental_state(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 3, 'comment': 'Ok'})
+        Product.objects.update(rating_sum=0, review_count=0, average_rating=0, rating_count_3=0)
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.assertAggregates(3, 1, 3.0, [0, 0, 1, 0, 0])
+
+    def test_list_sorts_by_average_rating(self):
+        other = Product.objects.create(title='IR Sensor', description='', price=40, category=self.product.category)
+        self.client.post('/api/reviews/', {'product': other.id, 'rating': 4, 'comment': 'Good'})
+        response = self.client.get('/api/products/', {'ordering': '-average_rating'})
+        self.assertEqual([p['id'] for p in response.data['results']], [other.id, self.product.id])
+        self.assertEqual(response.data['results'][0]['total_reviews'], 1)
+
+
+class ProductCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='Motors', slug='motors')
+        # Repeated prices make the id tiebreaker matter.
+        for i in range(11):
+            Product.objects.create(
+                title=f'Gear Motor {i}', description='', price=100 + (i % 3) * 50, category=category
+            )
+
+    def walk(self, **params):
+        ids = []
+        response = self.client.get('/api/products/', {'pagination': 'cursor', 'page_size': 4, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(p['id'] for p in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_ordering_without_gaps_or_repeats(self):
+        products = list(Product.objects.all())
+        for ordering in ['price', '-price', 'created_at', '-created_at']:
+            field = ordering.lstrip('-')
+            expected = sorted(products, key=lambda p: (getattr(p, field), p.id), reverse=ordering.startswith('-'))
+            self.assertEqual(self.walk(ordering=ordering), [p.id for p in expected], ordering)
+
+    def test_search_results_keep_rank_order(self):
+        expected = [p['id'] for p in self.client.get('/api/products/', {'q': 'gear', 'page_size': 100}).data['results']]
+        self.assertEqual(self.walk(q='gear'), expected)
+
+    def test_page_numbers_still_work_and_bad_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/products/', {'page': 2, 'page_size': 4}).data['count'], 11)
+        self.assertEqual(self.client.get('/api/products/', {'cursor': 'nope'}).status_code, 404)
+
+    def test_hand_edited_cursors_are_404(self):
+        def cursor(value, pk):
+            return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+
+        for params in [{'cursor': cursor(None, 1)}, {'cursor': cursor('x', 1)},
+                       {'q': 'gear', 'pagination': 'cursor', 'cursor': cursor('x', 1)},
+                       {'q': 'gear', 'pagination': 'cursor', 'cursor': cursor(None, 1)}]:
+            self.assertEqual(self.client.get('/api/products/', params).status_code, 404, params)
+        ranked = self.client.get('/api/products/', {'q': 'gear', 'pagination': 'cursor', 'cursor': cursor('15', 1)})
+        self.assertEqual(ranked.status_code, 200)
+
+
+class CatalogResponseCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Drone Parts', slug='drone-parts')
+        self.product = Product.objects.create(
+            title='Propeller Set', description='', price=250, stock=4, category=self.category
+        )
+
+    def test_repeat_reads_hit_and_writes_invalidate(self):
+        url = f'/api/products/{self.product.id}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        Product.objects.filter(pk=self.product.pk).update(stock=0)  # no signal: still cached
+        self.assertEqual(self.client.get(url).data['stock'], 4)
+
+        self.product.refresh_from_db()
+        self.product.price = 199
+        self.product.save()
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['price'], response.data['stock']), ('MISS', '199.00', 0))
+
+    def test_query_params_are_normalized(self):
+        self.client.get('/api/products/', {'ordering': 'price', 'category': self.category.id})
+        response = self.client.get(f'/api/products/?category={self.category.id}&ordering=price&q=')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_authenticated_reads_bypass_cache_and_stats_are_exposed(self):
+        from django.contrib.auth.models import User
+
+        self.client.get('/api/categories/')
+        self.client.get('/api/categories/')
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+        self.assertFalse(self.client.get('/api/categories/').has_header('X-Cache'))
+        stats = self.client.get('/api/admin/cache-stats/').data
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Sensors', slug='sensors')
+        self.product = Product.objects.create(title='LDR', description='', price=10, category=self.category)
+
+    def test_matching_etag_returns_304_and_changes_invalidate_it(self):
+        first = self.client.get('/api/products/')
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        cached = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+
+        self.product.delete()
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_varies_with_query_params(self):
+        etag = self.client.get('/api/categories/')['ETag']
+        self.assertNotEqual(self.client.get('/api/products/')['ETag'], etag)
+        self.assertEqual(self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=f'"x", {etag}').status_code, 304)
+        self.assertEqual(self.client.get('/api/categories/?page=2', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProductFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='Sensors', slug='sensors')
+        self.product = Product.objects.create(
+            title='Soil Moisture Sensor', description='Long text', price=80, category=category,
+            images=['https://cdn.example.com/soil.jpg'],
+        )
+
+    def test_list_is_compact_by_default(self):
+        card = self.client.get('/api/products/').data['results'][0]
+        self.assertNotIn('description', card)
+        self.assertNotIn('product_images', card)
+        self.assertEqual(card['thumbnail'], 'https://cdn.example.com/soil.jpg')
+        self.assertEqual(card['category'], {'id': self.product.category_id, 'name': 'Sensors', 'slug': 'sensors'})
+
+    def test_thumbnail_prefers_uploaded_images(self):
+        ProductImage.objects.create(product=self.product, image='products/soil-1.jpg')
+        ProductImage.objects.create(product=self.product, image='products/soil-2.jpg')
+        card = self.client.get('/api/products/').data['results'][0]
+        self.assertTrue(card['thumbnail'].endswith('/media/products/soil-1.jpg'))
+
+    def test_image_less_products_cost_no_query_per_row(self):
+        from django.core.cache import cache
+
+        for i in range(17):
+            Product.objects.create(title=f'Sensor {i}', description='', price=10, category=self.product.category)
+        cache.clear()
+        with self.assertNumQueries(5):
+            cards = self.client.get('/api/products/').data['results']
+        self.assertEqual(len(cards), 18)
+        self.assertEqual([card['thumbnail'] for card in cards].count(None), 17)
+
+    def test_fields_and_expand(self):
+        card = self.client.get('/api/products/', {'fields': 'id,title'}).data['results'][0]
+        self.assertEqual(set(card), {'id', 'title'})
+        card = self.client.get('/api/products/', {'expand': 'description,product_images'}).data['results'][0]
+        self.assertEqual((card['description'], card['product_images']), ('Long text', []))
+        detail = self.client.get(f'/api/products/{self.product.id}/', {'fields': 'id,price'}).data
+        self.assertEqual(set(detail), {'id', 'price'})
+        self.assertIn('description', self.client.get(f'/api/products/{self.product.id}/').data)
+
+    def test_unknown_fields_or_expand_are_rejected(self):
+        response = self.client.get('/api/products/', {'fields': 'nope,bogus'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus, nope', response.data['fields'][0])
+        self.assertIn('thumbnail', response.data['fields'][0])
+        response = self.client.get('/api/products/', {'expand': 'title'})  # a default field, not expandable
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('product_images', response.data['expand'][0])
+        self.assertEqual(self.client.get(f'/api/products/{self.product.id}/', {'fields': 'id,nope'}).status_code, 400)
+
+
+class CatalogFacetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.boards = Category.objects.create(name='Boards', slug='boards')
+        self.sensors = Category.objects.create(name='Sensors', slug='sensors')
+        self.make(self.boards, 'Arduino Uno', 650, 5, rating=4.5)
+        self.make(self.boards, 'Arduino Mega', 1400, 0, rating=3.0)
+        self.make(self.sensors, 'Arduino Sound Sensor', 90, 12, rating=0)
+        self.make(self.sensors, 'Gas Sensor', 300, 0, rating=5.0)
+
+    def make(self, category, title, price, stock, rating):
+        return Product.objects.create(
+            title=title, description='', price=price, stock=stock, category=category, average_rating=rating
+        )
+
+    def titles(self, **params):
+        return sorted(p['title'] for p in self.client.get('/api/products/', params).data['results'])
+
+    def test_filters(self):
+        self.assertEqual(self.titles(min_price=100, max_price=700), ['Arduino Uno', 'Gas Sensor'])
+        self.assertEqual(self.titles(in_stock='true'), ['Arduino Sound Sensor', 'Arduino Uno'])
+        self.assertEqual(self.titles(min_rating=4), ['Arduino Uno', 'Gas Sensor'])
+        self.assertEqual(self.titles(category=f'{self.boards.id},{self.sensors.id}', in_stock='false'),
+                         ['Arduino Mega', 'Gas Sensor'])
+        self.assertEqual(self.client.get('/api/products/', {'min_price': 'cheap'}).status_code, 400)
+
+    def test_facets_come_from_one_query_and_drop_only_their_own_filter(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/products/', {'q': 'arduino', 'facets': 'true', 'in_stock': 'true'})
+        facet_queries = [q for q in queries.captured_queries if 'bucket_0' in q['sql']]
+        self.assertEqual(len(facet_queries), 1)
+
+        facets = response.data['facets']
+        # Category and price counts honour in_stock; the stock facet ignores it.
+        self.assertEqual([(c['name'], c['count']) for c in facets['categories']], [('Boards', 1), ('Sensors', 1)])
+        self.assertEqual({b['bucket']: b['count'] for b in facets['price']},
+                         {'under-500': 1, '500-1000': 1, '1000-2500': 0, '2500-5000': 0, '5000-plus': 0})
+        self.assertEqual(facets['stock'], {'in_stock': 2, 'out_of_stock': 1})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotIn('facets', self.client.get('/api/products/').data)
+
+    def test_category_counts_combine_with_in_stock_and_price(self):
+        facets = self.client.get('/api/products/', {
+            'facets': 'true', 'in_stock': 'true', 'category': self.boards.id, 'max_price': 1000,
+        }).data['facets']
+        self.assertEqual([(c['name'], c['count']) for c in facets['categories']], [('Boards', 1), ('Sensors', 1)])
+        self.assertEqual({b['bucket']: b['count'] for b in facets['price']},
+                         {'under-500': 0, '500-1000': 1, '1000-2500': 0, '2500-5000': 0, '5000-plus': 0})
+        self.assertEqual(facets['stock'], {'in_stock': 1, 'out_of_stock': 0})
+        facets = self.client.get('/api/products/', {'facets': 'true', 'in_stock': 'false'}).data['facets']
+        self.assertEqual([(c['name'], c['count']) for c in facets['categories']], [('Boards', 1), ('Sensors', 1)])
+        facets = self.client.get('/api/products/', {'facets': 'true', 'min_price': 1000}).data['facets']
+        self.assertEqual([(c['name'], c['count']) for c in facets['categories']], [('Boards', 1)])
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        self.sensors = Category.objects.create(name='Sensors', slug='sensors')
+        Product.objects.create(sku='US-01', title='Old title', price=100, stock=1, category=self.sensors)
+
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return self.client.post('/api/products/import/', {'file': SimpleUploadedFile(name, content.encode())})
+
+    def test_csv_import_upserts_by_sku_and_reports_bad_rows(self):
+        response = self.upload('catalog.csv', (
+            'sku,title,description,price,stock,category,is_innovative_project,images\n'
+            'US-01,Ultrasonic Sensor,HC-SR04,120,5,sensors,false,a.jpg|b.jpg\n'
+            'PIR-01,PIR Motion Sensor,,90,3,Sensors,true,\n'
+            'BAD-01,Broken,,abc,1,sensors,false,\n'
+            'BAD-02,Lost,,10,1,nowhere,false,\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (1, 1, 2))
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4])
+
+        updated = Product.objects.get(sku='US-01')
+        self.assertEqual((updated.title, updated.images), ('Ultrasonic Sensor', ['a.jpg', 'b.jpg']))
+        self.assertTrue(Product.objects.get(sku='PIR-01').is_innovative_project)
+        self.assertTrue(SearchTerm.objects.filter(product=updated, term='ultrasonic').exists())
+
+    def test_ndjson_export_round_trips(self):
+        response = self.client.get('/api/products/export/', {'as': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('"sku": "US-01"', body)
+
+        response = self.upload('catalog.ndjson', body.replace('Old title', 'Renamed'))
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 1))
+        self.assertEqual(Product.objects.get(sku='US-01').title, 'Renamed')
+
+    def test_csv_export_of_products_without_sku_round_trips(self):
+        legacy = Product.objects.create(title='Legacy board', price=300, stock=2, category=self.sensors)
+        with mock.patch('products.bulk.EXPORT_CHUNK_SIZE', 1):
+            body = b''.join(self.client.get('/api/products/export/', {'as': 'csv'}).streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 3)
+        response = self.upload('catalog.csv', body.replace('Legacy board', 'Legacy board v2'))
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (0, 2, 0))
+        self.assertEqual(Product.objects.count(), 2)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.title, legacy.sku, legacy.stock), ('Legacy board v2', None, 2))
+
+        response = self.upload('catalog.csv', 'id,sku,title,price,category\n'
+                                              f'{legacy.pk},LB-01,Legacy board,300,sensors\n'
+                                              '99999,,Ghost,10,sensors\n')
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (0, 1, 1))
+        self.assertEqual(Product.objects.get(pk=legacy.pk).sku, 'LB-01')
+        self.assertIn('Unknown product id', response.data['errors'][0]['error'])
+
+    def test_out_of_range_and_duplicate_rows_are_reported_per_row(self):
+        rows = [
+            {'sku': 'OK-01', 'title': 'Fine', 'price': '10.006', 'category': 'sensors'},
+            {'sku': 'LONG-01', 'title': 'x' * 256, 'price': '1', 'category': 'sensors'},
+            {'sku': 'S' * 65, 'title': 'Long SKU', 'price': '1', 'category': 'sensors'},
+            {'sku': 'NAN-01', 'title': 'NaN', 'price': 'NaN', 'category': 'sensors'},
+            {'sku': 'INF-01', 'title': 'Inf', 'price': 'Infinity', 'category': 'sensors'},
+            {'sku': 'NEG-01', 'title': 'Negative', 'price': '-1', 'category': 'sensors'},
+            {'sku': 'BIG-01', 'title': 'Big', 'price': '100000000', 'category': 'sensors'},
+            {'sku': 'OK-01', 'title': 'Fine again', 'price': '12', 'category': 'sensors'},
+        ]
+        response = self.upload('catalog.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (1, 0, 7))
+        self.assertEqual([e['row'] for e in response.data['errors']], [2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(response.data['errors'][-1]['error'], 'Duplicate of row 1')
+        self.assertEqual((Product.objects.get(sku='OK-01').title, Product.objects.get(sku='OK-01').price),
+                         ('Fine', Decimal('10.01')))
+
+    def test_sku_created_during_an_import_is_updated_through_the_ledger(self):
+        from django.db.models import Sum
+        from . import bulk
+        from .inventory import record_opening_stock
+        rival = Product.objects.create(sku='RACE-01', title='Rival', price=1, stock=3, category=self.sensors)
+        record_opening_stock([rival])
+        lookup, calls = bulk._lock_existing, []
+
+        def racing(batch):
+            # The first lookup misses the SKU, as if another import committed it just after.
+            calls.append(batch)
+            return lookup(batch) if len(calls) > 1 else []
+
+        with mock.patch('products.bulk._lock_existing', side_effect=racing):
+            stats = bulk.import_rows([{'sku': 'RACE-01', 'title': 'Racer', 'price': '5', 'stock': '8',
+                                       'category': 'sensors'}])
+        self.assertEqual((stats['created'], stats['updated'], stats['failed']), (0, 1, 0))
+        product = Product.objects.get(sku='RACE-01')
+        self.assertEqual((product.title, product.stock), ('Racer', 8))
+        self.assertEqual(product.stock_movements.aggregate(total=Sum('change'))['total'], 8)
+        self.assertEqual(list(product.stock_movements.values_list('change', flat=True).order_by('id')), [3, 5])
+
+    def test_endpoints_are_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get('/api/products/export/').status_code, (401, 403))
+
+
+class CategoryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.boards = Category.objects.create(name='Development Boards', slug='development-boards')
+        self.sensors = Category.objects.create(name='Sensors', slug='sensors')
+        Product.objects.create(title='Uno', price=650, stock=5, category=self.boards)
+        Product.objects.create(title='Nano', price=450, stock=0, category=self.boards)
+
+    def counts(self):
+        response = self.client.get('/api/categories/')
+        return {c['slug']: (c['product_count'], c['in_stock_count']) for c in response.data}
+
+    def test_counts_follow_product_writes(self):
+        self.assertEqual(self.counts(), {'development-boards': (2, 1), 'sensors': (0, 0)})
+        product = Product.objects.get(title='Nano')
+        product.category = self.sensors
+        product.stock = 3
+        product.save()
+        self.assertEqual(self.counts(), {'development-boards': (1, 1), 'sensors': (1, 1)})
+
+    def test_query_count_does_not_grow_with_categories(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.core.cache import cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/categories/')
+        for i in range(5):
+            Category.objects.create(name=f'Extra {i}', slug=f'extra-{i}')
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.client.get('/api/categories/')
+        self.assertEqual(len(few), len(many))
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+        self.product = Product.objects.create(
+            title='Uno', price=650, stock=5, category=Category.objects.create(name='Boards', slug='boards')
+        )
+
+    def upload(self, width=1500, height=1000):
+        import io
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), 'teal').save(buffer, 'PNG')
+        return SimpleUploadedFile('board.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_renders_variants_exposed_as_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(product=self.product, image=self.upload())
+        image.refresh_from_db()
+        self.assertEqual(image.variants['source'], image.image.name)
+        self.assertEqual(sorted({(v['width'], v['height']) for v in image.variants['variants']}),
+                         [(320, 213), (640, 427), (1024, 683)])
+
+        card = self.client.get('/api/products/').data['results'][0]
+        self.assertIn('320w', card['thumbnail_srcset']['webp'])
+        self.assertTrue(card['thumbnail_srcset']['jpeg'].endswith('1024w'))
+        detail = self.client.get(f'/api/products/{self.product.id}/').data
+        self.assertEqual(detail['product_images'][0]['srcset'], card['thumbnail_srcset'])
+
+    def test_images_uploaded_with_a_new_product_get_variants(self):
+        from django.contrib.auth.models import User
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/', {
+                'title': 'Mega', 'description': 'Board', 'price': '1400', 'stock': 2,
+                'category_id': self.product.category_id, 'uploaded_images': [self.upload(), self.upload()],
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        images = ProductImage.objects.filter(product_id=response.data['id'])
+        self.assertEqual(len(images), 2)
+        for image in images:
+            self.assertEqual({v['width'] for v in image.variants['variants']}, {320, 640, 1024})
+
+    def test_small_originals_are_not_upscaled_and_backfill_fills_gaps(self):
+        from io import StringIO
+        from django.core.management import call_command
+        image = ProductImage.objects.create(product=self.product, image=self.upload(200, 100))
+        self.assertEqual(image.variants, {})
+
+        call_command('backfill_image_derivatives', workers=1, stdout=StringIO())
+        image.refresh_from_db()
+        self.assertEqual({v['width'] for v in image.variants['variants']}, {200})
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from .inventory import record_opening_stock
+        self.admin = User.objects.create_user('admin', email='admin@example.com', password='x', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        category = Category.objects.create(name='Sensors', slug='sensors')
+        self.products = [
+            Product.objects.create(title=f'Part {i}', price=10, stock=10, low_stock_threshold=3, category=category)
+            for i in range(2)
+        ]
+        record_opening_stock(self.products)
+
+    def ledger(self, product):
+        return sum(StockMovement.objects.filter(product=product).values_list('change', flat=True))
+
+    def test_checkouts_record_sales_and_queue_one_alert(self):
+        from orders.services import place_order
+        for _ in range(4):
+            place_order(self.admin, [{'product_id': self.products[0].id, 'qty': 2}],
+                        total_amount=20, shipping_address={})
+        product = Product.objects.get(pk=self.products[0].pk)
+        self.assertEqual((product.stock, self.ledger(product)), (2, 2))
+        self.assertEqual(StockMovement.objects.filter(product=product, reason='sale').count(), 4)
+        # Crossed the threshold once (at 2 left); later sales keep the same alert.
+        self.assertEqual(list(LowStockAlert.objects.values_list('product_id', 'stock')), [(product.pk, 2)])
+
+    def test_alerts_are_sent_as_one_digest(self):
+        from django.core.management import call_command
+        from .inventory import apply_stock_changes
+        apply_stock_changes({p.pk: -8 for p in self.products}, StockMovement.ADJUSTMENT)
+        with self.settings(LOW_STOCK_ALERT_EMAILS=[]), mock.patch('products.inventory.send_email_async') as send:
+            call_command('send_low_stock_alerts', stdout=io.StringIO())
+        [(email,), _] = send.call_args
+        self.assertEqual(email.to, ['admin@example.com'])
+        self.assertIn('Part 0', email.body)
+        self.assertIn('Part 1', email.body)
+        self.assertFalse(LowStockAlert.objects.filter(sent_at=None).exists())
+
+    def test_admin_edit_and_movements_go_through_the_ledger(self):
+        product = self.products[0]
+        # A sale lands after the admin loaded the product; the edit must not undo it.
+        Product.objects.filter(pk=product.pk).update(stock=7)
+        StockMovement.objects.create(product=product, change=-3, reason='sale')
+        response = self.client.patch(f'/api/products/{product.pk}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Product.objects.get(pk=product.pk).stock, 7)
+
+        self.client.patch(f'/api/products/{product.pk}/', {'stock': 12}, format='json')
+        response = self.client.post(f'/api/products/{product.pk}/stock/', {'change': 5, 'reason': 'restock'})
+        self.assertEqual((response.status_code, response.data['stock']), (201, 17))
+        response = self.client.post(f'/api/products/{product.pk}/stock/', {'change': -50, 'reason': 'adjustment'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'/api/products/{product.pk}/stock/', {'change': 1, 'reason': 'sale'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f'/api/products/{product.pk}/stock/')
+        self.assertEqual([row['change'] for row in response.data['results']], [5, 5, -3, 10])
+        self.assertEqual(self.ledger(product), 17)
 
-# Create your tests here.
+    def test_compaction_keeps_the_ledger_sum(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .inventory import compact_ledger, ledger_drift, move_stock
+        product = self.products[0]
+        for change in (-1, -2, 4):
+            move_stock(product.pk, change, StockMovement.ADJUSTMENT)
+        recent = StockMovement.objects.create(product=product, change=0, reason='adjustment',
+                                              created_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(compact_ledger(timezone.now() + timedelta(seconds=1)), 4)
+        rows = StockMovement.objects.filter(product=product).order_by('created_at').values_list('reason', 'change')
+        self.assertEqual(list(rows), [('snapshot', 11), ('adjustment', 0)])
+        self.assertTrue(StockMovement.objects.filter(pk=recent.pk).exists())
+        self.assertFalse(ledger_drift().exists())
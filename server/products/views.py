@@ -1,49 +1,253 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import JSONField, OuterRef, Prefetch, Q, Subquery
 from rest_framework import viewsets
 from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticatedOrReadOnly
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from .models import Product, Category, Review, YouTubeVideo
-from .serializers import ProductSerializer, CategorySerializer, ReviewSerializer, YouTubeVideoSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from django.http import StreamingHttpResponse
+from .models import Product, Category, ProductImage, Review, YouTubeVideo
+from .serializers import ProductSerializer, ProductListSerializer, CategorySerializer, ReviewSerializer, StockMovementSerializer, YouTubeVideoSerializer
+from .search import search_products
+from .facets import catalog_facets
+from .counts import get_category_counts
+from .ratings import apply_rating_change
+from .bulk import FORMATS, export_lines, import_rows, read_rows
+from .inventory import StockError, move_stock
 
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import OrderingFilter
+from backend.pagination import KeysetPagination
+from backend.cache import CachedReadMixin, get_stats
+from backend.conditional import ConditionalGetMixin
 
 class ProductPagination(PageNumberPagination):
     page_size = 18
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ProductViewSet(viewsets.ModelViewSet):
+
+class ProductCursorPagination(KeysetPagination):
+    """Infinite-scroll mode, selected with ?pagination=cursor or ?cursor=."""
+    page_size = 18
+
+    def get_ordering(self, request, queryset, view=None):
+        if (self.ordering_param not in request.query_params
+                and 'search_rank' in queryset.query.annotations):
+            return '-search_rank'
+        return super().get_ordering(request, queryset, view)
+
+
+class StockMovementPagination(KeysetPagination):
+    page_size = 50
+    ordering_fields = ()
+    default_ordering = '-created_at'
+
+
+class ProductViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    cache_dependencies = etag_dependencies = [Product, Category, ProductImage]
     pagination_class = ProductPagination
     filter_backends = [OrderingFilter]
-    ordering_fields = ['price', 'created_at'] # Add fields you want to sort by
+    ordering_fields = ['price', 'created_at', 'average_rating'] # Add fields you want to sort by
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [AllowAny()]
         return [IsAdminUser()]
 
-    def get_queryset(self):
-        queryset = Product.objects.select_related('category').prefetch_related('product_images', 'reviews').all()
-        category = self.request.query_params.get('category')
-        search = self.request.query_params.get('q') # Support search query
-        
-        if category:
-            queryset = queryset.filter(category_id=category)
-        
-        if search:
-            queryset = queryset.filter(title__icontains=search)
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = ProductCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ProductListSerializer
+        return ProductSerializer
+
+    def get_fieldset(self):
+        """?fields= / ?expand= as lists, honoured on reads only."""
+        if self.action not in ['list', 'retrieve']:
+            return {}
+        params = self.request.query_params
+        return {
+            name: [f.strip() for f in params[name].split(',') if f.strip()]
+            for name in ('fields', 'expand') if params.get(name)
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_list_queryset(self):
+        """Load only the columns and relations the list fieldset renders."""
+        output = ProductListSerializer.selected_fields(**self.get_fieldset())
+        columns = {'id', 'created_at'}
+        ordering = self.request.query_params.get('ordering', '').lstrip('-')
+        if ordering in self.ordering_fields:
+            columns.add(ordering)
+        for name in output:
+            columns.update(ProductListSerializer.source_columns.get(name, []))
+
+        queryset = Product.objects.only(*columns)
+        if 'category' in output:
+            queryset = queryset.select_related('category')
+        first_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('id')
+        if 'thumbnail' in output:
+            queryset = queryset.annotate(thumbnail_name=Subquery(first_image.values('image')[:1]))
+        if 'thumbnail_srcset' in output:
+            queryset = queryset.annotate(thumbnail_variants=Subquery(
+                first_image.values('variants')[:1], output_field=JSONField(),
+            ))
+        if 'product_images' in output:
+            queryset = queryset.prefetch_related(Prefetch(
+                'product_images',
+                queryset=ProductImage.objects.only('id', 'product_id', 'image', 'variants').order_by('id'),
+            ))
+        return queryset
+
+    def get_number_param(self, name, cast=Decimal):
+        value = self.request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return cast(value)
+        except (ValueError, ArithmeticError):
+            raise ValidationError({name: 'Enter a number.'})
+
+    def get_category_ids(self):
+        # ?category=3, ?category=3,5 and ?category=3&category=5 all work.
+        values = [v for raw in self.request.query_params.getlist('category') for v in raw.split(',') if v]
+        try:
+            return [int(v) for v in values]
+        except ValueError:
+            raise ValidationError({'category': 'Enter category ids.'})
 
-        if self.request.query_params.get('is_innovative_project') == 'true':
+    def facet_conditions(self):
+        """{facet: Q} for the facet filters (category, price, stock) in the request."""
+        params = self.request.query_params
+        conditions = {}
+        categories = self.get_category_ids()
+        if categories:
+            conditions['category'] = Q(category_id__in=categories)
+        price = Q()
+        min_price = self.get_number_param('min_price')
+        if min_price is not None:
+            price &= Q(price__gte=min_price)
+        max_price = self.get_number_param('max_price')
+        if max_price is not None:
+            price &= Q(price__lte=max_price)
+        if price:
+            conditions['price'] = price
+        if params.get('in_stock') == 'true':
+            conditions['stock'] = Q(stock__gt=0)
+        elif params.get('in_stock') == 'false':
+            conditions['stock'] = Q(stock__lte=0)
+        return conditions
+
+    def filter_catalog(self, queryset, facet_filters=True, ranked=True):
+        """
+        Apply the catalog filters. Facet counts are computed without the
+        facet filters (catalog_facets applies each one to the other facets'
+        counts) and without the search ranking, which a grouped facet query
+        cannot build on.
+        """
+        params = self.request.query_params
+
+        if facet_filters:
+            for condition in self.facet_conditions().values():
+                queryset = queryset.filter(condition)
+
+        min_rating = self.get_number_param('min_rating', float)
+        if min_rating is not None:
+            queryset = queryset.filter(average_rating__gte=min_rating)
+
+        if params.get('is_innovative_project') == 'true':
             queryset = queryset.filter(is_innovative_project=True)
-            
+
+        search = params.get('q') # Support search query
+        if search:
+            if ranked:
+                # Ranked lookup in the search index; ?ordering= still takes precedence
+                queryset = search_products(queryset, search)
+            else:
+                queryset = queryset.filter(pk__in=search_products(Product.objects.all(), search).values('pk'))
+
         return queryset
 
-class CategoryViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        if self.action == 'list':
+            queryset = self.get_list_queryset()
+        else:
+            queryset = Product.objects.select_related('category').prefetch_related('product_images').all()
+        return self.filter_catalog(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get('facets') == 'true':
+            base = self.filter_catalog(Product.objects.all(), facet_filters=False, ranked=False)
+            response.data['facets'] = catalog_facets(base, self.facet_conditions())
+        return response
+
+    # Bulk catalog I/O (admin only, see get_permissions). The format is
+    # ?as=csv|ndjson; DRF reserves ?format= for renderer selection.
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        file_format = request.query_params.get('as', 'csv')
+        if file_format not in FORMATS:
+            raise ValidationError({'as': f"Choose one of: {', '.join(FORMATS)}."})
+        response = StreamingHttpResponse(export_lines(file_format), content_type=FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            raise ValidationError({'file': 'Upload a CSV or NDJSON file.'})
+        file_format = request.query_params.get('as') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_format not in FORMATS:
+            raise ValidationError({'as': f"Choose one of: {', '.join(FORMATS)}."})
+        return Response(import_rows(read_rows(upload, file_format)))
+
+    # Stock ledger (admin only): GET lists a product's movements, newest
+    # first; POST records a restock, adjustment or return.
+    @action(detail=True, methods=['get', 'post'], url_path='stock')
+    def stock(self, request, pk=None):
+        product = self.get_object()
+        if request.method == 'GET':
+            paginator = StockMovementPagination()
+            page = paginator.paginate_queryset(product.stock_movements.all(), request)
+            return paginator.get_paginated_response(StockMovementSerializer(page, many=True).data)
+
+        serializer = StockMovementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            stock = move_stock(product.pk, **serializer.validated_data)
+        except StockError as exc:
+            raise ValidationError({'change': str(exc)})
+        return Response({'stock': stock}, status=201)
+
+class CategoryViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    # Product counts are part of each category.
+    cache_dependencies = etag_dependencies = [Category, Product]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['category_counts'] = get_category_counts()
+        return context
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -51,7 +255,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(CachedReadMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -63,11 +267,29 @@ class ReviewViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(product_id=product_id)
         return queryset
 
+    # Each write also folds the rating into the product's stored aggregates.
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user)
+            apply_rating_change(review.product_id, added=review.rating)
+
+    def perform_update(self, serializer):
+        old_product_id, old_rating = serializer.instance.product_id, serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            if review.product_id == old_product_id:
+                apply_rating_change(review.product_id, added=review.rating, removed=old_rating)
+            else:
+                apply_rating_change(old_product_id, removed=old_rating)
+                apply_rating_change(review.product_id, added=review.rating)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            apply_rating_change(instance.product_id, removed=instance.rating)
 
-class YouTubeVideoViewSet(viewsets.ModelViewSet):
+
+class YouTubeVideoViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
     queryset = YouTubeVideo.objects.all()
     serializer_class = YouTubeVideoSerializer
 
@@ -76,3 +298,8 @@ class YouTubeVideoViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response(get_stats())
@@ -40,6 +40,7 @@ class StaffMember(models.Model):
     linkedin = models.URLField(blank=True, max_length=255)
     email = models.EmailField(blank=True)
     image = models.ImageField(upload_to='staff/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
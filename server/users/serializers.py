@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from backend.images import SrcsetField
 from .models import Profile, StaffMember
 from django.contrib.auth.password_validation import validate_password
 
@@ -42,7 +43,9 @@ class RegisterSerializer(serializers.Serializer):
         return value
 
 class StaffMemberSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image_variants')
+
     class Meta:
         model = StaffMember
-        fields = '__all__'
+        exclude = ['image_variants']
 
@@ -728,13 +728,14 @@ from rest_framework import viewsets, filters
 from rest_framework.pagination import PageNumberPagination
 from .models import StaffMember
 from .serializers import StaffMemberSerializer
+from backend.conditional import ConditionalGetMixin
 
 class StaffMemberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class StaffMemberViewSet(viewsets.ModelViewSet):
+class StaffMemberViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = StaffMemberSerializer
     pagination_class = StaffMemberPagination
     filter_backends = [filters.SearchFilter]
@@ -6,6 +6,7 @@ class Workshop(models.Model):
     date = models.DateField()
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -13,6 +14,8 @@ class Workshop(models.Model):
 class WorkshopImage(models.Model):
     workshop = models.ForeignKey(Workshop, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='workshop_images/')
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Image for {self.workshop.title}"
@@ -1,10 +1,13 @@
 from rest_framework import serializers
+from backend.images import SrcsetField
 from .models import Workshop, WorkshopImage
 
 class WorkshopImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='variants')
+
     class Meta:
         model = WorkshopImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset']
 
 class WorkshopSerializer(serializers.ModelSerializer):
     images = WorkshopImageSerializer(many=True, read_only=True)
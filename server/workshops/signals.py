@@ -0,0 +1,4 @@
+from backend import images
+from .models import WorkshopImage
+
+images.register(WorkshopImage, 'image', 'variants')
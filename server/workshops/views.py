@@ -3,10 +3,12 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Workshop, WorkshopImage
 from .serializers import WorkshopSerializer
+from backend.conditional import ConditionalGetMixin
 
-class WorkshopViewSet(viewsets.ModelViewSet):
+class WorkshopViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Workshop.objects.all().order_by('-date')
     serializer_class = WorkshopSerializer
+    etag_dependencies = [Workshop, WorkshopImage]
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']: